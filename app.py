@@ -4,12 +4,20 @@ from dash import Dash, _dash_renderer, html, dcc
 from constants import * 
 from layouts.appshell import create_appshell
 from layouts.login import create_login_layout
-from auth import login_manager, verify_password, User, create_user, authenticate_user, get_user_companies, token_required, get_user_by_username_sync
+from auth import login_manager, verify_password, User, create_user, authenticate_user, get_user_companies, token_required, login_or_token_required, get_user_by_username_sync
 from flask_login import login_user, logout_user, current_user
 from dash.dependencies import Input, Output, State
 import os
 from datetime import datetime
-from flask import send_from_directory, request, jsonify
+from flask import Response, send_from_directory, send_file, request, jsonify
+from helpers.http_client import http_metrics
+from core.exports import EXPORT_FORMATS, build_export, export_file_name, parse_export_filters
+from core.metrics import init_app as init_metrics, render_metrics
+from core.cache_budget import init_app as init_cache_partitions
+from core.data_manager import data_manager
+from core.executor import executor
+from core.dashboard_factory import dashboard_factory
+from config.dashboard_configs import DASHBOARD_CONFIGS
 #from core.bd import dataOut
 _dash_renderer._set_react_version("18.2.0")
 
@@ -20,6 +28,12 @@ data = {
     'tipo_empresa':RUBRO_EMPRESA,
 }
 
+# Plantillas de figuras de Mantine: una sola vez por proceso (antes estaba en cada página)
+dmc.add_figure_templates(default="mantine_light")
+
+# Plan de datos de todos los dashboards: valida sus columnas y provisiona solo lo que usan.
+# Se compila antes de Dash(), que importa las páginas
+dashboard_factory.compile(DASHBOARD_CONFIGS)
 
 app = Dash(
     __name__,
@@ -47,38 +61,40 @@ def serve_resource(path):
 # Configurar la clave secreta para Flask
 app.server.secret_key = os.environ.get('SECRET_KEY', 'una-clave-secreta-muy-segura-123')  # En producción, usa una clave segura desde variables de entorno
 
+# Perfil de callbacks: tamaño de petición y respuesta de cada callback
+init_metrics(app.server)
+# Cubos y figuras de cada petición se cargan a la cuota de caché de la empresa del usuario
+init_cache_partitions(app.server)
+
 # Inicializar Flask-Login
 login_manager.init_app(app.server)
 login_manager.login_view = 'login'
 
-# Layout condicional
-app.layout = dmc.MantineProvider(
-    html.Div(
-        children=[
-            html.Link(
-                rel='icon',
-                href='/assets/favicon.ico',
-                type='image/x-icon'
-            ),
-            dcc.Location(id='url', refresh=False),
-            html.Div(id='page-content')
-        ]
+def serve_layout():
+    """
+    Layout de cada carga completa de la app. El AppShell (header, navbar) es parte del layout:
+    al navegar, dash.page_container solo reemplaza el contenido de la página.
+    Es una función porque el header muestra el usuario de la sesión.
+    """
+    #if not current_user.is_authenticated:
+    #    return create_login_layout()
+    return dmc.MantineProvider(
+        html.Div(
+            children=[
+                html.Link(
+                    rel='icon',
+                    href='/assets/favicon.ico',
+                    type='image/x-icon'
+                ),
+                dcc.Location(id='url', refresh=False),
+                create_appshell(data),
+            ]
+        )
     )
-)
 
-@app.callback(
-    Output('page-content', 'children'),
-    [Input('url', 'pathname')]
-)
-def display_page(pathname):
-    #if pathname == '/login':
-    #    if current_user.is_authenticated:
-    #        return dcc.Location(pathname='/', id='redirect-to-home')
-   #     return create_login_layout()
-    
-    #if not current_user.is_authenticated:
-    #    return dcc.Location(pathname='/login', id='redirect-to-login')
-    return create_appshell(data)
+app.layout = serve_layout
+# El router de páginas exige dash.page_container en validation_layout al registrarse
+app.validation_layout = html.Div([dcc.Location(id='url'), dash.page_container])
 
 @app.callback(
     [Output('url', 'pathname'),
@@ -172,6 +188,34 @@ def get_companies():
     companies = get_user_companies(request.user['user_id'])
     return jsonify(companies), 200
 
+@app.server.route('/export/<source_name>', methods=['GET'])
+@login_or_token_required
+def export_source(source_name):
+    """
+    Descarga los datos filtrados de una fuente (xlsx, csv o parquet), servidos desde disco.
+    Exige sesión iniciada o token, como las demás rutas de datos: sin filtros es la fuente completa.
+    """
+    fmt = request.args.get('format', 'xlsx')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'message': f'Unsupported format: {fmt}'}), 400
+    
+    filters = parse_export_filters(request.args)
+    try:
+        path = build_export(source_name, filters, fmt)
+    except Exception as e:
+        print(f"❌ Error exportando '{source_name}': {e}")
+        return jsonify({'message': 'Export failed'}), 500
+    if path is None:
+        return jsonify({'message': 'Source not found'}), 404
+    
+    return send_file(
+        path,
+        mimetype=EXPORT_FORMATS[fmt][0],
+        as_attachment=True,
+        download_name=export_file_name(source_name, filters, fmt),
+        max_age=0,
+    )
+
 @app.server.route('/health', methods=['GET'])
 def health_check():
     """Endpoint de health check para Docker healthcheck"""
@@ -184,7 +228,13 @@ def health_check():
             'services': {
                 'dashboard': 'running',
                 'database': 'connected' if check_db_connection() else 'disconnected'
-            }
+            },
+            # Peticiones salientes de este worker (Graph, SUNAT): reintentos y latencia por host
+            'http': http_metrics(),
+            # Memoria de la caché (presupuesto, particiones por empresa, desalojos) y de las fuentes
+            'memory': data_manager.memory_stats(),
+            # Pool de cálculo de los callbacks: tareas en cola y las calculadas en el hilo de la petición
+            'executor': executor.stats()
         }
         return jsonify(health_data), 200
     except Exception as e:
@@ -194,6 +244,11 @@ def health_check():
             'timestamp': datetime.utcnow().isoformat()
         }), 503
 
+@app.server.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Histogramas de tiempos por fase y por callback de este worker, en formato Prometheus"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 def check_db_connection():
     """Verifica conexión a la base de datos"""
     try:
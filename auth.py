@@ -3,7 +3,7 @@ import secrets
 import yaml
 from datetime import datetime, timedelta
 from functools import wraps
-from flask_login import LoginManager, UserMixin
+from flask_login import LoginManager, UserMixin, current_user
 from flask import request
 from models import (
     DatabaseManager, 
@@ -297,3 +297,14 @@ def token_required(f):
     
     return decorated
 
+def login_or_token_required(f):
+    """Decorator to require a logged-in session (links opened from the dashboards) or a valid token"""
+    token_view = token_required(f)
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if current_user.is_authenticated:
+            return f(*args, **kwargs)
+        return token_view(*args, **kwargs)
+
+    return decorated
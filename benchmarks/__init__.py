@@ -0,0 +1,4 @@
+"""
+Benchmarks y pruebas de carga del APG BI Dashboard
+Ejecutar desde la raíz del proyecto (necesita config.yaml)
+"""
@@ -0,0 +1,78 @@
+"""
+Benchmark: helpers de limpieza aplicados con .apply (por fila) vs versiones por columna
+
+Se mide con columnas de objetos (lectura normal de parquet) y con texto Arrow
+(DataFrames mapeados desde el almacén compartido, pd.ArrowDtype).
+
+Uso:
+    python -m benchmarks.bench_clean_columns --rows 1000000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from helpers.helpers import (
+    limpiar_kg_exportables,
+    limpiar_kg_exportables_serie,
+    corregir_hora_tarde,
+    corregir_hora_tarde_serie,
+    split_if_colon_at_3,
+    split_if_colon_at_3_serie,
+)
+
+
+def make_columns(rows: int, arrow: bool = False) -> dict:
+    """Columnas con la forma de los datos de origen (kg con y sin punto, horas, 'NN: texto')"""
+    rng = np.random.default_rng(0)
+    kg = rng.integers(1, 30000, rows).astype(str).astype(object)
+    con_punto = rng.random(rows) < 0.5
+    kg[con_punto] = (rng.integers(1, 30000, con_punto.sum()) / 1000).astype(str)
+
+    horas = pd.Series(rng.integers(0, 24, rows)).map('{:02d}'.format) + ':' + \
+        pd.Series(rng.integers(0, 60, rows)).map('{:02d}'.format) + ':00'
+    horas[rng.random(rows) < 0.05] = None
+
+    textos = pd.Series(rng.choice(['01: PACKING', '02: CAMPO', 'ADMINISTRACION', '15: TRANSPORTE '], rows))
+    dtype = pd.ArrowDtype(pa.string()) if arrow else object
+    return {
+        'kg': pd.Series(kg).astype(dtype),
+        'hora': horas.astype(dtype),
+        'texto': textos.astype(dtype),
+    }
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} filas")
+    print(f"{'helper':<26} {'columna':<8} {'apply seg':>10} {'vector seg':>11} {'mejora':>8}")
+    for storage, columns in (('object', make_columns(args.rows)), ('arrow', make_columns(args.rows, arrow=True))):
+        run_cases(storage, columns)
+
+
+def run_cases(storage: str, columns: dict):
+    cases = [
+        ('limpiar_kg_exportables', columns['kg'],
+         lambda s: s.apply(limpiar_kg_exportables), limpiar_kg_exportables_serie),
+        ('corregir_hora_tarde', columns['hora'],
+         lambda s: s.apply(corregir_hora_tarde), corregir_hora_tarde_serie),
+        ('split_if_colon_at_3', columns['texto'],
+         lambda s: pd.DataFrame(s.apply(split_if_colon_at_3).tolist(), index=s.index), split_if_colon_at_3_serie),
+    ]
+    for name, serie, by_row, by_column in cases:
+        _, row_seconds = timed(by_row, serie)
+        _, column_seconds = timed(by_column, serie)
+        print(f"{name:<26} {storage:<8} {row_seconds:>10.3f} {column_seconds:>11.3f} {row_seconds / column_seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
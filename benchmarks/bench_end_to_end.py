@@ -0,0 +1,219 @@
+"""
+Benchmark de punta a punta: carga, filtrado, agregación y figura contra un Graph local
+
+Genera las fuentes sintéticas (OCUPACION TRANSPORTE y MAYOR ANALITICO PACKING) del tamaño
+pedido, las sirve con el stand-in de Graph (benchmarks.graph_stub) y mide por el mismo
+camino que la app:
+    load_sync   DataManager.get_frame de cada fuente (token, listado, descarga, parseo, pipeline)
+    load_async  DataManager.load_sources_async (todas las fuentes en un solo event loop)
+    filter      DataManager.apply_filters con los filtros de los dashboards
+    aggregate   DataManager.get_cube de cada gráfico configurado (sin caché y con caché)
+    figure      ChartComponent.create_figure + serialización JSON de cada gráfico
+    timeseries  gráficos por FECHA: agregación diaria del DataFrame frente a la granularidad
+                automática servida desde rollups precalculados (cubo sin caché)
+
+Los resultados se guardan en JSON para comparar corridas:
+    python -m benchmarks.bench_end_to_end --rows 100000 1000000 --output bench.json
+    python -m benchmarks.bench_end_to_end --rows 100000 --compare bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.graph_stub import start_graph_stub
+from benchmarks.synthetic_sources import SOURCE_FILES, write_sources
+
+FILTER_CASES = {
+    'sin_filtros': {},
+    'year': {'year': '2025'},
+    'year_month': {'year': '2025', 'month': '3'},
+    'year_month_weeks': {'year': '2025', 'month': '3', 'week': ['10', '11', '12']},
+}
+REGRESSION_RATIO = 1.2
+
+
+def measure(func: Callable, repeat: int, setup: Optional[Callable] = None, quiet: bool = True) -> Dict:
+    """Ejecuta `func` `repeat` veces (con `setup` previo sin medir) y retorna los tiempos"""
+    seconds = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            started = time.perf_counter()
+            func(state) if setup else func()
+            seconds.append(time.perf_counter() - started)
+    return {'seconds': seconds, 'median': statistics.median(seconds), 'min': min(seconds)}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(rows: int, repeat: int) -> List[Dict]:
+    # Importados después de iniciar el stand-in: constants lee GRAPH_BASE_URL al importarse
+    from core.cache_backends import MemoryCacheBackend
+    from core.components import ChartComponent
+    from core.data_manager import DataManager
+    from core.dashboard_plan import canonical_aggregation
+    from core.rollups import time_series_column
+    from config.dashboard_configs import COSTOS_DIARIOS_CONFIG, OCUPACION_TRANSPORTE_CONFIG, VENTAS_CONFIG
+
+    dashboards = [OCUPACION_TRANSPORTE_CONFIG, COSTOS_DIARIOS_CONFIG, VENTAS_CONFIG]
+    sources = list(SOURCE_FILES)
+    results = []
+
+    def record(benchmark: str, case: str, result: Dict):
+        results.append({'benchmark': benchmark, 'case': case, 'rows': rows, **result})
+        print(f"   {benchmark:<11} {case:<42} {result['median'] * 1000:>10.1f} ms")
+
+    def fresh_manager():
+        return DataManager(cache_backend=MemoryCacheBackend())
+
+    for source in sources:
+        record('load_sync', source, measure(lambda dm, s=source: dm.get_frame(s), repeat, fresh_manager))
+    record('load_async', '+'.join(sources),
+           measure(lambda dm: asyncio.run(dm.load_sources_async(sources)), repeat, fresh_manager))
+
+    manager = fresh_manager()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for source in sources:
+            manager.get_frame(source)
+
+    for source in sources:
+        for case, filters in FILTER_CASES.items():
+            record('filter', f"{source}:{case}",
+                   measure(lambda: manager.apply_filters({'source': source}, filters), repeat))
+
+    for dashboard in dashboards:
+        for i, chart in enumerate(dashboard['charts']):
+            source = chart.get('data_source', dashboard['data_sources'][0])
+            aggregation = chart.get('aggregation', {})
+            filters = FILTER_CASES['year']
+            case = f"{dashboard['dashboard_id']}:chart-{i}"
+
+            def cold_cube(_):
+                return manager.get_cube({'source': source}, filters, aggregation)
+
+            def reset_cube_cache():
+                manager.cache = MemoryCacheBackend()  # el almacén de fuentes conserva su backend
+
+            record('aggregate', f"{case}:cold", measure(cold_cube, repeat, reset_cube_cache))
+            record('aggregate', f"{case}:cached",
+                   measure(lambda: manager.get_cube({'source': source}, filters, aggregation), repeat))
+
+            cube = manager.get_cube({'source': source}, filters, aggregation)
+            component = ChartComponent(f"{dashboard['dashboard_id']}-chart-{i}", chart)
+            record('figure', case, measure(lambda: component.create_figure(cube, {}).to_json(), repeat))
+
+            aggregation = canonical_aggregation(aggregation)
+            if not time_series_column(chart, aggregation):
+                continue
+            manager.rollup_specs[source] = [aggregation]
+
+            def with_rollups():
+                reset_cube_cache()
+                manager.precompute_rollups(source)
+
+            for filter_case in ('sin_filtros', 'year'):
+                filters = FILTER_CASES[filter_case]
+
+                def daily_raw(_):
+                    return manager.get_cube({'source': source}, filters, aggregation)
+
+                def auto_rollup(_):
+                    span_days = manager.get_date_span({'source': source}, filters, aggregation)
+                    grain = component.select_granularity(span_days)
+                    return manager.get_cube({'source': source}, filters, aggregation, grain)
+
+                record('timeseries', f"{case}:{filter_case}:daily_raw", measure(daily_raw, repeat, reset_cube_cache))
+                record('timeseries', f"{case}:{filter_case}:auto_rollup", measure(auto_rollup, repeat, with_rollups))
+
+    return results
+
+
+def compare(current: List[Dict], baseline_path: str) -> int:
+    """Imprime la relación con una corrida anterior. Retorna el número de regresiones"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['benchmark'], r['case'], r['rows']): r for r in json.load(f)['results']}
+
+    regressions = 0
+    print(f"\n📈 Comparación con {baseline_path} (mediana actual / anterior)")
+    for result in current:
+        previous = baseline.get((result['benchmark'], result['case'], result['rows']))
+        if not previous or not previous['median']:
+            continue
+        ratio = result['median'] / previous['median']
+        flag = '⚠️' if ratio > REGRESSION_RATIO else '  '
+        regressions += ratio > REGRESSION_RATIO
+        print(f"{flag} {result['benchmark']:<11} {result['case']:<42} {result['rows']:>9,} x{ratio:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0, help='Latencia simulada del stand-in (s)')
+    parser.add_argument('--output', help='Archivo JSON de resultados (por defecto benchmarks/results/)')
+    parser.add_argument('--compare', help='JSON de una corrida anterior para detectar regresiones')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    data_root = tempfile.mkdtemp(prefix='apg_bi_bench_')
+    server = start_graph_stub(data_root, latency=args.latency)
+    print(f"🛰️ Graph stand-in en {server.base_url}")
+
+    results = []
+    try:
+        for rows in args.rows:
+            directory = os.path.join(data_root, str(rows))
+            write_sources(directory, rows)
+            server.directory = directory
+            print(f"\n📊 {rows:,} filas por fuente")
+            results.extend(run_suite(rows, args.repeat))
+    finally:
+        server.shutdown()
+
+    import pandas as pd
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'repeat': args.repeat,
+            'latency': args.latency,
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"end_to_end_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Resultados en {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: filtros y agregaciones de DataManager con engine pandas vs duckdb
+
+Genera MAYOR ANALITICO PACKING sintético, lo registra con cada motor y mide get_cube (sin
+caché de cubos) y apply_filters con los filtros de los dashboards. Cada resultado de duckdb
+se compara con el de pandas antes de medir; una diferencia aborta el benchmark.
+
+Uso:
+    python -m benchmarks.bench_engines --rows 1000000 --threads 4
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import pandas as pd
+from benchmarks.synthetic_sources import make_mayor_analitico_packing
+from core.cache_backends import MemoryCacheBackend
+from core.data_manager import DataManager
+from core.sql_engine import SqlEngine
+
+SOURCE = 'mayor_analitico_packing'
+FILTER_CASES = {
+    'sin_filtros': {},
+    'year': {'year': '2025'},
+    'year_month': {'year': '2025', 'month': '3'},
+    'year_month_weeks': {'year': '2025', 'month': '3', 'week': ['10', '11', '12']},
+}
+AGGREGATIONS = {
+    'semana': ({'groupby': ['SEMANA'], 'agg': {'MONTO': 'sum', 'DOCUMENTO': 'count'}}, None),
+    'cuenta_mes': ({'groupby': ['CUENTA', 'MES'], 'agg': {'MONTO': 'mean', 'KG': 'max'}}, None),
+    'fecha_dia': ({'groupby': ['FECHA'], 'agg': {'MONTO': 'sum', 'KG': 'mean'}}, 'day'),
+    'fecha_nunique': ({'groupby': ['FECHA'], 'agg': {'DOCUMENTO': 'nunique', 'KG': 'median'}}, None),
+}
+
+
+def make_manager(engine: str, df: pd.DataFrame, mirror_dir: str, threads: int) -> DataManager:
+    dm = DataManager(cache_backend=MemoryCacheBackend())
+    dm._sql_engine = SqlEngine(mirror_dir, threads=threads)
+    dm.register_source(SOURCE, 'MAYOR ANALITICO PACKING.parquet', 'packing-data-store', engine=engine)
+    dm._download_frame = lambda source, progress=None: ('v1', dm.data_sources[source.name].process(df.copy()))
+    dm.precompute_rollups(SOURCE)  # carga la fuente (y escribe el espejo) fuera de la medición
+    return dm
+
+
+def drop_cubes(dm: DataManager):
+    for key in [key for key in dm.cache._data if key.startswith('cube:')]:
+        dm.cache.delete(key)
+
+
+def timed(func, repeat: int) -> float:
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - started)
+    return statistics.median(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=None, help='Hilos de DuckDB (por defecto todos los núcleos)')
+    args = parser.parse_args()
+
+    df = make_mayor_analitico_packing(args.rows)
+    df['KG'] = pd.to_numeric(df['KG EXPORTABLES'], errors='coerce')
+    mirror_dir = tempfile.mkdtemp(prefix='apg_bi_mirror_')
+    managers = {engine: make_manager(engine, df, mirror_dir, args.threads) for engine in ('pandas', 'duckdb')}
+    data = {'source': SOURCE}
+
+    print(f"📊 {args.rows:,} filas, espejo en {mirror_dir}")
+    print(f"{'caso':<36} {'pandas seg':>11} {'duckdb seg':>11} {'mejora':>8}")
+    for filter_name, filters in FILTER_CASES.items():
+        cases = {f"filter/{filter_name}": lambda dm, filters=filters: dm.apply_filters(data, filters)}
+        for name, (aggregation, grain) in AGGREGATIONS.items():
+            cases[f"cube/{name}/{filter_name}"] = \
+                lambda dm, aggregation=aggregation, grain=grain, filters=filters: (
+                    drop_cubes(dm), dm.get_cube(data, filters, aggregation, granularity=grain))[1]
+
+        for case, func in cases.items():
+            expected = func(managers['pandas']).reset_index(drop=True)
+            pd.testing.assert_frame_equal(func(managers['duckdb']).reset_index(drop=True), expected)
+            pandas_seconds = timed(lambda: func(managers['pandas']), args.repeat)
+            duckdb_seconds = timed(lambda: func(managers['duckdb']), args.repeat)
+            print(f"{case:<36} {pandas_seconds:>11.4f} {duckdb_seconds:>11.4f} {pandas_seconds / duckdb_seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: exportación a Excel en modo normal (implementación anterior) vs motor write-only
+
+Mide tiempo y crecimiento del pico de memoria residente (RSS) durante la exportación.
+Cada caso corre en un subproceso para que los picos no se contaminen entre sí.
+
+Uso:
+    python -m benchmarks.bench_excel_export --rows 10000 50000 200000
+"""
+import argparse
+import io
+import json
+import subprocess
+import sys
+import resource
+import time
+import numpy as np
+import pandas as pd
+
+
+def legacy_create_format_excel_in_memory(dff: pd.DataFrame) -> bytes:
+    """Copia de create_format_excel_in_memory antes del motor write-only (referencia)"""
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+    from openpyxl.worksheet.table import Table, TableStyleInfo
+
+    excel_buffer = io.BytesIO()
+    with pd.ExcelWriter(excel_buffer, engine="openpyxl") as writer:
+        dff.to_excel(writer, index=False, sheet_name="TIEMPOS")
+        ws = writer.sheets["TIEMPOS"]
+        header_fill = PatternFill(start_color="B7DEE8", end_color="B7DEE8", fill_type="solid")
+        for col_num, col in enumerate(dff.columns, 1):
+            cell = ws.cell(row=1, column=col_num)
+            cell.font = Font(bold=True)
+            cell.fill = header_fill
+        for i, col in enumerate(dff.columns, 1):
+            max_length = max(
+                [len(str(cell.value)) if cell.value is not None else 0 for cell in ws[get_column_letter(i)]]
+            )
+            ws.column_dimensions[get_column_letter(i)].width = max_length + 2
+        ws.freeze_panes = "A2"
+        table_ref = f"A1:{get_column_letter(dff.shape[1])}{dff.shape[0] + 1}"
+        tabla = Table(displayName="TIEMPOS_TABLA", ref=table_ref)
+        tabla.tableStyleInfo = TableStyleInfo(name="TableStyleMedium9", showRowStripes=True)
+        ws.add_table(tabla)
+    return excel_buffer.getvalue()
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """DataFrame con columnas similares al mayor analítico"""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'FECHA': pd.Timestamp('2024-08-01') + pd.to_timedelta(rng.integers(0, 400, rows), unit='D'),
+        'CUENTA': rng.integers(600000, 700000, rows).astype(str),
+        'DESCRIPCION PROYECTO': rng.choice(['PACKING', 'CAMPO', 'ADMINISTRACION', 'TRANSPORTE'], rows),
+        'GLOSA': rng.choice(['Compra de materiales de embalaje', 'Servicio de transporte', 'Planilla'], rows),
+        'MONTO': rng.normal(1500, 400, rows).round(2),
+    })
+
+
+def current_rss_kb() -> int:
+    """Memoria residente actual del proceso en KB (Linux)"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def run_case(engine: str, rows: int) -> dict:
+    from helpers.helpers import create_format_excel_in_memory
+
+    df = make_frame(rows)
+    export = create_format_excel_in_memory if engine == 'streaming' else legacy_create_format_excel_in_memory
+
+    rss_before = current_rss_kb()
+    started = time.perf_counter()
+    data = export(df)
+    elapsed = time.perf_counter() - started
+    peak_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    return {'engine': engine, 'rows': rows, 'seconds': round(elapsed, 3),
+            'peak_mb': round(max(peak_growth, 0) / 1024, 1), 'size_mb': round(len(data) / 1024 ** 2, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--engines', nargs='+', default=['legacy', 'streaming'])
+    parser.add_argument('--case', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], int(args.case[1]))))
+        return
+
+    print(f"{'motor':<10} {'filas':>8} {'seg':>8} {'pico MB':>9} {'xlsx MB':>8}")
+    for rows in args.rows:
+        for engine in args.engines:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_excel_export', '--case', engine, str(rows)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['engine']:<10} {result['rows']:>8} {result['seconds']:>8} "
+                  f"{result['peak_mb']:>9} {result['size_mb']:>8}")
+
+
+if __name__ == '__main__':
+    main()
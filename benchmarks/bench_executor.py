@@ -0,0 +1,91 @@
+"""
+Benchmark: callbacks de gráficos y métricas concurrentes en el hilo de la petición vs core.executor
+
+Publica MAYOR ANALITICO PACKING sintético en un directorio compartido (SharedFrameStore) y lanza
+`--concurrency` hilos que, como los de un worker gthread, piden gráficos y métricas con filtros
+distintos (sin aciertos de caché). Mide el tiempo total y la latencia por petición con el cálculo
+en el mismo proceso (GIL compartido) y con --processes procesos de cálculo. Los resultados de
+ambos modos se comparan antes de medir.
+
+Uso:
+    python -m benchmarks.bench_executor --rows 1000000 --requests 48 --concurrency 8 --processes 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SOURCE = 'mayor_analitico_packing'
+CHART = {'type': 'bar', 'x': 'CUENTA', 'y': 'MONTO'}
+AGGREGATION = {'groupby': ['CUENTA'], 'agg': {'MONTO': 'sum'}}
+METRICS = [{'name': 'monto', 'type': 'sum', 'column': 'MONTO'}, {'name': 'registros', 'type': 'count'},
+           {'name': 'kg', 'type': 'avg', 'column': 'KG'}]
+
+
+def request_filters(count: int, start: int = 0):
+    """
+    Filtros de cada petición. 'peticion' no filtra (no es un filtro de fecha) pero cambia la clave
+    de la caché: ningún cubo se sirve desde la caché y el cálculo se repite en cada petición.
+    """
+    return [{'year': '2025', 'month': str(i % 12 + 1), 'peticion': i} for i in range(start, start + count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--requests', type=int, default=48)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    # El directorio compartido debe estar configurado antes de crear DataManager (y sus procesos)
+    os.environ['SHARED_FRAMES_DIR'] = tempfile.mkdtemp(prefix='apg_bi_shared_')
+    import pandas as pd
+    from benchmarks.synthetic_sources import make_mayor_analitico_packing
+    from core.components import ChartComponent, MetricsComponent
+    from core.dashboard_factory import compute_metrics, render_chart
+    from core.data_manager import data_manager
+    from core.executor import ComputeExecutor, source_versions
+
+    df = make_mayor_analitico_packing(args.rows)
+    df['KG'] = pd.to_numeric(df['KG EXPORTABLES'], errors='coerce')
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_manager.frame_store.publish(SOURCE, 'bench', data_manager.data_sources[SOURCE].process(df))
+    data = {'source': SOURCE}
+    chart, metrics = ChartComponent('bench', CHART), MetricsComponent('bench', METRICS)
+
+    def run_requests(executor, filters_list):
+        def one(filters):
+            started = time.perf_counter()
+            sources = source_versions(data)
+            figure, _ = executor.run(render_chart, chart, CHART, AGGREGATION, data, filters, sources=sources, task='chart')
+            values, _ = executor.run(compute_metrics, metrics, METRICS, data, filters, sources=sources, task='metrics')
+            return (figure, values), time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            results = list(pool.map(one, filters_list))
+        return [result for result, _ in results], [seconds for _, seconds in results], time.perf_counter() - started
+
+    modes = {'inline': ComputeExecutor(processes=0), 'procesos': ComputeExecutor(processes=args.processes)}
+    print(f"📊 {args.rows:,} filas, {args.requests} peticiones, {args.concurrency} hilos, {args.processes} procesos")
+    check = request_filters(args.concurrency)
+    expected, _, _ = run_requests(modes['inline'], check)
+    assert run_requests(modes['procesos'], check)[0] == expected, "Los resultados difieren entre modos"
+
+    print(f"{'modo':<10} {'total seg':>10} {'p50 seg':>9} {'p95 seg':>9} {'pet/seg':>9}")
+    for offset, (mode, executor) in enumerate(modes.items()):
+        filters_list = request_filters(args.requests, start=(offset + 1) * 100000)
+        _, latencies, total = run_requests(executor, filters_list)
+        latencies.sort()
+        print(f"{mode:<10} {total:>10.2f} {statistics.median(latencies):>9.3f} "
+              f"{latencies[int(len(latencies) * 0.95) - 1]:>9.3f} {args.requests / total:>9.1f}")
+        executor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Stand-in local de Microsoft Graph para benchmarks y pruebas de carga
+
+Atiende los tres endpoints que usa el DataManager:
+    POST /<tenant>/oauth2/v2.0/token                     -> token de acceso
+    GET  /v1.0/drives/<drive>/items/<folder>/children    -> listado de los parquet del directorio
+    GET  /files/<nombre>                                 -> contenido del archivo (acepta Range)
+
+La app apunta al stand-in con GRAPH_LOGIN_URL y GRAPH_BASE_URL (ver environment()).
+Opcionalmente agrega latencia por petición para simular la red.
+
+Uso:
+    python -m benchmarks.graph_stub --data bench_data --port 8790 --latency 0.05
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import quote, unquote
+
+
+class GraphStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GraphStub/1.0'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path.endswith('/oauth2/v2.0/token'):
+            return self._send_json({'token_type': 'Bearer', 'expires_in': 3599, 'access_token': 'stub-token'})
+        self._send_json({'error': 'not_found'}, 404)
+
+    def do_GET(self):
+        if self.path.startswith('/v1.0/drives/') and self.path.endswith('/children'):
+            return self._send_json({'value': self.server.listing()})
+        if self.path.startswith('/files/'):
+            return self._send_file(unquote(self.path[len('/files/'):]))
+        self._send_json({'error': 'not_found'}, 404)
+
+    def _delay(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def _send_json(self, payload, status: int = 200):
+        self._delay()
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, name: str):
+        path = os.path.join(self.server.directory, os.path.basename(name))
+        if not os.path.isfile(path):
+            return self._send_json({'error': 'not_found'}, 404)
+        self._delay()
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        requested = self.headers.get('Range')
+        if requested and requested.startswith('bytes='):
+            first, _, last = requested[len('bytes='):].partition('-')
+            if first:
+                start, end = int(first), min(int(last), size - 1) if last else size - 1
+            else:
+                start = max(size - int(last), 0)
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        self.server.bytes_sent += end - start + 1
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining and (chunk := f.read(min(remaining, 1024 * 1024))):
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    def log_message(self, *args):
+        pass
+
+
+class GraphStubServer(ThreadingHTTPServer):
+    """Servidor del stand-in sobre un directorio de parquet"""
+
+    daemon_threads = True
+
+    def __init__(self, directory: str, port: int = 0, latency: float = 0.0):
+        super().__init__(('127.0.0.1', port), GraphStubHandler)
+        self.directory = directory
+        self.latency = latency
+        self.bytes_sent = 0  # bytes de archivos entregados (completos o por rango)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def listing(self):
+        """Items como los de Graph: el eTag cambia cuando cambia el archivo"""
+        items = []
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if not name.endswith('.parquet') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            items.append({
+                'name': name,
+                'size': stat.st_size,
+                'eTag': f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+                'lastModifiedDateTime': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(stat.st_mtime)),
+                '@microsoft.graph.downloadUrl': f"{self.base_url}/files/{quote(name)}",
+            })
+        return items
+
+    def environment(self) -> Dict[str, str]:
+        """Variables de entorno para que la app use el stand-in"""
+        return {'GRAPH_BASE_URL': f"{self.base_url}/v1.0", 'GRAPH_LOGIN_URL': self.base_url}
+
+    def start(self) -> 'GraphStubServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def start_graph_stub(directory: str, port: int = 0, latency: float = 0.0,
+                     apply_env: bool = True) -> GraphStubServer:
+    """
+    Inicia el stand-in en un hilo. Con apply_env=True exporta GRAPH_BASE_URL y GRAPH_LOGIN_URL
+    (deben fijarse antes de importar constants).
+    """
+    server = GraphStubServer(directory, port, latency).start()
+    if apply_env:
+        os.environ.update(server.environment())
+    return server
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='bench_data', help='Directorio con los parquet')
+    parser.add_argument('--rows', type=int, default=0, help='Generar fuentes sintéticas con estas filas')
+    parser.add_argument('--port', type=int, default=8790)
+    parser.add_argument('--latency', type=float, default=0.0, help='Segundos de latencia por petición')
+    args = parser.parse_args(argv)
+
+    if args.rows:
+        from benchmarks.synthetic_sources import write_sources
+        write_sources(args.data, args.rows)
+
+    server = GraphStubServer(args.data, args.port, args.latency)
+    print(f"🛰️ Graph stand-in en {server.base_url} sirviendo {args.data}")
+    for name, value in server.environment().items():
+        print(f"   export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
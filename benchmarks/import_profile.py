@@ -0,0 +1,133 @@
+"""
+Perfil de importación y arranque en frío de la app
+
+Ejecuta en un proceso nuevo `import app` + wsgi.prime_app() con `python -X importtime` y reporta:
+    - tiempo total de arranque en frío y memoria (RSS máximo) frente al objetivo
+    - costo por módulo del proyecto (incluye las páginas, que Dash carga con exec_module)
+    - paquetes de terceros más caros
+
+Uso:
+    python -m benchmarks.import_profile --target 2.5
+    python -m benchmarks.import_profile --target 2.5 --strict   # sale con error si se excede
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+PROJECT_PACKAGES = ('app', 'wsgi', 'auth', 'models', 'constants', 'utils',
+                    'pages', 'core', 'helpers', 'components', 'layouts', 'config')
+DEFAULT_TARGET = 2.5  # segundos de arranque en frío (import + primera petición)
+
+# Código del proceso hijo: mide las fases y el tiempo de ejecución de cada página
+CHILD = r'''
+import importlib._bootstrap_external as external
+import json, resource, sys, time
+
+pages = {}
+_exec_module = external.SourceFileLoader.exec_module
+
+def exec_module(self, module):
+    if not module.__name__.startswith('pages.'):
+        return _exec_module(self, module)
+    started = time.perf_counter()
+    try:
+        return _exec_module(self, module)
+    finally:
+        pages[module.__name__] = time.perf_counter() - started
+
+external.SourceFileLoader.exec_module = exec_module
+
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+import wsgi
+wsgi.prime_app()
+primed = time.perf_counter()
+print('__PROFILE__' + json.dumps({
+    'import_seconds': imported - started,
+    'prime_seconds': primed - imported,
+    'pages': pages,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}), file=sys.stdout)
+'''
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Filas de -X importtime: módulo, nivel de anidamiento, tiempo propio y acumulado (s)"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append({'module': name, 'level': len(indent) // 2, 'self': int(self_us) / 1e6,
+                         'cumulative': int(cumulative_us) / 1e6})
+    return rows
+
+
+def profile(python: str = sys.executable) -> Dict:
+    completed = subprocess.run([python, '-X', 'importtime', '-c', CHILD], capture_output=True, text=True)
+    marker = [line for line in completed.stdout.splitlines() if line.startswith('__PROFILE__')]
+    if completed.returncode != 0 or not marker:
+        raise RuntimeError(f"El proceso de perfil falló:\n{completed.stderr[-2000:]}")
+    result = json.loads(marker[-1][len('__PROFILE__'):])
+    result['modules'] = parse_importtime(completed.stderr)
+    result['total_seconds'] = result['import_seconds'] + result['prime_seconds']
+    return result
+
+
+def summarize(result: Dict, top: int = 15) -> Dict:
+    project = {}
+    third_party = defaultdict(float)
+    for row in result['modules']:
+        package = row['module'].split('.')[0]
+        if package in PROJECT_PACKAGES:
+            project[row['module']] = {'self': row['self'], 'cumulative': row['cumulative']}
+        elif '.' not in row['module']:
+            # Paquetes de primer nivel (su acumulado incluye las dependencias que cargaron primero)
+            third_party[package] = max(third_party[package], row['cumulative'])
+    for page, seconds in result['pages'].items():
+        project[page] = {'self': seconds, 'cumulative': seconds}
+    return {
+        'project': dict(sorted(project.items(), key=lambda item: -item[1]['cumulative'])),
+        'third_party': dict(sorted(third_party.items(), key=lambda item: -item[1])[:top]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', type=float, default=DEFAULT_TARGET, help='Objetivo de arranque en frío (s)')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--strict', action='store_true', help='Salir con error si se excede el objetivo')
+    parser.add_argument('--output', help='Guardar el perfil en JSON')
+    args = parser.parse_args()
+
+    result = profile()
+    summary = summarize(result, args.top)
+
+    print("📦 Módulos del proyecto (acumulado / propio, ms)")
+    for module, times in list(summary['project'].items())[:args.top * 2]:
+        print(f"   {module:<40} {times['cumulative'] * 1000:>8.1f} {times['self'] * 1000:>8.1f}")
+    print("\n📚 Paquetes de terceros (acumulado, ms)")
+    for package, seconds in summary['third_party'].items():
+        print(f"   {package:<40} {seconds * 1000:>8.1f}")
+
+    ok = result['total_seconds'] <= args.target
+    print(f"\n{'✅' if ok else '⚠️'} Arranque en frío: {result['total_seconds']:.2f}s "
+          f"(import {result['import_seconds']:.2f}s + primera petición {result['prime_seconds']:.2f}s), "
+          f"objetivo {args.target:.2f}s, RSS máx {result['max_rss_mb']:.0f} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({**result, **summary, 'target_seconds': args.target}, f, indent=2)
+    if args.strict and not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
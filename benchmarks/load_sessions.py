@@ -0,0 +1,355 @@
+"""
+Prueba de carga por sesiones: usuarios virtuales que navegan los dashboards como el navegador
+
+Cada usuario virtual repite sesiones sobre /dashboard, /costos-diarios y /ventas:
+    1. Carga de página: router de páginas y todos los callbacks iniciales en cascada
+       (stores de datos, opciones de filtros, gráficos, métricas, enlace de exportación)
+    2. Cambio de año, de mes y de semanas, disparando los callbacks que dependen de cada filtro
+
+Las peticiones van a /_dash-update-component con el mismo payload que arma el renderer de Dash,
+a partir de /_dash-dependencies, así la prueba sigue a los dashboards sin mantener payloads a mano.
+Por defecto levanta gunicorn (gunicorn.conf.py) contra el stand-in local de Graph con fuentes
+sintéticas; con --url se prueba un servidor ya levantado.
+
+Reporta por callback: peticiones, throughput, latencia p50/p95/p99 y tasa de errores.
+
+Uso:
+    python -m benchmarks.load_sessions --users 20 --duration 60 --rows 200000 --workers 2
+    python -m benchmarks.load_sessions --url http://127.0.0.1:8777 --users 10
+"""
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import requests
+
+from benchmarks.graph_stub import start_graph_stub
+from benchmarks.load_workers import start_server, wait_until_ready
+from benchmarks.synthetic_sources import write_sources
+
+PAGES = ['/dashboard', '/costos-diarios', '/ventas']
+FILTERS = ('year', 'month', 'week')
+BROWSER_CONNECTIONS = 6  # peticiones simultáneas por usuario, como un navegador
+
+
+def _parse_outputs(output: str) -> List[Tuple[str, str]]:
+    """'..a.prop...b.prop..' o 'a.prop@hash' -> [(id, prop), ...]"""
+    multi = output.startswith('..') and output.endswith('..')
+    parts = output[2:-2].split('...') if multi else [output]
+    result = []
+    for part in parts:
+        part = part.split('@', 1)[0]
+        component_id, prop = part.rsplit('.', 1)
+        result.append((component_id, prop))
+    return result
+
+
+class Callback:
+    """Callback de Dash según /_dash-dependencies"""
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        self.output = spec['output']
+        self.multi = self.output.startswith('..')
+        self.outputs = _parse_outputs(self.output)
+        self.inputs = [(i['id'], i['property']) for i in spec['inputs']]
+        self.state = [(s['id'], s['property']) for s in spec.get('state', [])]
+        self.prevent_initial_call = spec.get('prevent_initial_call', False)
+        first_id, first_prop = self.outputs[0]
+        self.name = f"{first_id}.{first_prop}" + (f" +{len(self.outputs) - 1}" if len(self.outputs) > 1 else '')
+
+    def payload(self, values: Dict, changed: List[str]) -> Dict:
+        outputs = [{'id': cid, 'property': prop} for cid, prop in self.outputs]
+        return {
+            'output': self.output,
+            'outputs': outputs if self.multi else outputs[0],
+            'inputs': [{'id': cid, 'property': prop, 'value': values.get((cid, prop))} for cid, prop in self.inputs],
+            'state': [{'id': cid, 'property': prop, 'value': values.get((cid, prop))} for cid, prop in self.state],
+            'changedPropIds': changed,
+        }
+
+
+class Recorder:
+    """Latencias y errores por callback e interacción (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)   # nombre -> [segundos]
+        self.errors = defaultdict(int)
+        self.started = time.perf_counter()
+
+    def add(self, name: str, seconds: float, ok: bool):
+        with self._lock:
+            self.samples[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self) -> List[Dict]:
+        elapsed = time.perf_counter() - self.started
+        rows = []
+        with self._lock:
+            for name, samples in sorted(self.samples.items()):
+                values = np.array(samples)
+                rows.append({
+                    'name': name,
+                    'requests': len(samples),
+                    'rps': len(samples) / elapsed if elapsed else 0.0,
+                    'p50_ms': float(np.percentile(values, 50) * 1000),
+                    'p95_ms': float(np.percentile(values, 95) * 1000),
+                    'p99_ms': float(np.percentile(values, 99) * 1000),
+                    'error_rate': self.errors[name] / len(samples),
+                })
+        return rows
+
+
+def _collect_props(tree, values: Dict, locations: set):
+    """Recorre un árbol de componentes serializado y guarda los props de los que tienen id"""
+    if isinstance(tree, list):
+        for child in tree:
+            _collect_props(child, values, locations)
+        return
+    if not isinstance(tree, dict) or 'props' not in tree:
+        return
+    props = tree['props']
+    component_id = props.get('id')
+    if isinstance(component_id, str) and tree.get('type') == 'Location':
+        locations.add(component_id)
+    for prop, value in props.items():
+        if isinstance(value, (dict, list)) and prop not in ('data', 'value', 'figure'):
+            _collect_props(value, values, locations)
+        if isinstance(component_id, str):
+            values[(component_id, prop)] = value
+
+
+class VirtualUser:
+    """Sesión de un usuario: estado de los componentes y callbacks disparados en cascada"""
+
+    def __init__(self, base_url: str, callbacks: List[Callback], recorder: Recorder, rng: random.Random):
+        self.base_url = base_url
+        self.callbacks = callbacks
+        self.recorder = recorder
+        self.rng = rng
+        self.http = requests.Session()
+        self.http.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=BROWSER_CONNECTIONS))
+        self.executor = ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS)
+        self.values = {}
+        self.path = '/'
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.http.close()
+
+    def _call(self, callback: Callback, changed: List[str]) -> Dict:
+        started = time.perf_counter()
+        ok = False
+        updates = {}
+        try:
+            response = self.http.post(f"{self.base_url}/_dash-update-component",
+                                      json=callback.payload(self.values, changed), timeout=120)
+            ok = response.status_code in (200, 204)
+            if response.status_code == 200:
+                for component_id, props in response.json().get('response', {}).items():
+                    for prop, value in props.items():
+                        updates[(component_id, prop)] = value
+        except (requests.RequestException, ValueError):
+            ok = False
+        self.recorder.add(callback.name, time.perf_counter() - started, ok)
+        return updates
+
+    def _mount(self, tree) -> Tuple[Dict, set]:
+        """
+        Agrega los componentes de un layout al estado. Retorna (cambios, props nuevos):
+        los dcc.Location toman la ruta actual al montarse, como en el navegador.
+        """
+        props, locations = {}, set()
+        _collect_props(tree, props, locations)
+        added = set()
+        for key, value in props.items():
+            if key not in self.values:
+                self.values[key] = value
+                added.add(key)
+        changed = {}
+        for location in locations:
+            changed[(location, 'pathname')] = self.path
+            changed[(location, 'search')] = ''
+        return changed, added
+
+    def _downstream(self, callbacks) -> set:
+        """Props que pueden cambiar como consecuencia de ejecutar `callbacks` (cierre transitivo)"""
+        props, frontier = set(), list(callbacks)
+        seen = set()
+        while frontier:
+            cb = frontier.pop()
+            if id(cb) in seen:
+                continue
+            seen.add(id(cb))
+            props.update(cb.outputs)
+            frontier.extend(other for other in self.callbacks if props.intersection(other.inputs))
+        return props
+
+    def _run_waves(self, changed: Dict, added: Optional[set] = None):
+        """
+        Dispara los callbacks afectados por `changed` (y los iniciales de los props recién montados),
+        luego los afectados por sus salidas. Como el renderer de Dash, un callback espera a que
+        terminen los que pueden cambiar sus inputs; los que están listos van en paralelo.
+        """
+        added = set(added or ())
+        queued = {}  # callback -> props que lo dispararon
+        while changed or added or queued:
+            self.values.update(changed)
+            keys = set(changed)
+            mounted = {component_id for component_id, _ in self.values}
+            for cb in self.callbacks:
+                triggered = keys.intersection(cb.inputs)
+                if (triggered or (not cb.prevent_initial_call and added.intersection(cb.inputs))) \
+                        and all(component_id in mounted for component_id, _ in cb.outputs):
+                    queued.setdefault(cb, set()).update(triggered)
+
+            ready = [cb for cb in queued
+                     if not self._downstream([other for other in queued if other is not cb]).intersection(cb.inputs)]
+            ready = ready or list(queued)
+            futures = [
+                self.executor.submit(self._call, cb, [f"{cid}.{prop}" for cid, prop in queued.pop(cb)])
+                for cb in ready
+            ]
+            changed, added = {}, set()
+            for future in futures:
+                changed.update(future.result())
+            # Los layouts devueltos por callbacks montan componentes nuevos
+            for (component_id, prop), value in list(changed.items()):
+                if prop == 'children' and isinstance(value, (dict, list)):
+                    mount_changed, mount_added = self._mount(value)
+                    changed.update(mount_changed)
+                    added |= mount_added
+
+    def load_page(self, path: str):
+        started = time.perf_counter()
+        response = self.http.get(f"{self.base_url}{path}", timeout=60)
+        self.recorder.add(f"GET {path}", time.perf_counter() - started, response.status_code == 200)
+
+        self.values, self.path = {}, path
+        started = time.perf_counter()
+        layout = self.http.get(f"{self.base_url}/_dash-layout", timeout=60).json()
+        changed, added = self._mount(layout)
+        self._run_waves(changed, added)
+        self.recorder.add(f"[page] {path}", time.perf_counter() - started, True)
+
+    def _filter_id(self, name: str) -> Optional[str]:
+        for component_id, prop in self.values:
+            if prop == 'data' and component_id.endswith(f"-{name}-select"):
+                return component_id
+        return None
+
+    def change_filter(self, path: str, name: str):
+        component_id = self._filter_id(name)
+        options = self.values.get((component_id, 'data')) if component_id else None
+        if not options:
+            return
+        choices = [option['value'] for option in options]
+        if name == 'week':
+            value = self.rng.sample(choices, k=min(len(choices), self.rng.randint(1, 3)))
+        else:
+            value = self.rng.choice(choices)
+
+        started = time.perf_counter()
+        self._run_waves({(component_id, 'value'): value})
+        self.recorder.add(f"[{name}] {path}", time.perf_counter() - started, True)
+
+    def session(self, think_time: float):
+        path = self.rng.choice(PAGES)
+        self.load_page(path)
+        for name in FILTERS:
+            time.sleep(self.rng.uniform(0, think_time))
+            self.change_filter(path, name)
+
+
+def run_load(base_url: str, users: int, duration: float, think_time: float, seed: int = 0) -> Recorder:
+    callbacks = [Callback(spec) for spec in requests.get(f"{base_url}/_dash-dependencies", timeout=30).json()
+                 if not spec.get('clientside_function')]
+    recorder = Recorder()
+    stop_at = time.time() + duration
+
+    def worker(index: int):
+        user = VirtualUser(base_url, callbacks, recorder, random.Random(seed + index))
+        try:
+            while time.time() < stop_at:
+                try:
+                    user.session(think_time)
+                except requests.RequestException:
+                    recorder.add('[session]', 0.0, False)
+        finally:
+            user.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder
+
+
+def print_report(rows: List[Dict]):
+    print(f"\n{'callback / interacción':<62} {'n':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'error':>6}")
+    for row in rows:
+        print(f"{row['name'][:62]:<62} {row['requests']:>6} {row['rps']:>7.1f} {row['p50_ms']:>8.0f} "
+              f"{row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f} {row['error_rate']:>6.1%}")
+    callbacks = [row for row in rows if not row['name'].startswith(('[', 'GET'))]
+    total = sum(row['requests'] for row in callbacks)
+    errors = sum(row['requests'] * row['error_rate'] for row in callbacks)
+    print(f"\n📊 {total} peticiones de callback, {sum(row['rps'] for row in callbacks):.1f} req/s, "
+          f"errores {errors / total if total else 0:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10, help='Usuarios virtuales simultáneos')
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--think', type=float, default=1.0, help='Pausa máxima entre interacciones (s)')
+    parser.add_argument('--url', help='Servidor ya levantado (sin stand-in ni gunicorn)')
+    parser.add_argument('--rows', type=int, default=100000, help='Filas de las fuentes sintéticas')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latencia simulada del stand-in (s)')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8798)
+    parser.add_argument('--output', help='Guardar el reporte en JSON')
+    args = parser.parse_args()
+
+    server = process = None
+    base_url = args.url
+    if not base_url:
+        data_dir = tempfile.mkdtemp(prefix='apg_bi_load_')
+        write_sources(data_dir, args.rows)
+        server = start_graph_stub(data_dir, latency=args.latency)  # exporta GRAPH_* para gunicorn
+        process = start_server(args.workers, args.threads, args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+        print(f"🛰️ Graph stand-in en {server.base_url}, {args.rows:,} filas por fuente")
+
+    try:
+        if not wait_until_ready(base_url):
+            print(f"❌ {base_url} no respondió")
+            return
+        print(f"🚀 {args.users} usuarios virtuales durante {args.duration:.0f}s contra {base_url}")
+        recorder = run_load(base_url, args.users, args.duration, args.think)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        if server:
+            server.shutdown()
+
+    rows = recorder.summary()
+    print_report(rows)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'users': args.users, 'duration': args.duration, 'rows': args.rows, 'results': rows}, f, indent=2)
+        print(f"💾 Reporte en {args.output}")
+
+
+if __name__ == '__main__':
+    main()
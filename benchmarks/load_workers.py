@@ -0,0 +1,117 @@
+"""
+Prueba de carga: throughput del servidor gunicorn según número de workers
+
+Levanta gunicorn con 1, 2, 4... workers, lanza peticiones concurrentes contra
+una ruta y reporta peticiones por segundo y la escala respecto a 1 worker.
+
+Uso:
+    python -m benchmarks.load_workers --workers 1 2 4 --concurrency 16 --duration 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import threading
+import requests
+
+
+def wait_until_ready(base_url: str, timeout: float = 60) -> bool:
+    """Espera a que /health responda"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def run_load(url: str, concurrency: int, duration: float) -> dict:
+    """Lanza `concurrency` hilos haciendo GET a `url` durante `duration` segundos"""
+    counts = {'ok': 0, 'error': 0}
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def worker():
+        session = requests.Session()
+        ok = error = 0
+        while time.time() < stop_at:
+            try:
+                response = session.get(url, timeout=30)
+                if response.status_code == 200:
+                    ok += 1
+                else:
+                    error += 1
+            except requests.RequestException:
+                error += 1
+        with lock:
+            counts['ok'] += ok
+            counts['error'] += error
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+
+    return {
+        'requests': counts['ok'],
+        'errors': counts['error'],
+        'seconds': elapsed,
+        'rps': counts['ok'] / elapsed if elapsed else 0,
+    }
+
+
+def start_server(workers: int, threads: int, port: int) -> subprocess.Popen:
+    """Arranca gunicorn con la configuración de producción y sin warm-up"""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+               PORT=str(port), WARMUP='0', GUNICORN_LOGLEVEL='warning')
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:server'],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--path', default='/_dash-layout', help='Ruta a medir')
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = []
+    for workers in args.workers:
+        process = start_server(workers, args.threads, args.port)
+        try:
+            if not wait_until_ready(base_url):
+                print(f"❌ gunicorn con {workers} workers no respondió")
+                continue
+            run_load(base_url + args.path, args.concurrency, 2)  # calentamiento
+            result = run_load(base_url + args.path, args.concurrency, args.duration)
+            result['workers'] = workers
+            results.append(result)
+            print(f"📊 {workers} workers: {result['rps']:.1f} req/s ({result['errors']} errores)")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    if results:
+        base_rps = results[0]['rps'] or 1
+        print("\nworkers  req/s     escala")
+        for result in results:
+            print(f"{result['workers']:>7}  {result['rps']:>8.1f}  x{result['rps'] / base_rps:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Costo de navegar entre páginas: qué manda el servidor cuando cambia la URL
+
+Recorre las páginas como un dcc.Link: actualiza el pathname de todos los dcc.Location montados
+y ejecuta, con el cliente de pruebas de Flask, los callbacks que dependen de él (y los de los
+Location que monten sus respuestas: un Location que se vuelve a montar fija el pathname y
+dispara otra vez el router de páginas). Por navegación reporta:
+    peticiones   callbacks de navegación ejecutados
+    KB           bytes de las respuestas de /_dash-update-component
+    componentes  componentes en las respuestas (lo que el navegador vuelve a montar y renderizar)
+    ms           tiempo de servidor de esos callbacks
+
+Los callbacks de datos de cada página (stores, filtros, gráficos) no se ejecutan: son los mismos
+con cualquier layout y no dependen de la URL.
+
+Uso:
+    python -m benchmarks.navigation_payload --rounds 5
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from benchmarks.load_sessions import PAGES, Callback, _collect_props
+
+
+def count_components(tree) -> int:
+    """Componentes de Dash en un árbol serializado"""
+    if isinstance(tree, list):
+        return sum(count_components(child) for child in tree)
+    if not isinstance(tree, dict):
+        return 0
+    own = 1 if 'namespace' in tree and 'props' in tree else 0
+    return own + sum(count_components(value) for value in tree.values() if isinstance(value, (dict, list)))
+
+
+class Navigator:
+    """Estado de los componentes montados y callbacks que dependen de la URL"""
+
+    def __init__(self, client):
+        self.client = client
+        self.callbacks = [Callback(spec) for spec in client.get('/_dash-dependencies').get_json()]
+        self.values, self.locations = {}, set()
+        self._mount(client.get('/_dash-layout').get_json())
+
+    def _mount(self, tree) -> set:
+        """Monta un árbol y retorna sus dcc.Location: al montarse vuelven a fijar el pathname"""
+        locations = set()
+        _collect_props(tree, self.values, locations)
+        self.locations |= locations
+        return locations
+
+    def navigate(self, path: str) -> Dict:
+        stats = {'requests': 0, 'bytes': 0, 'components': 0, 'seconds': 0.0}
+        locations = set(self.locations)
+        while locations:
+            changed = {(location, 'pathname') for location in locations}
+            for key in changed:
+                self.values[key] = path
+            mounted = set()
+            for cb in self.callbacks:
+                triggered = changed.intersection(cb.inputs)
+                if not triggered:
+                    continue
+                started = time.perf_counter()
+                response = self.client.post('/_dash-update-component', json=cb.payload(
+                    self.values, [f"{cid}.{prop}" for cid, prop in triggered]))
+                stats['seconds'] += time.perf_counter() - started
+                stats['requests'] += 1
+                stats['bytes'] += len(response.data)
+                if response.status_code != 200:
+                    continue
+                for props in response.get_json().get('response', {}).values():
+                    for value in props.values():
+                        stats['components'] += count_components(value)
+                        mounted |= self._mount(value)
+            locations = mounted
+        return stats
+
+
+def run(rounds: int) -> List[Dict]:
+    import wsgi
+    wsgi.prime_app()
+    navigator = Navigator(wsgi.app.server.test_client())
+
+    results = []
+    for path in PAGES:
+        samples = [navigator.navigate(path) for _ in range(rounds)]
+        results.append({
+            'path': path,
+            'requests': samples[-1]['requests'],
+            'kb': samples[-1]['bytes'] / 1024,
+            'components': samples[-1]['components'],
+            'ms': statistics.median(s['seconds'] for s in samples) * 1000,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--output', help='Guardar los resultados en JSON')
+    args = parser.parse_args()
+
+    results = run(args.rounds)
+    print(f"\n🧭 {'página':<18} {'peticiones':>10} {'KB':>9} {'componentes':>12} {'ms':>8}")
+    for row in results:
+        print(f"   {row['path']:<18} {row['requests']:>10} {row['kb']:>9.1f} {row['components']:>12} {row['ms']:>8.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
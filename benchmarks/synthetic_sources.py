@@ -0,0 +1,99 @@
+"""
+Generadores de fuentes sintéticas con el esquema de los parquet de SharePoint
+
+- OCUPACION TRANSPORTE.parquet: un registro por viaje (fecha, ruta, placa, asientos)
+- MAYOR ANALITICO PACKING.parquet: un asiento contable por fila (fecha, cuenta, proyecto, monto)
+
+Las columnas de texto traen los mismos formatos que limpian los helpers
+(kg con punto de miles, horas de la mañana, 'NN: DESCRIPCION').
+
+Uso:
+    python -m benchmarks.synthetic_sources --rows 500000 --output /tmp/apg_bi_bench
+"""
+import argparse
+import os
+from typing import Dict
+import numpy as np
+import pandas as pd
+
+SOURCE_FILES = {
+    'ocupacion_transporte': 'OCUPACION TRANSPORTE.parquet',
+    'mayor_analitico_packing': 'MAYOR ANALITICO PACKING.parquet',
+}
+
+RUTAS = ['CHAO - VIRU', 'VIRU - PACKING', 'TRUJILLO - PACKING', 'CHAO - PACKING', 'SALAVERRY - VIRU']
+CUENTAS = ['62: GASTOS DE PERSONAL', '63: SERVICIOS DE TERCEROS', '60: COMPRAS', '65: OTROS GASTOS', '68: DEPRECIACION']
+PROYECTOS = ['PACKING ARANDANO', 'PACKING PALTA', 'PACKING ESPARRAGO', 'ADMINISTRACION', 'MANTENIMIENTO']
+
+
+def _fechas(rng: np.random.Generator, rows: int, start: str, end: str) -> pd.Series:
+    days = pd.date_range(start, end, freq='D')
+    return pd.Series(np.sort(rng.choice(days.to_numpy(), rows)))
+
+
+def make_ocupacion_transporte(rows: int, start: str = '2024-08-01', end: str = '2025-12-31', seed: int = 0) -> pd.DataFrame:
+    """Viajes de transporte de personal"""
+    rng = np.random.default_rng(seed)
+    capacidad = rng.choice([30, 40, 50], rows)
+    horas = pd.Series(rng.integers(4, 8, rows)).map('{:02d}'.format) + ':' + \
+        pd.Series(rng.integers(0, 60, rows)).map('{:02d}'.format) + ':00'
+    return pd.DataFrame({
+        'FECHA': _fechas(rng, rows, start, end),
+        'RUTA': pd.Categorical(rng.choice(RUTAS, rows)).astype(str),
+        'PLACA': pd.Series(rng.integers(100, 999, rows)).map('T{}-ABC'.format),
+        'TURNO': rng.choice(['DIA', 'NOCHE'], rows, p=[0.7, 0.3]),
+        'HORA SALIDA': horas,
+        'CAPACIDAD': capacidad,
+        'N° ASIENTOS OCUPADOS': np.minimum(rng.poisson(capacidad * 0.8), capacidad),
+    })
+
+
+def make_mayor_analitico_packing(rows: int, start: str = '2024-08-01', end: str = '2025-12-31', seed: int = 1) -> pd.DataFrame:
+    """Asientos del mayor analítico de packing"""
+    rng = np.random.default_rng(seed)
+    kg = rng.integers(1, 30000, rows).astype(str).astype(object)
+    con_punto = rng.random(rows) < 0.3
+    kg[con_punto] = (rng.integers(1, 30000, con_punto.sum()) / 1000).astype(str)
+    horas = pd.Series(rng.integers(0, 12, rows)).map('{:02d}'.format) + ':' + \
+        pd.Series(rng.integers(0, 60, rows)).map('{:02d}'.format) + ':00'
+    horas[rng.random(rows) < 0.05] = None
+    return pd.DataFrame({
+        'FECHA': _fechas(rng, rows, start, end),
+        'CUENTA': rng.choice(CUENTAS, rows),
+        'DESCRIPCION PROYECTO': rng.choice(PROYECTOS, rows),
+        'DOCUMENTO': pd.Series(rng.integers(1, 999999, rows)).map('F001-{:06d}'.format),
+        'KG EXPORTABLES': kg,
+        'HORA RECEPCION': horas,
+        'MONTO': np.round(rng.gamma(2.0, 350.0, rows), 2),
+    })
+
+
+GENERATORS = {
+    'ocupacion_transporte': make_ocupacion_transporte,
+    'mayor_analitico_packing': make_mayor_analitico_packing,
+}
+
+
+def write_sources(directory: str, rows: int) -> Dict[str, str]:
+    """Escribe un parquet por fuente con `rows` filas. Retorna {fuente: ruta}"""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name, generator in GENERATORS.items():
+        path = os.path.join(directory, SOURCE_FILES[name])
+        generator(rows).to_parquet(path, index=False)
+        paths[name] = path
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--output', default='bench_data')
+    args = parser.parse_args()
+
+    for name, path in write_sources(args.output, args.rows).items():
+        print(f"✅ {name}: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,10 +9,10 @@ import plotly.express as px
 import asyncio
 from dash import html, dcc, Input, Output, callback
 from components.grid import Row, Column
-from helpers.get_token import get_access_token
-from helpers.get_api import listar_archivos_en_carpeta_compartida
 from helpers.helpers import *
-from constants import DRIVE_ID_CARPETA_STORAGE, FOLDER_ID_CARPETA_STORAGE
+from core.data_manager import data_manager
+from core.jobs import background_manager, describe_phase
+from core.metrics import span
 
 
 class DashboardComponent:
@@ -42,7 +42,10 @@ class DashboardComponent:
             'month_select': f'{page_id}-month-select',
             'week_select': f'{page_id}-week-select',
             'loading_graph': f'{page_id}-loading-graph',
-            'graph_container': f'{page_id}-graph-container'
+            'graph_container': f'{page_id}-graph-container',
+            'load_status': f'{page_id}-load-status',
+            'load_progress': f'{page_id}-load-progress',
+            'cancel_load': f'{page_id}-cancel-load'
         }
         
         # Registrar los callbacks para esta instancia
@@ -99,6 +102,18 @@ class DashboardComponent:
                     ]
                 ),
                 
+                # Progreso de la descarga de datos
+                Row([
+                    Column([
+                        dmc.Text(id=self.ids['load_status'], size="xs", c="dimmed"),
+                        dmc.Progress(id=self.ids['load_progress'], value=0, size="sm"),
+                    ], size=4),
+                    Column([
+                        dmc.Button("Cancelar carga", id=self.ids['cancel_load'], variant="subtle",
+                                   color="red", size="xs", disabled=True),
+                    ], size=2),
+                ]),
+                
                 dmc.Divider(variant="solid", mb=15),
                 
                 # Gráfico con indicador de carga
@@ -112,6 +127,26 @@ class DashboardComponent:
             ]
         )
     
+    def _load_api_records(self, progress=None):
+        """
+        Carga MAYOR ANALITICO PACKING a través del DataManager (token, listado, descarga, parseo)
+        y lo retorna como registros para el store
+        """
+        try:
+            print(f"🔄 [{self.page_id}] Cargando datos de la API...")
+            df = data_manager.get_frame('mayor_analitico_packing', progress)
+            print(f"📊 [{self.page_id}] DataFrame cargado: {len(df)} registros")
+            
+            print(f"✅ [{self.page_id}] Datos procesados y listos para caché")
+            with span('to_dict', 'mayor_analitico_packing') as s:
+                records = df.to_dict('records')
+                s.record(rows=len(records))
+            return records
+            
+        except Exception as e:
+            print(f"❌ [{self.page_id}] Error cargando datos de la API: {e}")
+            return []
+    
     def _register_callbacks(self):
         """
         Registra todos los callbacks para esta instancia del dashboard
@@ -201,50 +236,38 @@ class DashboardComponent:
                 return [], None
         
         # Callback para cargar datos de API
-        @callback(
-            Output(self.ids['parquet_data_store'], 'data'),
-            Input(self.ids['year_select'], 'id'),
-            prevent_initial_call=False,
-            running=[(Output(self.ids['year_select'], "disabled"), True, False),
-                     (Output(self.ids['month_select'], "disabled"), True, False),
-                     (Output(self.ids['week_select'], "disabled"), True, False)]
-        )
-        async def load_api_data_once(_):
-            """Carga los datos de la API de forma asíncrona una sola vez"""
-            try:
-                print(f"🔄 [{self.page_id}] Cargando datos de la API...")
-                
-                access_token = await asyncio.to_thread(get_access_token)
-                print(f"✅ [{self.page_id}] Token de acceso obtenido")
-                
-                data = await asyncio.to_thread(
-                    listar_archivos_en_carpeta_compartida,
-                    access_token=access_token,
-                    drive_id=DRIVE_ID_CARPETA_STORAGE,
-                    item_id=FOLDER_ID_CARPETA_STORAGE
-                )
-                print(f"✅ [{self.page_id}] Lista de archivos obtenida")
-                
-                url = get_download_url_by_name(data, "MAYOR ANALITICO PACKING.parquet")
-                
-                if url:
-                    print(f"📁 [{self.page_id}] URL del archivo: {url[:50]}...")
-                    df = await asyncio.to_thread(pd.read_parquet, url)
-                else:
-                    print(f"❌ [{self.page_id}] No se encontró la URL del archivo")
-                    raise Exception("No se pudo obtener la URL del archivo OCUPACION TRANSPORTE.parquet")
-                print(f"📊 [{self.page_id}] DataFrame cargado: {len(df)} registros")
-                
-                df["YEAR"] = df["FECHA"].dt.year
-                df["MES"] = df["FECHA"].dt.month
-                df["SEMANA"] = df["FECHA"].dt.isocalendar().week
-                
-                print(f"✅ [{self.page_id}] Datos procesados y listos para caché")
-                return df.to_dict('records')
-                
-            except Exception as e:
-                print(f"❌ [{self.page_id}] Error cargando datos de la API: {e}")
-                return []
+        running = [(Output(self.ids['year_select'], "disabled"), True, False),
+                   (Output(self.ids['month_select'], "disabled"), True, False),
+                   (Output(self.ids['week_select'], "disabled"), True, False)]
+        
+        if background_manager is not None:
+            # La descarga corre fuera del worker, con progreso y cancelación
+            @callback(
+                Output(self.ids['parquet_data_store'], 'data'),
+                Input(self.ids['year_select'], 'id'),
+                prevent_initial_call=False,
+                background=True,
+                manager=background_manager,
+                progress=[Output(self.ids['load_status'], 'children'),
+                          Output(self.ids['load_progress'], 'value')],
+                running=running + [(Output(self.ids['cancel_load'], "disabled"), False, True)],
+                cancel=[Input(self.ids['cancel_load'], 'n_clicks')]
+            )
+            def load_api_data_once(set_progress, _):
+                """Carga los datos de la API en segundo plano una sola vez"""
+                records = self._load_api_records(lambda phase: set_progress(describe_phase(phase)))
+                set_progress(describe_phase('done'))
+                return records
+        else:
+            @callback(
+                Output(self.ids['parquet_data_store'], 'data'),
+                Input(self.ids['year_select'], 'id'),
+                prevent_initial_call=False,
+                running=running
+            )
+            async def load_api_data_once(_):
+                """Carga los datos de la API de forma asíncrona una sola vez"""
+                return await asyncio.to_thread(self._load_api_records)
         
         # Callback para actualizar gráfico
         """
@@ -303,7 +326,9 @@ class DashboardComponent:
                 # Aplicar filtros si existen
                 query = dataframe_filtro(values=filter_values, columns_df=filter_columns)
                 if query:
-                    df_filtered = df.query(query)
+                    with span('filter', 'mayor_analitico_packing') as s:
+                        df_filtered = df.query(query)
+                        s.record(rows=len(df_filtered))
                 else:
                     df_filtered = df
                     
@@ -314,8 +339,10 @@ class DashboardComponent:
                 if len(df_filtered) > 0:
                     
                     dff = df_filtered.groupby(['SEMANA']).agg({'N° ASIENTOS OCUPADOS': 'sum'}).reset_index()
-                    fig = px.line(dff, x='SEMANA', y='N° ASIENTOS OCUPADOS', 
-                                title=self.chart_title,height=350,width=400)
+                    with span('plotly', self.ids['graph_container']) as s:
+                        fig = px.line(dff, x='SEMANA', y='N° ASIENTOS OCUPADOS', 
+                                    title=self.chart_title,height=350,width=400)
+                        s.record(rows=len(dff))
                 else:
                     fig = go.Figure().add_annotation(
                         text="No hay datos para los filtros seleccionados",
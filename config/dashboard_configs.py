@@ -204,4 +204,11 @@ VENTAS_CONFIG = {
             'data_source': 'mayor_analitico_packing'
         }
     ]
-}
\ No newline at end of file
+}
+
+# Todas las configuraciones: se compilan juntas al arrancar (ver core.dashboard_plan)
+DASHBOARD_CONFIGS = [
+    OCUPACION_TRANSPORTE_CONFIG,
+    COSTOS_DIARIOS_CONFIG,
+    VENTAS_CONFIG,
+]
@@ -1,3 +1,4 @@
+import os
 import yaml
 
 # Cargar configuración desde config.yaml
@@ -8,7 +9,9 @@ with open("config.yaml", "r") as f:
 __all__ = ['config', 'USER_BD', 'PASS_BD', 'SERVER_BD', 'BD', 'PORT', 'MODE_DEBUG', 
            'NAME_EMPRESA', 'NAME_USER', 'LOGO', 'RUBRO_EMPRESA', 'PAGE_TITLE_PREFIX',
            'DRIVE_ID_CARPETA_STORAGE', 'FOLDER_ID_CARPETA_STORAGE', 
-           'MICROSOFT_GRAPH_TENANT_ID', 'MICROSOFT_GRAPH_CLIENT_ID', 'MICROSOFT_GRAPH_CLIENT_SECRET']
+           'MICROSOFT_GRAPH_TENANT_ID', 'MICROSOFT_GRAPH_CLIENT_ID', 'MICROSOFT_GRAPH_CLIENT_SECRET',
+           'MICROSOFT_GRAPH_BASE_URL', 'MICROSOFT_LOGIN_BASE_URL',
+           'CACHE_CONFIG']
 
 #CONEXION BD
 USER_BD = config['database']['user']
@@ -37,4 +40,12 @@ FOLDER_ID_CARPETA_STORAGE = config.get('onedrive', {}).get('folder_id', "01XOBWF
 # Microsoft Graph API Configuration  
 MICROSOFT_GRAPH_TENANT_ID = config.get('microsoft_graph', {}).get('tenant_id')
 MICROSOFT_GRAPH_CLIENT_ID = config.get('microsoft_graph', {}).get('client_id')
-MICROSOFT_GRAPH_CLIENT_SECRET = config.get('microsoft_graph', {}).get('client_secret')
\ No newline at end of file
+MICROSOFT_GRAPH_CLIENT_SECRET = config.get('microsoft_graph', {}).get('client_secret')
+# URLs base (configurables para apuntar a un stand-in local en benchmarks y pruebas de carga)
+MICROSOFT_GRAPH_BASE_URL = os.environ.get(
+    'GRAPH_BASE_URL', config.get('microsoft_graph', {}).get('base_url', "https://graph.microsoft.com/v1.0")).rstrip('/')
+MICROSOFT_LOGIN_BASE_URL = os.environ.get(
+    'GRAPH_LOGIN_URL', config.get('microsoft_graph', {}).get('login_url', "https://login.microsoftonline.com")).rstrip('/')
+
+# Cache Configuration (memory | disk | redis)
+CACHE_CONFIG = config.get('cache', {}) or {}
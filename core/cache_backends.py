@@ -0,0 +1,230 @@
+"""
+Backends de caché intercambiables para DataManager y los dashboards
+- MemoryCacheBackend: diccionario en el proceso (por defecto)
+- DiskCacheBackend: archivos en un directorio local compartido por los workers
+- RedisCacheBackend: servidor Redis compartido (servicio redis-cache de docker-compose)
+
+Los DataFrames se serializan con Arrow IPC, el resto de valores son bytes.
+"""
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import pandas as pd
+import pyarrow as pa
+from typing import Any, Dict, Optional
+
+
+def serialize_frame(df: pd.DataFrame) -> bytes:
+    """Serializa un DataFrame en formato Arrow IPC (stream)"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def deserialize_frame(data: bytes) -> pd.DataFrame:
+    """Reconstruye un DataFrame desde bytes Arrow IPC"""
+    with pa.ipc.open_stream(pa.py_buffer(data)) as reader:
+        return reader.read_all().to_pandas()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Genera una clave estable a partir de cualquier combinación de valores serializables"""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class CacheBackend:
+    """Interfaz común de los backends de caché"""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        """Guarda el valor solo si la clave no existe. Retorna True si lo guardó"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def get_frame(self, key: str) -> Optional[pd.DataFrame]:
+        data = self.get(key)
+        return deserialize_frame(data) if data is not None else None
+
+    def set_frame(self, key: str, df: pd.DataFrame, ttl: Optional[int] = None):
+        self.set(key, serialize_frame(df), ttl)
+
+    def get_json(self, key: str) -> Any:
+        data = self.get(key)
+        return json.loads(data) if data is not None else None
+
+    def set_json(self, key: str, value: Any, ttl: Optional[int] = None):
+        self.set(key, json.dumps(value, default=str).encode('utf-8'), ttl)
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Caché en memoria del proceso. Los DataFrames se guardan sin serializar"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _get_entry(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.time():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    def _set_entry(self, key: str, value: Any, ttl: Optional[int]):
+        self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._get_entry(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        self._set_entry(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        with self._lock:
+            if self._get_entry(key) is not None:
+                return False
+            self._set_entry(key, value, ttl)
+            return True
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def get_frame(self, key: str) -> Optional[pd.DataFrame]:
+        return self._get_entry(key)
+
+    def set_frame(self, key: str, df: pd.DataFrame, ttl: Optional[int] = None):
+        self._set_entry(key, df, ttl)
+
+
+class DiskCacheBackend(CacheBackend):
+    """
+    Caché en disco local. Cada clave es un archivo cuyo encabezado guarda la expiración.
+    Las escrituras son atómicas (archivo temporal + os.replace; add usa os.link, que falla si la
+    clave ya existe): ningún proceso lee un archivo a medio escribir
+    """
+
+    _HEADER = struct.Struct('<d')
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def _encode(self, value: bytes, ttl: Optional[int]) -> bytes:
+        return self._HEADER.pack(time.time() + ttl if ttl else 0.0) + value
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < self._HEADER.size:
+            self.delete(key)  # escritura interrumpida (p. ej. un proceso que murió a la mitad)
+            return None
+        (expires_at,) = self._HEADER.unpack_from(data)
+        if expires_at and expires_at < time.time():
+            self.delete(key)
+            return None
+        return data[self._HEADER.size:]
+
+    def _write_tmp(self, value: bytes, ttl: Optional[int]) -> str:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self._encode(value, ttl))
+        return tmp_path
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        os.replace(self._write_tmp(value, ttl), self._path(key))
+
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        if self.get(key) is not None:
+            return False
+        # El archivo se escribe completo antes de aparecer con su nombre: crear si no existe es atómico
+        tmp_path = self._write_tmp(value, ttl)
+        try:
+            os.link(tmp_path, self._path(key))
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class RedisCacheBackend(CacheBackend):
+    """Caché en Redis, compartida por todos los workers y contenedores"""
+
+    def __init__(self, url: str = None, client=None, prefix: str = 'apg_bi:'):
+        if client is None:
+            import redis  # Dependencia opcional, solo necesaria con este backend
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        return bool(self.client.set(self.prefix + key, value, ex=ttl, nx=True))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+
+def create_cache_backend(cache_config: Optional[Dict] = None) -> CacheBackend:
+    """
+    Crea el backend según la sección 'cache' de config.yaml.
+    Las variables de entorno CACHE_BACKEND, REDIS_URL y CACHE_DIR tienen prioridad.
+
+    Ejemplo:
+        cache:
+          backend: redis            # memory | disk | redis
+          redis_url: redis://redis-cache:6379/0
+          directory: /tmp/apg_bi_cache
+          max_memory: 2GB           # solo memory: presupuesto con desalojo (ver core.cache_budget)
+    """
+    cache_config = cache_config or {}
+    backend = os.environ.get('CACHE_BACKEND', cache_config.get('backend', 'memory')).lower()
+
+    if backend == 'redis':
+        url = os.environ.get('REDIS_URL', cache_config.get('redis_url'))
+        return RedisCacheBackend(url=url, prefix=cache_config.get('prefix', 'apg_bi:'))
+    if backend == 'disk':
+        directory = os.environ.get('CACHE_DIR', cache_config.get('directory'))
+        return DiskCacheBackend(directory or os.path.join(tempfile.gettempdir(), 'apg_bi_cache'))
+    if backend == 'memory':
+        if cache_config.get('max_memory'):
+            from .cache_budget import BudgetedMemoryCacheBackend
+            return BudgetedMemoryCacheBackend.from_config(cache_config)
+        return MemoryCacheBackend()
+
+    raise ValueError(f"Backend de caché '{backend}' no soportado")
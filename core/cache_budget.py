@@ -0,0 +1,309 @@
+"""
+Caché en memoria con presupuesto, particiones por empresa y desalojo GreedyDual-Size
+
+MemoryCacheBackend crece sin límite: cada fuente, rollup, cubo y figura que se calcula queda en
+el proceso hasta que vence su TTL. BudgetedMemoryCacheBackend mide el tamaño de cada entrada
+(DataFrames, bytes de figuras, JSON) y, al superar el presupuesto, desaloja por GreedyDual-Size:
+    prioridad = L + costo / tamaño
+donde el costo es lo que tardó en producirse la entrada (desde el fallo de caché hasta el set)
+y L sube a la prioridad de cada entrada desalojada. Las entradas baratas y grandes salen primero;
+un acceso renueva la prioridad (se comporta como LRU entre entradas de igual costo por byte).
+
+Particiones: los cubos y figuras se cargan a la empresa (company_id) del usuario de la petición
+(ver init_app), con cuota opcional por empresa; al superarla se desaloja dentro de la empresa.
+Fuentes, rollups, versiones y locks se comparten entre empresas y van a la partición 'shared'.
+Versiones y locks nunca se desalojan.
+
+Fuentes: con este backend la entrada frame: es el mismo DataFrame que DataManager conserva como
+copia local de la fuente. Al desalojarla se avisa a los suscriptores (on_evict) y DataManager
+suelta su copia, así el presupuesto acota la memoria real del worker; la próxima petición vuelve
+a cargar la fuente. Una fuente más grande que todo el presupuesto no se guarda (rejected) y su
+copia local queda fuera del presupuesto (memory_stats la marca con budgeted: false). Con
+shared_dir las fuentes no pasan por esta caché: son mapeos Arrow compartidos por los workers.
+
+Configuración (sección 'cache' de config.yaml, solo backend memory):
+    cache:
+      backend: memory
+      max_memory: 2GB        # presupuesto del proceso (bytes o con unidad KB/MB/GB)
+      partitions:            # opcional: cuota de cubos y figuras por empresa
+        default: 256MB       # empresas sin cuota propia
+        1: 512MB
+
+Las estadísticas (bytes y entradas por tipo y partición, aciertos, desalojos) están en
+DataManager.memory_stats(), /health y /metrics.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import pandas as pd
+import pyarrow as pa
+from .cache_backends import MemoryCacheBackend
+
+SHARED_PARTITION = 'shared'
+# Tipos de entrada (prefijo de la clave) que no son de una empresa: fuentes y sus derivados comunes
+SHARED_KINDS = ('frame', 'rollup', 'layout', 'version', 'lock')
+PINNED_KINDS = ('version', 'lock')  # punteros de versión y locks de carga: nunca se desalojan
+# Costo (segundos) de las entradas cuyo cálculo no se pudo medir (set sin fallo previo)
+DEFAULT_COSTS = {'frame': 10.0, 'rollup': 0.5, 'cube': 0.1, 'figure': 0.05}
+DEFAULT_COST = 0.01
+SIZE_SAMPLE = 1000  # valores por columna object que se miden para estimar su tamaño
+UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2, 'G': 1024 ** 3, 'GB': 1024 ** 3}
+
+_partition = contextvars.ContextVar('apg_bi_cache_partition', default=SHARED_PARTITION)
+
+
+def parse_bytes(value) -> Optional[int]:
+    """'512MB', '2 GB', 1048576 -> bytes (None si no hay límite)"""
+    if value is None or isinstance(value, int):
+        return value
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMG]?B?)\s*', str(value).upper())
+    if not match:
+        raise ValueError(f"Tamaño inválido: {value!r} (ej.: 512MB, 2GB)")
+    return int(float(match.group(1)) * UNITS[match.group(2)])
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Memoria de un DataFrame; las columnas object se estiman con una muestra de sus valores"""
+    total = int(df.index.memory_usage(deep=False))
+    for _, serie in df.items():
+        total += int(serie.memory_usage(index=False, deep=serie.dtype != object))
+        if serie.dtype == object and len(serie):
+            sample = serie.iloc[::max(1, len(serie) // SIZE_SAMPLE)]
+            total += int(sum(sys.getsizeof(value) for value in sample) / len(sample) * len(serie))
+    return total
+
+
+def deep_sizeof(value: Any) -> int:
+    """Tamaño aproximado en memoria de un valor de la caché (DataFrame, tabla Arrow, bytes, JSON)"""
+    if isinstance(value, pd.DataFrame):
+        return frame_nbytes(value)
+    if isinstance(value, pd.Series):
+        return frame_nbytes(value.to_frame())
+    if isinstance(value, pa.Table):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(deep_sizeof(k) + deep_sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(deep_sizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def current_partition() -> str:
+    return _partition.get()
+
+
+@contextlib.contextmanager
+def cache_partition(company_id):
+    """Las entradas de cubos y figuras creadas dentro del bloque se cargan a la empresa"""
+    token = _partition.set(SHARED_PARTITION if company_id is None else str(company_id))
+    try:
+        yield
+    finally:
+        _partition.reset(token)
+
+
+def init_app(server):
+    """Asigna cada petición a la partición de la empresa del usuario autenticado"""
+    from flask import g
+    from flask_login import current_user
+
+    @server.before_request
+    def _enter_cache_partition():
+        company_id = getattr(current_user, 'company_id', None) if current_user else None
+        if company_id is not None:
+            g.apg_bi_cache_partition = _partition.set(str(company_id))
+
+    @server.teardown_request
+    def _exit_cache_partition(error=None):
+        token = g.pop('apg_bi_cache_partition', None)
+        if token is not None:
+            _partition.reset(token)
+
+
+class CacheEntry:
+    """Metadatos de una entrada: tamaño, costo de recalcularla y prioridad GreedyDual-Size"""
+    __slots__ = ('size', 'cost', 'kind', 'partition', 'priority', 'seq')
+
+    def __init__(self, size: int, cost: float, kind: str, partition: str):
+        self.size = size
+        self.cost = cost
+        self.kind = kind
+        self.partition = partition
+        self.priority = 0.0
+        self.seq = 0
+
+
+class BudgetedMemoryCacheBackend(MemoryCacheBackend):
+    """MemoryCacheBackend con presupuesto global, cuotas por empresa y desalojo GreedyDual-Size"""
+
+    def __init__(self, max_bytes: int, quotas: Optional[Dict[str, int]] = None,
+                 default_quota: Optional[int] = None):
+        super().__init__()
+        self._lock = threading.RLock()
+        self.max_bytes = max_bytes
+        self.quotas = {str(name): quota for name, quota in (quotas or {}).items()}
+        self.default_quota = default_quota
+        self._entries: Dict[str, CacheEntry] = {}
+        self._heaps: Dict[str, list] = {}    # {partition: [(prioridad, seq, clave)]}, con entradas obsoletas
+        self._clock = 0.0                    # L de GreedyDual-Size
+        self._seq = itertools.count(1)
+        self._misses: Dict[str, float] = {}  # {clave: instante del fallo}, para medir el costo
+        self._partitions: Dict[str, Dict[str, int]] = {}
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.rejected = 0
+        self._evict_listeners = []
+
+    @classmethod
+    def from_config(cls, cache_config: Dict) -> 'BudgetedMemoryCacheBackend':
+        quotas = {str(name): parse_bytes(quota) for name, quota in (cache_config.get('partitions') or {}).items()}
+        default_quota = quotas.pop('default', None)
+        return cls(parse_bytes(cache_config['max_memory']), quotas, default_quota)
+
+    def on_evict(self, listener: Callable[[str], None]):
+        """Registra una función que recibe la clave de cada entrada desalojada (se llama con el lock tomado)"""
+        self._evict_listeners.append(listener)
+
+    def charged(self, key: str) -> bool:
+        """True si la entrada está guardada y cuenta en el presupuesto"""
+        with self._lock:
+            return key in self._entries
+
+    def quota(self, partition: str) -> Optional[int]:
+        if partition == SHARED_PARTITION:
+            return None
+        return self.quotas.get(partition, self.default_quota)
+
+    def _get_entry(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and entry[1] < time.time():
+                self._remove(key)
+                entry = None
+            if key.split(':', 1)[0] in PINNED_KINDS:
+                return entry[0] if entry is not None else None
+            if entry is None:
+                self.misses += 1
+                if len(self._misses) > 10000:
+                    self._misses.clear()
+                self._misses[key] = time.perf_counter()
+                return None
+            self.hits += 1
+            meta = self._entries.get(key)
+            if meta is not None:
+                self._touch(key, meta)
+            return entry[0]
+
+    def _set_entry(self, key: str, value: Any, ttl: Optional[int]):
+        kind = key.split(':', 1)[0] if ':' in key else 'other'
+        size = deep_sizeof(value) + sys.getsizeof(key)
+        with self._lock:
+            started = self._misses.pop(key, None)
+            cost = time.perf_counter() - started if started is not None else DEFAULT_COSTS.get(kind, DEFAULT_COST)
+            partition = SHARED_PARTITION if kind in SHARED_KINDS else current_partition()
+            self._remove(key)
+            limit = min(filter(None, (self.max_bytes, self.quota(partition))))
+            if kind not in PINNED_KINDS and size > limit:
+                self.rejected += 1  # no cabe: guardarla solo desalojaría todo lo demás
+                if kind == 'frame':
+                    print(f"⚠️ {key} ({size:,} B) supera el presupuesto de la caché: queda fuera de max_memory")
+                return
+
+            super()._set_entry(key, value, ttl)
+            meta = CacheEntry(size, max(cost, 1e-6), kind, partition)
+            self._entries[key] = meta
+            self.bytes += size
+            stats = self._partitions.setdefault(partition, {'bytes': 0, 'entries': 0, 'evictions': 0})
+            stats['bytes'] += size
+            stats['entries'] += 1
+            if kind not in PINNED_KINDS:
+                self._touch(key, meta)
+            self._enforce(partition)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        self._data.pop(key, None)
+        meta = self._entries.pop(key, None)
+        if meta is not None:
+            self.bytes -= meta.size
+            stats = self._partitions[meta.partition]
+            stats['bytes'] -= meta.size
+            stats['entries'] -= 1
+
+    def _touch(self, key: str, meta: CacheEntry):
+        meta.priority = self._clock + meta.cost / max(meta.size, 1)
+        meta.seq = next(self._seq)
+        heap = self._heaps.setdefault(meta.partition, [])
+        heapq.heappush(heap, (meta.priority, meta.seq, key))
+        if len(heap) > 2 * self._partitions[meta.partition]['entries'] + 64:
+            self._compact(meta.partition)
+
+    def _compact(self, partition: str):
+        """Reconstruye el heap de la partición sin las referencias obsoletas"""
+        heap = [(meta.priority, meta.seq, key) for key, meta in self._entries.items()
+                if meta.partition == partition and meta.kind not in PINNED_KINDS]
+        heapq.heapify(heap)
+        self._heaps[partition] = heap
+
+    def _peek(self, partition: str):
+        """Entrada de menor prioridad de la partición (descarta las referencias obsoletas)"""
+        heap = self._heaps.get(partition) or []
+        while heap:
+            priority, seq, key = heap[0]
+            meta = self._entries.get(key)
+            if meta is not None and meta.seq == seq:
+                return priority, key
+            heapq.heappop(heap)
+        return None
+
+    def _evict(self, partition: Optional[str] = None) -> bool:
+        """Desaloja la entrada de menor prioridad (de la partición o de todas). False si no hay"""
+        candidates = [self._peek(name) for name in ([partition] if partition else list(self._heaps))]
+        candidates = [candidate for candidate in candidates if candidate is not None]
+        if not candidates:
+            return False
+        priority, key = min(candidates)
+        self._clock = priority
+        self.evictions += 1
+        self._partitions[self._entries[key].partition]['evictions'] += 1
+        self._remove(key)
+        for listener in self._evict_listeners:
+            listener(key)
+        return True
+
+    def _enforce(self, partition: str):
+        quota = self.quota(partition)
+        while quota is not None and self._partitions[partition]['bytes'] > quota:
+            if not self._evict(partition):
+                break
+        while self.bytes > self.max_bytes:
+            if not self._evict():
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """Uso de memoria y actividad de la caché para monitoreo"""
+        with self._lock:
+            kinds: Dict[str, Dict[str, int]] = {}
+            for meta in self._entries.values():
+                kind = kinds.setdefault(meta.kind, {'bytes': 0, 'entries': 0})
+                kind['bytes'] += meta.size
+                kind['entries'] += 1
+            return {
+                'max_bytes': self.max_bytes,
+                'bytes': self.bytes,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'rejected': self.rejected,
+                'kinds': kinds,
+                'partitions': {name: dict(stats, quota=self.quota(name)) for name, stats in self._partitions.items()},
+            }
@@ -7,6 +7,12 @@ import dash_mantine_components as dmc
 from dash import dcc, html, Input, Output, callback
 from components.grid import Row, Column
 from typing import Dict, List, Any, Optional, Callable
+from .rollups import GRAINS
+
+# Puntos máximos de un gráfico por fecha antes de pasar a semanas o meses ('max_points' por gráfico)
+DEFAULT_MAX_POINTS = 120
+DAYS_PER_POINT = {'day': 1, 'week': 7, 'month': 30.44}
+GRANULARITY_LABELS = {'day': 'día', 'week': 'semana', 'month': 'mes'}
 
 
 class FilterComponent:
@@ -82,7 +88,21 @@ class ChartComponent:
             ]
         )
     
-    def create_figure(self, df, aggregation_config: Dict) -> go.Figure:
+    def select_granularity(self, span_days: int) -> str:
+        """
+        Granularidad de un gráfico por fecha: la fija del config ('granularity': day|week|month)
+        o, con 'auto', la más fina cuyo número de puntos para el rango cabe en 'max_points'
+        """
+        granularity = self.chart_config.get('granularity', 'auto')
+        if granularity in GRAINS:
+            return granularity
+        budget = self.chart_config.get('max_points', DEFAULT_MAX_POINTS)
+        for grain in GRAINS:
+            if span_days / DAYS_PER_POINT[grain] <= budget:
+                return grain
+        return GRAINS[-1]
+    
+    def create_figure(self, df, aggregation_config: Dict, granularity: Optional[str] = None) -> go.Figure:
         """Crea la figura del gráfico basado en configuración"""
         if df.empty:
             return self._create_empty_figure("No hay datos disponibles")
@@ -128,6 +148,8 @@ class ChartComponent:
             else:
                 fig = self._create_empty_figure(f"Tipo de gráfico '{chart_type}' no soportado")
             
+            if granularity:
+                fig.update_xaxes(title_text=f"{self.chart_config['x']} (por {GRANULARITY_LABELS[granularity]})")
             return fig
             
         except Exception as e:
@@ -2,12 +2,20 @@
 DashboardFactory - Sistema para crear dashboards de forma declarativa
 """
 import asyncio
-from typing import Dict, List, Any, Optional
+import json
+from typing import Dict, List, Any, Optional, Callable
 import dash_mantine_components as dmc
 from dash import html, dcc, Input, Output, State, callback
 from components.grid import Row, Column
 
 from .data_manager import data_manager
+from .cache_backends import make_cache_key
+from .jobs import background_manager, describe_phase
+from .executor import executor, source_versions
+from .exports import EXPORT_FORMATS, export_url
+from .metrics import profiled_callback, record_rows, span
+from .dashboard_plan import DATE_OPTIONS_SOURCE, DashboardPlan, DataPlan
+from .rollups import time_series_column
 from .components import FilterComponent, ChartComponent, HeaderComponent, MetricsComponent
 
 
@@ -23,6 +31,55 @@ class DashboardConfig:
         self.charts = config.get('charts', [])
         self.metrics = config.get('metrics', [])
         self.layout_config = config.get('layout', {})
+        self.export = config.get('export', {})  # {'source': ..., 'formats': [...]} o False para deshabilitar
+
+
+# Botón para cancelar cargas en segundo plano (una página a la vez: lo comparten los dashboards)
+LOAD_CANCEL_ID = "data-load-cancel"
+
+
+def render_chart(chart_comp: ChartComponent, chart_cfg: Dict, aggregation_config: Dict,
+                 cached_data: Any, filters: Dict[str, Any]):
+    """
+    Cubo y figura de un gráfico: retorna (figura en JSON, filas del cubo).
+    Se ejecuta en un proceso de cálculo de core.executor o en el hilo de la petición.
+    """
+    # Gráficos por fecha: día, semana o mes según el rango filtrado (servidos desde rollups)
+    granularity = None
+    if time_series_column(chart_cfg, aggregation_config):
+        span_days = data_manager.get_date_span(cached_data, filters, aggregation_config)
+        granularity = chart_comp.select_granularity(span_days)
+    
+    # Filtrar y agregar (cubo cacheado por versión y filtros, compartido entre dashboards)
+    df = data_manager.get_cube(cached_data, filters, aggregation_config, granularity)
+    
+    # Crear gráfico (la agregación ya viene aplicada en el cubo)
+    with span('plotly', chart_comp.get_chart_id()) as s:
+        fig = chart_comp.create_figure(df, {}, granularity)
+        s.record(rows=len(df))
+    with span('figure_json', chart_comp.get_chart_id()) as s:
+        figure_json = fig.to_json().encode('utf-8')
+        s.record(nbytes=len(figure_json))
+    return figure_json, len(df)
+
+
+def compute_metrics(metrics_component: MetricsComponent, metrics: List[Dict], cached_data: Any,
+                    filters: Dict[str, Any]):
+    """Valores de las métricas de un dashboard en su orden: retorna (valores, filas filtradas)"""
+    df = data_manager.apply_filters(cached_data, filters)
+    
+    calculations = {}
+    for metric in metrics:
+        metric_name = metric['name']
+        if metric['type'] == 'sum':
+            calculations[metric_name] = lambda df, col=metric['column']: f"{df[col].sum():,.0f}" if col in df.columns else "0"
+        elif metric['type'] == 'count':
+            calculations[metric_name] = lambda df: f"{len(df):,}"
+        elif metric['type'] == 'avg':
+            calculations[metric_name] = lambda df, col=metric['column']: f"{df[col].mean():.2f}" if col in df.columns else "0"
+    
+    metrics_values = metrics_component.calculate_metrics(df, calculations)
+    return [metrics_values.get(metric['name'], "0") for metric in metrics], len(df)
 
 
 class DashboardFactory:
@@ -30,20 +87,105 @@ class DashboardFactory:
     
     def __init__(self):
         self.created_dashboards = {}
+        self.plan = DataPlan(data_manager)
+        self.loaded_sources = set()  # fuentes con callback de carga registrado
     
-    def create_dashboard(self, config: DashboardConfig) -> html.Div:
-        """Crea un dashboard completo basado en la configuración"""
-        
-        # Registrar el dashboard
+    def compile(self, configs: List[Any]) -> DataPlan:
+        """
+        Compila el plan de datos de todas las configuraciones (dict o DashboardConfig) al arrancar.
+        Falla con ValueError si alguna referencia a fuentes o columnas es inválida.
+        """
+        configs = [config if isinstance(config, DashboardConfig) else DashboardConfig(config) for config in configs]
+        self.plan.compile([config for config in configs if config.dashboard_id not in self.plan.dashboards])
+        print(self.plan.describe())
+        return self.plan
+    
+    def _dashboard_plan(self, config: DashboardConfig) -> DashboardPlan:
+        """Plan del dashboard (lo compila si no estaba en la compilación inicial)"""
+        return self.plan.dashboards.get(config.dashboard_id) or self.plan.add(config)
+    
+    def _use_background_loads(self) -> bool:
+        """
+        Las cargas en segundo plano corren en otro proceso: solo sirven si la fuente
+        cargada allí queda disponible para los workers (caché compartida)
+        """
+        return background_manager is not None and data_manager.shares_frames
+    
+    def _create_load_status(self, plan: DashboardPlan) -> Row:
+        """Progreso de carga por fuente y botón para cancelarla"""
+        columns = []
+        for source_name in plan.file_sources:
+            store_id = data_manager.store_id(source_name)
+            columns.append(Column([
+                dmc.Text(id=f"{store_id}-status", size="xs", c="dimmed"),
+                dmc.Progress(id=f"{store_id}-progress", value=0, size="sm"),
+            ], size=3))
+        columns.append(Column([
+            dmc.Button(
+                "Cancelar carga",
+                id=LOAD_CANCEL_ID,
+                variant="subtle",
+                color="red",
+                size="xs",
+                disabled=True,
+            )
+        ], size=2))
+        return Row(columns)
+    
+    def _create_export_control(self, config: DashboardConfig) -> Row:
+        """Selector de formato y enlace de descarga de los datos filtrados"""
+        formats = (config.export or {}).get('formats', list(EXPORT_FORMATS))
+        return Row([
+            Column([
+                dmc.SegmentedControl(
+                    id=f"{config.dashboard_id}-export-format",
+                    data=[{'value': fmt, 'label': fmt.upper()} for fmt in formats],
+                    value=formats[0],
+                    size="xs",
+                )
+            ], size=3),
+            Column([
+                html.A(
+                    dmc.Button("Exportar datos", variant="light", size="xs"),
+                    id=f"{config.dashboard_id}-export-link",
+                    href="",
+                    download="",
+                )
+            ], size=2),
+        ])
+    
+    def register_dashboard(self, config: DashboardConfig):
+        """
+        Registra los callbacks del dashboard una sola vez por dashboard_id.
+        Solo construye los objetos que definen los ids; el árbol de componentes lo arma create_layout
+        """
+        if config.dashboard_id in self.created_dashboards:
+            return
         self.created_dashboards[config.dashboard_id] = config
         
+        plan = self._dashboard_plan(config)
+        filter_component = FilterComponent(config.dashboard_id, config.filters) if config.filters else None
+        chart_components = [
+            ChartComponent(f"{config.dashboard_id}-chart-{i}", chart_config)
+            for i, chart_config in enumerate(config.charts)
+        ]
+        metrics_component = MetricsComponent(config.dashboard_id, config.metrics) if config.metrics else None
+        self._register_callbacks(config, plan, filter_component, chart_components, metrics_component)
+    
+    def create_layout(self, config: DashboardConfig) -> dmc.Container:
+        """Construye el árbol de componentes del dashboard (no registra callbacks)"""
+        plan = self._dashboard_plan(config)
+        
         # Crear componentes
         components = []
         
-        # 1. Stores para caché de datos
-        data_stores = data_manager.get_cache_stores(config.dashboard_id)
+        # 1. Stores para caché de datos (solo las fuentes del plan)
+        data_stores = data_manager.get_cache_stores(plan.sources)
         components.extend(data_stores)
         
+        if self._use_background_loads() and plan.file_sources:
+            components.append(self._create_load_status(plan))
+        
         # 2. Header
         if config.title:
             header = HeaderComponent(config.title, config.subtitle)
@@ -60,6 +202,12 @@ class DashboardFactory:
                 *filter_component.create_layout()
             ])
             main_content.append(filter_row)
+        
+        # Exportación de los datos filtrados
+        if plan.export_source:
+            main_content.append(self._create_export_control(config))
+        
+        if config.filters or plan.export_source:
             main_content.append(dmc.Divider(variant="solid", mb=15))
         
         # 5. Métricas
@@ -69,13 +217,8 @@ class DashboardFactory:
             main_content.append(dmc.Divider(variant="solid", mb=15))
         
         # 6. Gráficos
-        chart_components = []
-        for chart_config in config.charts:
-            chart_component = ChartComponent(
-                f"{config.dashboard_id}-chart-{len(chart_components)}", 
-                chart_config
-            )
-            chart_components.append(chart_component)
+        for i, chart_config in enumerate(config.charts):
+            chart_component = ChartComponent(f"{config.dashboard_id}-chart-{i}", chart_config)
             
             # Layout del gráfico
             chart_size = chart_config.get('size', 12)
@@ -94,39 +237,87 @@ class DashboardFactory:
         
         components.append(paper)
         
-        # Registrar callbacks
-        self._register_callbacks(config, filter_component if config.filters else None, 
-                                chart_components, 
-                                MetricsComponent(config.dashboard_id, config.metrics) if config.metrics else None)
-        
         return dmc.Container(
             fluid=True,
             children=components,
             style=config.layout_config.get('container_style', {})
         )
     
-    def _register_callbacks(self, config: DashboardConfig, 
-                          filter_component: Optional[FilterComponent],
-                          chart_components: List[ChartComponent],
-                          metrics_component: Optional[MetricsComponent]):
-        """Registra todos los callbacks para el dashboard"""
+    def create_dashboard(self, config: DashboardConfig) -> dmc.Container:
+        """Crea un dashboard completo basado en la configuración (callbacks + layout)"""
+        self.register_dashboard(config)
+        return self.create_layout(config)
+    
+    def page_layout(self, config: DashboardConfig) -> Callable[..., dmc.Container]:
+        """
+        Layout diferido para dash.register_page: los callbacks se registran al importar la página
+        (Dash los necesita antes de la primera petición) y el árbol se construye en cada visita
+        """
+        self.register_dashboard(config)
         
-        # 1. Callback para cargar datos
-        for source_name in config.data_sources:
-            store_id = f"{config.dashboard_id}-{data_manager.data_sources[source_name].cache_key}"
-            
+        def layout(**kwargs) -> dmc.Container:
+            return self.create_layout(config)
+        
+        return layout
+    
+    def _register_load_callback(self, source_name: str):
+        """Callback de carga de una fuente: uno solo para todos los dashboards que comparten su store"""
+        if source_name in self.loaded_sources:
+            return
+        self.loaded_sources.add(source_name)
+        store_id = data_manager.store_id(source_name)
+        
+        if self._use_background_loads() and data_manager.data_sources[source_name].file_name:
+            # Descarga larga: se ejecuta fuera del worker, con progreso y cancelación
             @callback(
                 Output(store_id, 'data'),
                 Input(store_id, 'id'),
+                background=True,
+                manager=background_manager,
+                progress=[Output(f"{store_id}-status", 'children'),
+                          Output(f"{store_id}-progress", 'value')],
+                running=[(Output(LOAD_CANCEL_ID, 'disabled'), False, True)],
+                cancel=[Input(LOAD_CANCEL_ID, 'n_clicks')],
                 prevent_initial_call=False
             )
-            async def load_data(_, source=source_name):
-                result = await data_manager.load_data_source(source)
-                return result['data'] if result['success'] else []
+            @profiled_callback("shared", "load", source_name)
+            def load_data_background(set_progress, _, source=source_name):
+                result = data_manager.load_source(
+                    source, progress=lambda phase: set_progress(describe_phase(phase))
+                )
+                if result['success']:
+                    set_progress(describe_phase('done'))
+                    record_rows(result['data'].get('rows', 0))
+                    return result['data']
+                set_progress((f"❌ {result['error']}", 0))
+                return []
+            return
+        
+        @callback(
+            Output(store_id, 'data'),
+            Input(store_id, 'id'),
+            prevent_initial_call=False
+        )
+        @profiled_callback("shared", "load", source_name)
+        async def load_data(_, source=source_name):
+            result = await data_manager.load_data_source(source)
+            if result['success'] and isinstance(result['data'], dict):
+                record_rows(result['data'].get('rows', 0))
+            return result['data'] if result['success'] else []
+    
+    def _register_callbacks(self, config: DashboardConfig, plan: DashboardPlan,
+                          filter_component: Optional[FilterComponent],
+                          chart_components: List[ChartComponent],
+                          metrics_component: Optional[MetricsComponent]):
+        """Registra todos los callbacks para el dashboard"""
+        
+        # 1. Callbacks para cargar datos (compartidos por fuente)
+        for source_name in plan.sources:
+            self._register_load_callback(source_name)
         
         # 2. Callback para filtros (si existen)
-        if filter_component and 'date_options' in config.data_sources:
-            date_store_id = f"{config.dashboard_id}-date-options-store"
+        if filter_component and DATE_OPTIONS_SOURCE in plan.sources:
+            date_store_id = data_manager.store_id(DATE_OPTIONS_SOURCE)
             filter_ids = filter_component.get_filter_ids()
             
             # Poblar opciones de filtros
@@ -136,6 +327,7 @@ class DashboardFactory:
                      Output(filter_ids['year'], 'value')],
                     Input(date_store_id, 'data')
                 )
+                @profiled_callback(config.dashboard_id, "options", "year")
                 def populate_year_options(date_options):
                     if not date_options:
                         return [], None
@@ -148,6 +340,7 @@ class DashboardFactory:
                     [Input(filter_ids['year'], 'value'),
                      Input(date_store_id, 'data')]
                 )
+                @profiled_callback(config.dashboard_id, "options", "month")
                 def populate_month_options(selected_year, date_options):
                     if not date_options or not selected_year:
                         return [], None
@@ -161,6 +354,7 @@ class DashboardFactory:
                      Input(filter_ids['month'], 'value'),
                      Input(date_store_id, 'data')]
                 )
+                @profiled_callback(config.dashboard_id, "options", "week")
                 def populate_week_options(selected_year, selected_month, date_options):
                     if not date_options:
                         return [], None
@@ -169,8 +363,7 @@ class DashboardFactory:
         # 3. Callbacks para gráficos
         for i, chart_component in enumerate(chart_components):
             chart_config = config.charts[i]
-            main_data_source = chart_config.get('data_source', config.data_sources[0])
-            store_id = f"{config.dashboard_id}-{data_manager.data_sources[main_data_source].cache_key}"
+            store_id = data_manager.store_id(plan.chart_sources[i])
             
             # Inputs para el callback
             inputs = [Input(store_id, 'data')]
@@ -186,9 +379,11 @@ class DashboardFactory:
                 inputs,
                 prevent_initial_call=True
             )
+            @profiled_callback(config.dashboard_id, "chart", chart_component.get_chart_id())
             def update_chart(cached_data, *filter_values, 
                            chart_comp=chart_component, 
                            chart_cfg=chart_config,
+                           aggregation_config=plan.aggregations[i],
                            filter_comp=filter_component):
                 
                 if not cached_data:
@@ -202,17 +397,49 @@ class DashboardFactory:
                         if i < len(filter_names):
                             filters[filter_names[i]] = filter_value
                 
-                # Aplicar filtros
-                df = data_manager.apply_filters(cached_data, filters)
+                # Figura ya calculada para esta versión de datos y filtros
+                figure_key = None
+                if isinstance(cached_data, dict) and cached_data.get('source'):
+                    version = data_manager.get_version(cached_data['source'])
+                    if version:
+                        figure_key = "figure:" + make_cache_key(
+                            chart_comp.get_chart_id(), chart_cfg, version, filters
+                        )
+                        cached_figure = data_manager.cache.get(figure_key)
+                        if cached_figure is not None:
+                            return json.loads(cached_figure)
                 
-                # Crear gráfico
-                aggregation_config = chart_cfg.get('aggregation', {})
-                return chart_comp.create_figure(df, aggregation_config)
+                # Cubo y figura en un proceso de cálculo (ver core.executor)
+                figure_json, rows = executor.run(
+                    render_chart, chart_comp, chart_cfg, aggregation_config, cached_data, filters,
+                    sources=source_versions(cached_data), task=chart_comp.get_chart_id()
+                )
+                record_rows(rows)
+                if figure_key and rows:
+                    data_manager.cache.set(figure_key, figure_json, ttl=data_manager.cache_ttl)
+                return json.loads(figure_json)
         
-        # 4. Callbacks para métricas (si existen)
+        # 4. Enlace de exportación con los filtros actuales
+        export_source = plan.export_source
+        if export_source:
+            inputs = [Input(f"{config.dashboard_id}-export-format", 'value')]
+            filter_names = []
+            if filter_component:
+                filter_ids = filter_component.get_filter_ids()
+                filter_names = list(filter_ids)
+                inputs.extend(Input(filter_ids[filter_name], 'value') for filter_name in filter_names)
+            
+            @callback(
+                Output(f"{config.dashboard_id}-export-link", 'href'),
+                inputs
+            )
+            @profiled_callback(config.dashboard_id, "export", "link")
+            def update_export_link(fmt, *filter_values, source=export_source, names=filter_names):
+                return export_url(source, dict(zip(names, filter_values)), fmt or 'xlsx')
+        
+        # 5. Callbacks para métricas (si existen)
         if metrics_component:
-            main_data_source = config.data_sources[0]  # Usar primera fuente por defecto
-            store_id = f"{config.dashboard_id}-{data_manager.data_sources[main_data_source].cache_key}"
+            store_id = data_manager.store_id(plan.metrics_source)
             
             inputs = [Input(store_id, 'data')]
             
@@ -229,6 +456,7 @@ class DashboardFactory:
                 inputs,
                 prevent_initial_call=True
             )
+            @profiled_callback(config.dashboard_id, "metrics", "values")
             def update_metrics(cached_data, *filter_values):
                 if not cached_data:
                     return ["0"] * len(outputs)
@@ -241,24 +469,13 @@ class DashboardFactory:
                         if i < len(filter_names):
                             filters[filter_names[i]] = filter_value
                 
-                # Aplicar filtros
-                df = data_manager.apply_filters(cached_data, filters)
-                
-                # Calcular métricas
-                calculations = {}
-                for metric in config.metrics:
-                    metric_name = metric['name']
-                    if metric['type'] == 'sum':
-                        calculations[metric_name] = lambda df, col=metric['column']: f"{df[col].sum():,.0f}" if col in df.columns else "0"
-                    elif metric['type'] == 'count':
-                        calculations[metric_name] = lambda df: f"{len(df):,}"
-                    elif metric['type'] == 'avg':
-                        calculations[metric_name] = lambda df, col=metric['column']: f"{df[col].mean():.2f}" if col in df.columns else "0"
-                
-                metrics_values = metrics_component.calculate_metrics(df, calculations)
-                
-                # Retornar valores en el orden correcto
-                return [metrics_values.get(metric['name'], "0") for metric in config.metrics]
+                # Filtrar y calcular las métricas en un proceso de cálculo (ver core.executor)
+                values, rows = executor.run(
+                    compute_metrics, metrics_component, config.metrics, cached_data, filters,
+                    sources=source_versions(cached_data), task=f"{config.dashboard_id}-metrics"
+                )
+                record_rows(rows)
+                return values
 
 
 # Instancia global del factory
@@ -0,0 +1,204 @@
+"""
+Plan de datos de los dashboards
+
+Al arrancar se compilan todas las DashboardConfig en un DataPlan:
+    - valida fuentes, tipos de gráfico y métrica, filtros y las columnas que usan
+      (contra el esquema de la fuente si declara 'columns' en config.yaml; si no, al cargarla)
+    - calcula las fuentes que realmente usa cada dashboard (gráficos, métricas, exportación y
+      date_options si tiene filtros de fecha) y solo para ellas crea stores y callbacks de carga
+    - deduplica entre dashboards: un store y un callback de carga por fuente, y una sola
+      especificación por agregación (mismo cubo en caché para los gráficos que la comparten)
+    - registra las agregaciones por fecha cuyos rollups se precalculan (ver core.rollups)
+"""
+from typing import Dict, List, Optional, Set
+from .cache_backends import make_cache_key
+from .data_manager import FILTER_COLUMNS as DATE_FILTER_COLUMNS
+from .rollups import time_series_column
+
+DATE_OPTIONS_SOURCE = 'date_options'
+CHART_TYPES = ('line', 'bar', 'scatter')
+METRIC_TYPES = ('sum', 'count', 'avg')
+
+
+def canonical_aggregation(aggregation: Optional[Dict]) -> Dict:
+    """Forma única de una agregación: {} sin groupby, groupby siempre como lista"""
+    if not aggregation or not aggregation.get('groupby'):
+        return {}
+    groupby = aggregation['groupby']
+    return {
+        'groupby': [groupby] if isinstance(groupby, str) else list(groupby),
+        'agg': dict(aggregation.get('agg', {})),
+    }
+
+
+class DashboardPlan:
+    """Fuentes, stores y agregaciones que necesita un dashboard"""
+
+    def __init__(self, dashboard_id: str):
+        self.dashboard_id = dashboard_id
+        self.sources: List[str] = []          # fuentes usadas (orden de declaración)
+        self.file_sources: List[str] = []     # las que se descargan (con progreso de carga)
+        self.unused_sources: List[str] = []   # declaradas pero sin uso: no se provisionan
+        self.chart_sources: List[str] = []    # fuente de cada gráfico
+        self.aggregations: List[Dict] = []    # agregación canónica de cada gráfico
+        self.metrics_source: Optional[str] = None
+        self.export_source: Optional[str] = None
+        self.columns: Dict[str, Set[str]] = {}  # {fuente: columnas usadas}
+
+
+class DataPlan:
+    """Plan compilado de todos los dashboards sobre las fuentes de un DataManager"""
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self.dashboards: Dict[str, DashboardPlan] = {}
+        self.source_users: Dict[str, List[str]] = {}  # {fuente: dashboards que la usan}
+        self.aggregations: Dict[str, Dict] = {}       # {clave: {'source', 'aggregation', 'charts'}}
+
+    def compile(self, configs: list) -> 'DataPlan':
+        """Compila todas las configuraciones. Reporta todos los errores juntos (ValueError)"""
+        errors = []
+        for config in configs:
+            try:
+                self.add(config)
+            except ValueError as e:
+                errors.append(str(e))
+        if errors:
+            raise ValueError("Configuración de dashboards inválida:\n" + "\n".join(errors))
+        return self
+
+    def add(self, config) -> DashboardPlan:
+        """Valida una DashboardConfig y agrega su plan"""
+        plan, errors = self._plan_dashboard(config)
+        if errors:
+            raise ValueError("\n".join(f"  - {config.dashboard_id}: {error}" for error in errors))
+
+        self.dashboards[config.dashboard_id] = plan
+        for source_name in plan.sources:
+            self.source_users.setdefault(source_name, []).append(config.dashboard_id)
+        for source_name, columns in plan.columns.items():
+            self.data_manager.required_columns.setdefault(source_name, set()).update(columns)
+        for i, (source_name, aggregation) in enumerate(zip(plan.chart_sources, plan.aggregations)):
+            if not aggregation:
+                continue
+            entry = self.aggregations.setdefault(make_cache_key(source_name, aggregation), {
+                'source': source_name, 'aggregation': aggregation, 'charts': [],
+            })
+            # Los gráficos con la misma agregación usan la misma especificación (misma clave de cubo)
+            plan.aggregations[i] = entry['aggregation']
+            entry['charts'].append(f"{config.dashboard_id}-chart-{i}")
+            # Agregaciones por fecha: sus rollups se precalculan al precargar la fuente
+            specs = self.data_manager.rollup_specs.setdefault(source_name, [])
+            if time_series_column(config.charts[i], entry['aggregation']) and entry['aggregation'] not in specs:
+                specs.append(entry['aggregation'])
+        return plan
+
+    def _plan_dashboard(self, config):
+        sources = self.data_manager.data_sources
+        plan = DashboardPlan(config.dashboard_id)
+        errors = []
+
+        if config.dashboard_id in self.dashboards:
+            errors.append("dashboard_id duplicado")
+        unknown = [name for name in config.data_sources if name not in sources]
+        if unknown:
+            errors.append(f"fuentes no registradas: {', '.join(unknown)}")
+        if not config.data_sources:
+            errors.append("no declara fuentes de datos")
+            return plan, errors
+
+        used = []
+
+        def use(source_name: str, columns=()) -> bool:
+            if source_name not in sources:
+                errors.append(f"fuente no registrada: {source_name}")
+                return False
+            if source_name not in used:
+                used.append(source_name)
+            plan.columns.setdefault(source_name, set()).update(columns)
+            return True
+
+        filter_columns = []
+        for filter_config in config.filters:
+            column = DATE_FILTER_COLUMNS.get(filter_config['name'])
+            if column is None:
+                errors.append(f"filtro '{filter_config['name']}' no soportado "
+                              f"(válidos: {', '.join(DATE_FILTER_COLUMNS)})")
+            else:
+                filter_columns.append(column)
+        if filter_columns:
+            use(DATE_OPTIONS_SOURCE)
+
+        for i, chart in enumerate(config.charts):
+            source_name = chart.get('data_source', config.data_sources[0])
+            aggregation = canonical_aggregation(chart.get('aggregation'))
+            plan.chart_sources.append(source_name)
+            plan.aggregations.append(aggregation)
+            if chart.get('type', 'line') not in CHART_TYPES:
+                errors.append(f"gráfico {i}: tipo '{chart.get('type')}' no soportado")
+            axes = [chart.get('x'), chart.get('y')]
+            if None in axes:
+                errors.append(f"gráfico {i}: requiere 'x' e 'y'")
+                axes = [axis for axis in axes if axis]
+            if aggregation:
+                outputs = aggregation['groupby'] + list(aggregation['agg'])
+                missing = [axis for axis in axes if axis not in outputs]
+                if missing:
+                    errors.append(f"gráfico {i}: {', '.join(missing)} no está en el resultado de la agregación")
+                columns = outputs
+            else:
+                columns = axes
+            use(source_name, [*columns, *filter_columns])
+
+        if config.metrics:
+            plan.metrics_source = config.data_sources[0]
+            columns = []
+            for metric in config.metrics:
+                if metric['type'] not in METRIC_TYPES:
+                    errors.append(f"métrica '{metric['name']}': tipo '{metric['type']}' no soportado")
+                elif metric['type'] != 'count':
+                    if not metric.get('column'):
+                        errors.append(f"métrica '{metric['name']}': requiere 'column'")
+                    else:
+                        columns.append(metric['column'])
+            use(plan.metrics_source, [*columns, *filter_columns])
+
+        if config.export is not False:
+            export_source = (config.export or {}).get('source')
+            if export_source is None:
+                declared = [name for name in config.data_sources if name in sources and sources[name].file_name]
+                export_source = declared[0] if declared else None
+            if export_source and use(export_source, filter_columns):
+                plan.export_source = export_source
+
+        # Fuentes en el orden en que se declararon; date_options puede venir de los filtros
+        plan.sources = [name for name in config.data_sources if name in used] + \
+            [name for name in used if name not in config.data_sources]
+        plan.file_sources = [name for name in plan.sources if sources[name].file_name]
+        plan.unused_sources = [name for name in config.data_sources if name in sources and name not in used]
+
+        for source_name, columns in plan.columns.items():
+            schema = sources[source_name].schema if source_name in sources else None
+            missing = sorted(columns - set(schema)) if schema is not None else []
+            if missing:
+                errors.append(f"la fuente '{source_name}' no tiene las columnas: {', '.join(missing)}")
+        return plan, errors
+
+    def file_sources(self) -> List[str]:
+        """Fuentes de archivo que usa al menos un dashboard (las que vale la pena precargar)"""
+        sources = self.data_manager.data_sources
+        return [name for name in self.source_users if sources[name].file_name]
+
+    def describe(self) -> str:
+        shared = [name for name, users in self.source_users.items() if len(users) > 1]
+        lines = [f"🧩 Plan de datos: {len(self.dashboards)} dashboards, {len(self.source_users)} fuentes "
+                 f"({len(shared)} compartidas), {len(self.aggregations)} agregaciones"]
+        for plan in self.dashboards.values():
+            line = f"   {plan.dashboard_id}: {', '.join(plan.sources)}"
+            if plan.unused_sources:
+                line += f" (sin uso: {', '.join(plan.unused_sources)})"
+            lines.append(line)
+        for entry in self.aggregations.values():
+            if len(entry['charts']) > 1:
+                lines.append(f"   agregación compartida en {entry['source']}: {', '.join(entry['charts'])}")
+        return "\n".join(lines)
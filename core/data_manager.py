@@ -3,30 +3,86 @@ DataManager - Capa centralizada para gestión de datos
 Maneja todas las fuentes de datos y caché de forma centralizada
 """
 import asyncio
+import os
+import threading
+import time
 import pandas as pd
-from typing import Dict, Optional, Any, List
+import pyarrow.parquet as pq
+from typing import Callable, Dict, Optional, Any, List, Tuple
 from dash import dcc
-from helpers.get_token import get_access_token
-from helpers.get_api import listar_archivos_en_carpeta_compartida
-from helpers.helpers import get_download_url_by_name, generate_list_month, dataframe_filtro
-from constants import DRIVE_ID_CARPETA_STORAGE, FOLDER_ID_CARPETA_STORAGE
+from helpers.get_token import get_access_token, get_access_token_async
+from helpers.get_api import (
+    listar_archivos_en_carpeta_compartida,
+    listar_archivos_en_carpeta_compartida_async,
+    download_file,
+    download_range,
+)
+from helpers.http_client import async_download, async_download_range, async_session, RangeNotSupported
+from helpers.helpers import get_item_by_name, generate_list_month, dataframe_filtro
+from constants import DRIVE_ID_CARPETA_STORAGE, FOLDER_ID_CARPETA_STORAGE, CACHE_CONFIG, config
+from .metrics import span
+from .cache_backends import CacheBackend, MemoryCacheBackend, create_cache_backend, make_cache_key
+from .cache_budget import BudgetedMemoryCacheBackend, deep_sizeof
+from .shared_frames import CacheFrameStore, SharedFrameStore
+from .pipeline import DEFAULT_STEPS, compile_pipeline
+from .rollups import GRAINS, build_rollup, merge_rollups, rollup_components, rollup_cube, period_start
+from .sql_engine import ENGINES, SqlEngine
+from .incremental import FOOTER_PROBE, RangeFile, date_range, file_layout, parse_footer, plan_increment
+
+
+# Columna que filtra cada filtro de fecha de los dashboards (ver apply_filters)
+FILTER_COLUMNS = {'year': 'YEAR', 'month': 'MES', 'week': 'SEMANA'}
+
+
+def _buffer_size(buffer) -> int:
+    """Tamaño en bytes de un buffer descargado, sin mover su posición"""
+    position = buffer.tell()
+    size = buffer.seek(0, os.SEEK_END)
+    buffer.seek(position)
+    return size
 
 
 class DataSource:
     """Representa una fuente de datos específica"""
     
-    def __init__(self, name: str, file_name: str, cache_key: str, processor=None):
+    def __init__(self, name: str, file_name: str, cache_key: str, processor=None,
+                 transforms: Optional[Dict[str, Callable[[pd.Series], pd.Series]]] = None,
+                 steps: Optional[List[Dict]] = None, columns: Optional[List[str]] = None, engine: str = 'pandas'):
+        if engine not in ENGINES:
+            raise ValueError(f"Motor '{engine}' no soportado en la fuente '{name}' (válidos: {', '.join(ENGINES)})")
         self.name = name
         self.file_name = file_name
         self.cache_key = cache_key
-        self.processor = processor or self._default_processor
-    
-    def _default_processor(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Procesamiento por defecto para DataFrames"""
-        if 'FECHA' in df.columns:
-            df["YEAR"] = df["FECHA"].dt.year
-            df["MES"] = df["FECHA"].dt.month
-            df["SEMANA"] = df["FECHA"].dt.isocalendar().week
+        # Sin procesador propio, los pasos declarados (o los por defecto) se compilan en un plan
+        self.plan = None if processor else compile_pipeline(DEFAULT_STEPS if steps is None else steps)
+        self.processor = processor or self.plan
+        # {columna: función por columna}, p. ej. {'HORA RECEPCION': corregir_hora_tarde_serie}
+        self.transforms = transforms or {}
+        # Columnas declaradas del archivo (opcional): permiten validar los dashboards al compilar
+        self.columns = list(columns) if columns else None
+        # Motor de filtros y agregaciones: pandas en memoria o DuckDB sobre un parquet espejo (ver core.sql_engine)
+        self.engine = engine
+    
+    @property
+    def fingerprint(self) -> str:
+        """Identifica el procesamiento: si cambian los pasos, cambia la versión de la fuente"""
+        return self.plan.fingerprint if self.plan else ''
+    
+    @property
+    def schema(self) -> Optional[List[str]]:
+        """Columnas después del procesamiento (None si la fuente no declara sus columnas)"""
+        if self.columns is None:
+            return None
+        return self.plan.output_columns(self.columns) if self.plan else list(self.columns)
+    
+    def process(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Aplica las transformaciones por columna y luego el procesador de la fuente"""
+        for column, transform in self.transforms.items():
+            if column in df.columns:
+                df[column] = transform(df[column])
+        df = self.processor(df)
+        if self.plan and self.plan.timings:
+            print(f"⏱️ Procesamiento '{self.name}': {self.plan.describe_timings()}")
         return df
 
 
@@ -36,11 +92,49 @@ class DataManager:
     y proporciona caché compartido entre dashboards
     """
     
-    def __init__(self):
+    def __init__(self, cache_backend: Optional[CacheBackend] = None, frame_store=None):
         self.data_sources = {}
         self.cache_stores = {}
+        self.required_columns = {}  # {source_name: columnas que usan los dashboards}, ver dashboard_plan
+        self.rollup_specs = {}  # {source_name: [agregaciones por fecha]} precalculadas al precargar
+        self.cache = cache_backend or create_cache_backend(CACHE_CONFIG)
+        self.source_ttl = CACHE_CONFIG.get('source_ttl', 900)  # segundos hasta volver a descargar
+        self.cache_ttl = CACHE_CONFIG.get('ttl', 900)  # cubos y figuras
+        self.load_wait_timeout = CACHE_CONFIG.get('load_wait_timeout', 300)
+        self.incremental = CACHE_CONFIG.get('incremental', True)  # ver core.incremental
+        self.frame_store = frame_store or self._create_frame_store()
+        self._frames = {}  # {source_name: (version, DataFrame)} copia local o mapeo del proceso
+        self._locks = {}
+        self._sql_engine = None  # DuckDB, solo si alguna fuente usa engine: duckdb
+        self._appended = {}  # {source_name: (versión base, versión nueva, filas anexadas)} para los rollups
+        if isinstance(self.cache, BudgetedMemoryCacheBackend):
+            self.cache.on_evict(self._on_cache_evict)
         self._register_default_sources()
     
+    def _on_cache_evict(self, key: str):
+        """
+        La caché con presupuesto desalojó una entrada: si es la versión que este proceso usa como
+        copia local (el mismo DataFrame), se suelta para liberar la memoria. Se vuelve a cargar al pedirla.
+        """
+        kind, _, rest = key.partition(':')
+        if kind != 'frame' or not isinstance(self.frame_store, CacheFrameStore):
+            return
+        source_name, _, version = rest.partition(':')
+        local = self._frames.get(source_name)
+        if local is not None and local[0] == version:
+            self._frames.pop(source_name, None)
+            print(f"♻️ '{source_name}' desalojada de la caché: se libera la copia local")
+    
+    def _create_frame_store(self):
+        """
+        Con 'shared_dir' configurado las fuentes se publican como Arrow IPC mapeado en memoria
+        (una sola copia por máquina). Si no, se guardan en el backend de caché.
+        """
+        shared_dir = os.environ.get('SHARED_FRAMES_DIR', CACHE_CONFIG.get('shared_dir'))
+        if shared_dir:
+            return SharedFrameStore(shared_dir, ttl=self.source_ttl)
+        return CacheFrameStore(self.cache, ttl=self.source_ttl)
+    
     def _register_default_sources(self):
         """Registra las fuentes de datos por defecto"""
         self.register_source(
@@ -61,22 +155,443 @@ class DataManager:
             "date-options-store",
             self._generate_date_options
         )
+        
+        self._register_configured_sources()
+    
+    def _register_configured_sources(self):
+        """Registra (o redefine) las fuentes declaradas en la sección 'data_sources' de config.yaml"""
+        for source_config in config.get('data_sources', []) or []:
+            self.register_source(
+                source_config['name'],
+                source_config['file_name'],
+                source_config.get('cache_key', f"{source_config['name'].replace('_', '-')}-data-store"),
+                steps=source_config.get('steps'),
+                columns=source_config.get('columns'),
+                engine=source_config.get('engine', 'pandas'),
+            )
+    
+    def register_source(self, name: str, file_name: str, cache_key: str, processor=None, transforms=None,
+                        steps: Optional[List[Dict]] = None, columns: Optional[List[str]] = None, engine: str = 'pandas'):
+        """Registra una nueva fuente de datos (con procesador propio o pasos declarativos)"""
+        self.data_sources[name] = DataSource(name, file_name, cache_key, processor, transforms, steps, columns, engine)
     
-    def register_source(self, name: str, file_name: str, cache_key: str, processor=None):
-        """Registra una nueva fuente de datos"""
-        self.data_sources[name] = DataSource(name, file_name, cache_key, processor)
+    def store_id(self, source_name: str) -> str:
+        """Id del store de una fuente: lo comparten todos los dashboards que la usan"""
+        return self.data_sources[source_name].cache_key
         
-    def get_cache_stores(self, dashboard_id: str) -> List[dcc.Store]:
-        """Genera los stores de caché necesarios para un dashboard"""
+    def get_cache_stores(self, source_names: List[str]) -> List[dcc.Store]:
+        """Genera los stores de caché de las fuentes que usa un dashboard (ver DataPlan)"""
         stores = []
-        for source_name, source in self.data_sources.items():
-            store_id = f"{dashboard_id}-{source.cache_key}"
+        for source_name in source_names:
+            store_id = self.store_id(source_name)
             stores.append(dcc.Store(id=store_id, storage_type='session'))
             self.cache_stores[store_id] = source_name
         return stores
     
-    async def load_data_source(self, source_name: str) -> Dict[str, Any]:
-        """Carga una fuente de datos específica"""
+    def _check_columns(self, source: DataSource, df: pd.DataFrame):
+        """Avisa si al archivo cargado le faltan columnas que usan los dashboards"""
+        missing = sorted(self.required_columns.get(source.name, set()) - set(df.columns))
+        if missing:
+            print(f"⚠️ '{source.name}' no tiene las columnas que usan los dashboards: {', '.join(missing)}")
+    
+    def _get_lock(self, source_name: str) -> threading.Lock:
+        """Lock por fuente para que hilos concurrentes no descarguen lo mismo"""
+        return self._locks.setdefault(source_name, threading.Lock())
+    
+    def get_version(self, source_name: str) -> Optional[str]:
+        """Versión vigente de una fuente compartida entre workers (None si no está cargada)"""
+        return self.frame_store.get_version(source_name)
+    
+    def get_frame(self, source_name: str, progress: Optional[Callable[[str], None]] = None) -> pd.DataFrame:
+        """
+        Retorna el DataFrame procesado de una fuente de archivo.
+        Orden de búsqueda: copia local del proceso -> almacén compartido -> descarga.
+        
+        Args:
+            source_name: Nombre de la fuente registrada
+            progress: Función opcional que recibe la fase de carga ('token', 'listing', 'download', 'parse')
+        """
+        if source_name not in self.data_sources:
+            raise ValueError(f"Fuente de datos '{source_name}' no encontrada")
+        
+        version = self.get_version(source_name)
+        local = self._frames.get(source_name)
+        if local is not None and version is not None and local[0] == version:
+            return local[1]
+        
+        with self._get_lock(source_name):
+            version = self.get_version(source_name)
+            local = self._frames.get(source_name)
+            if local is not None and version is not None and local[0] == version:
+                return local[1]
+            
+            df = self.frame_store.get_frame(source_name, version) if version else None
+            if df is None:
+                version, df = self._load_shared(self.data_sources[source_name], progress)
+            
+            self._frames[source_name] = (version, df)
+            if local is not None and local[0] != version:
+                self.frame_store.release(source_name, local[0])
+            return df
+    
+    def attach(self, source_name: str, version: str) -> bool:
+        """
+        Usa en este proceso una versión ya publicada en el almacén compartido, sin descargarla.
+        False si no es la vigente o no se puede leer (ver core.executor).
+        """
+        local = self._frames.get(source_name)
+        if local is not None and local[0] == version:
+            return True
+        if self.get_version(source_name) != version:
+            return False
+        df = self.frame_store.get_frame(source_name, version)
+        if df is None:
+            return False
+        self._frames[source_name] = (version, df)
+        if local is not None:
+            self.frame_store.release(source_name, local[0])
+        return True
+    
+    def _load_shared(self, source: DataSource, progress=None) -> Tuple[str, pd.DataFrame]:
+        """
+        Descarga la fuente y la publica en el almacén compartido.
+        Si otro worker ya la está descargando, espera a que la publique.
+        """
+        if self.frame_store.try_lock(source.name, ttl=self.load_wait_timeout):
+            try:
+                version, df = self._download_frame(source, progress)
+                df = self.frame_store.publish(source.name, version, df)
+                self._extend_rollups(source.name, version)
+                return version, df
+            finally:
+                self.frame_store.unlock(source.name)
+        
+        print(f"⏳ Esperando a que otro worker cargue '{source.name}'")
+        deadline = time.time() + self.load_wait_timeout
+        while time.time() < deadline:
+            time.sleep(0.5)
+            version = self.get_version(source.name)
+            if version is not None:
+                df = self.frame_store.get_frame(source.name, version)
+                if df is not None:
+                    return version, df
+            elif not self.frame_store.is_locked(source.name):
+                break  # el otro worker falló, se descarga aquí
+        
+        version, df = self._download_frame(source, progress)
+        return version, self.frame_store.publish(source.name, version, df)
+    
+    def _resolve_item(self, source: DataSource, files_data: List[Dict]) -> Tuple[str, str]:
+        """Retorna (url de descarga, versión) del archivo de la fuente en el listado de la carpeta"""
+        item = get_item_by_name(files_data, source.file_name)
+        url = item.get('@microsoft.graph.downloadUrl') if item else None
+        if not url:
+            raise Exception(f"No se encontró el archivo: {source.file_name}")
+        
+        # Mismo eTag y mismos pasos = mismo resultado, así las copias locales siguen siendo válidas tras refrescar
+        version = make_cache_key(
+            source.file_name,
+            item.get('eTag') or item.get('lastModifiedDateTime') or time.time(),
+            source.fingerprint,
+        )
+        return url, version
+    
+    def _reuse_processed(self, source: DataSource, version: str) -> Optional[pd.DataFrame]:
+        """El archivo no cambió desde la última carga: se reutiliza el resultado procesado"""
+        processed = self.frame_store.get_frame(source.name, version)
+        if processed is not None:
+            print(f"♻️ '{source.name}' sin cambios, se reutiliza la versión procesada")
+        return processed
+    
+    def _parse_frame(self, source: DataSource, buffer, version: Optional[str] = None) -> pd.DataFrame:
+        try:
+            with span('parse', source.name) as s:
+                metadata = pq.read_metadata(buffer)
+                buffer.seek(0)
+                df = pd.read_parquet(buffer)
+                s.record(rows=len(df))
+        finally:
+            buffer.close()
+        with span('process', source.name) as s:
+            df = source.process(df)
+            s.record(rows=len(df))
+        self._check_columns(source, df)
+        if version is not None:
+            self._save_layout(source, version, metadata, len(df))
+        return df
+    
+    def _save_layout(self, source: DataSource, version: str, metadata, rows: int):
+        """Guarda los row groups de la versión cargada: la próxima carga puede ser incremental"""
+        if self.incremental and source.plan and rows == metadata.num_rows:
+            self.cache.set_json(f"layout:{source.name}", file_layout(metadata, version, source.fingerprint))
+    
+    def _increment_base(self, source: DataSource) -> Optional[Tuple[Dict, pd.DataFrame]]:
+        """Layout y DataFrame procesado de la última versión cargada (None si no hay sobre qué anexar)"""
+        if not (self.incremental and source.plan):
+            return None
+        layout = self.cache.get_json(f"layout:{source.name}")
+        if not layout or layout.get('fingerprint') != source.fingerprint:
+            return None
+        local = self._frames.get(source.name)
+        if local is not None and local[0] == layout['version']:
+            return layout, local[1]
+        df = self.frame_store.get_frame(source.name, layout['version'])
+        if df is None:
+            return None
+        self.frame_store.release(source.name, layout['version'])
+        return layout, df
+    
+    def _apply_increment(self, source: DataSource, version: str, plan, base: pd.DataFrame,
+                         file: Optional[RangeFile]) -> Optional[pd.DataFrame]:
+        """Lee y procesa los row groups anexados y arma la versión nueva (None si no se pudo)"""
+        with span('parse', source.name) as s:
+            table = plan.read(file)
+            s.record(rows=table.num_rows)
+        with span('process', source.name) as s:
+            rows = source.process(table.to_pandas())
+            s.record(rows=len(rows))
+        df = plan.merge(base, rows)
+        if df is None:
+            return None
+        
+        self._check_columns(source, df)
+        self._save_layout(source, version, plan.metadata, len(df))
+        self._appended[source.name] = (plan.layout['version'], version, rows)
+        dates = date_range(plan.metadata, plan.appended)
+        print(f"➕ '{source.name}': {len(plan.appended)} de {len(plan.rows)} row groups anexados "
+              f"({len(rows)} filas, FECHA {dates[0]:%Y-%m-%d} a {dates[1]:%Y-%m-%d})")
+        return df
+    
+    def _download_increment(self, source: DataSource, url: str, version: str, progress) -> Optional[pd.DataFrame]:
+        """
+        Carga incremental (ver core.incremental): footer y row groups anexados por HTTP Range.
+        None si no aplica; entonces se descarga el archivo completo.
+        """
+        base = self._increment_base(source)
+        if base is None:
+            return None
+        layout, df = base
+        try:
+            with span('footer', source.name) as s:
+                tail, size = download_range(url, -FOOTER_PROBE)
+                metadata, needed = parse_footer(tail, size)
+                if metadata is None:
+                    tail, size = download_range(url, -needed)
+                    metadata, _ = parse_footer(tail, size)
+                s.record(nbytes=len(tail))
+            plan = plan_increment(layout, metadata)
+            if plan is None:
+                return None
+            progress('download')
+            with span('download', source.name) as s:
+                ranges = {start: download_range(url, start, end - 1)[0] for start, end in plan.ranges()}
+                s.record(nbytes=sum(len(data) for data in ranges.values()))
+        except (RangeNotSupported, ValueError) as e:
+            print(f"⚠️ '{source.name}': sin carga incremental ({type(e).__name__}), se descarga completo")
+            return None
+        progress('parse')
+        return self._apply_increment(source, version, plan, df, RangeFile(size, {**ranges, size - len(tail): tail}))
+    
+    async def _download_increment_async(self, source: DataSource, url: str, version: str) -> Optional[pd.DataFrame]:
+        """Versión async de _download_increment: las lecturas por rango esperan en el event loop"""
+        base = self._increment_base(source)
+        if base is None:
+            return None
+        layout, df = base
+        try:
+            with span('footer', source.name) as s:
+                tail, size = await async_download_range(url, -FOOTER_PROBE)
+                metadata, needed = parse_footer(tail, size)
+                if metadata is None:
+                    tail, size = await async_download_range(url, -needed)
+                    metadata, _ = parse_footer(tail, size)
+                s.record(nbytes=len(tail))
+            plan = plan_increment(layout, metadata)
+            if plan is None:
+                return None
+            with span('download', source.name) as s:
+                chunks = await asyncio.gather(*(async_download_range(url, start, end - 1) for start, end in plan.ranges()))
+                ranges = {start: data for (start, _), (data, _) in zip(plan.ranges(), chunks)}
+                s.record(nbytes=sum(len(data) for data in ranges.values()))
+        except (RangeNotSupported, ValueError) as e:
+            print(f"⚠️ '{source.name}': sin carga incremental ({type(e).__name__}), se descarga completo")
+            return None
+        file = RangeFile(size, {**ranges, size - len(tail): tail})
+        return await asyncio.to_thread(self._apply_increment, source, version, plan, df, file)
+    
+    def _download_frame(self, source: DataSource, progress=None) -> Tuple[str, pd.DataFrame]:
+        """Descarga y procesa el parquet de una fuente desde SharePoint"""
+        progress = progress or (lambda phase: None)
+        
+        progress('token')
+        with span('token', source.name):
+            access_token = get_access_token()
+        progress('listing')
+        with span('listing', source.name):
+            files_data = listar_archivos_en_carpeta_compartida(
+                access_token=access_token,
+                drive_id=DRIVE_ID_CARPETA_STORAGE,
+                item_id=FOLDER_ID_CARPETA_STORAGE
+            )
+        url, version = self._resolve_item(source, files_data)
+        processed = self._reuse_processed(source, version)
+        if processed is not None:
+            return version, processed
+        processed = self._download_increment(source, url, version, progress)
+        if processed is not None:
+            return version, processed
+        
+        progress('download')
+        with span('download', source.name) as s:
+            buffer = download_file(url)
+            s.record(nbytes=_buffer_size(buffer))
+        progress('parse')
+        return version, self._parse_frame(source, buffer, version)
+    
+    async def _download_frame_async(self, source: DataSource) -> Tuple[str, pd.DataFrame]:
+        """
+        Igual que _download_frame, pero token, listado y descarga esperan en el event loop
+        (sin ocupar un hilo). Solo el parseo del parquet, que usa CPU, va a un hilo.
+        """
+        with span('token', source.name):
+            access_token = await get_access_token_async()
+        with span('listing', source.name):
+            files_data = await listar_archivos_en_carpeta_compartida_async(
+                access_token=access_token,
+                drive_id=DRIVE_ID_CARPETA_STORAGE,
+                item_id=FOLDER_ID_CARPETA_STORAGE
+            )
+        url, version = self._resolve_item(source, files_data)
+        processed = self._reuse_processed(source, version)
+        if processed is not None:
+            return version, processed
+        processed = await self._download_increment_async(source, url, version)
+        if processed is not None:
+            return version, processed
+        
+        with span('download', source.name) as s:
+            buffer = await async_download(url)
+            s.record(nbytes=_buffer_size(buffer))
+        return version, await asyncio.to_thread(self._parse_frame, source, buffer, version)
+    
+    async def get_frame_async(self, source_name: str) -> pd.DataFrame:
+        """Versión async de get_frame: misma búsqueda (copia local -> almacén compartido -> descarga)"""
+        if source_name not in self.data_sources:
+            raise ValueError(f"Fuente de datos '{source_name}' no encontrada")
+        
+        version = self.get_version(source_name)
+        local = self._frames.get(source_name)
+        if local is not None and version is not None and local[0] == version:
+            return local[1]
+        
+        df = self.frame_store.get_frame(source_name, version) if version else None
+        if df is None:
+            version, df = await self._load_shared_async(self.data_sources[source_name])
+        
+        self._frames[source_name] = (version, df)
+        if local is not None and local[0] != version:
+            self.frame_store.release(source_name, local[0])
+        return df
+    
+    async def _load_shared_async(self, source: DataSource) -> Tuple[str, pd.DataFrame]:
+        """Versión async de _load_shared: el lock del almacén evita descargas duplicadas entre tareas y workers"""
+        if self.frame_store.try_lock(source.name, ttl=self.load_wait_timeout):
+            try:
+                version, df = await self._download_frame_async(source)
+                df = await asyncio.to_thread(self.frame_store.publish, source.name, version, df)
+                self._extend_rollups(source.name, version)
+                return version, df
+            finally:
+                self.frame_store.unlock(source.name)
+        
+        print(f"⏳ Esperando a que otra carga de '{source.name}' termine")
+        deadline = time.time() + self.load_wait_timeout
+        while time.time() < deadline:
+            await asyncio.sleep(0.5)
+            version = self.get_version(source.name)
+            if version is not None:
+                df = self.frame_store.get_frame(source.name, version)
+                if df is not None:
+                    return version, df
+            elif not self.frame_store.is_locked(source.name):
+                break
+        
+        version, df = await self._download_frame_async(source)
+        return version, await asyncio.to_thread(self.frame_store.publish, source.name, version, df)
+    
+    def warm_up(self, source_names: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        Precarga las fuentes de archivo en memoria.
+        Pensado para ejecutarse en el proceso maestro antes del fork de los workers,
+        así los DataFrames se comparten copy-on-write.
+        """
+        if source_names is None:
+            source_names = [name for name, source in self.data_sources.items() if source.file_name]
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Todas las fuentes se descargan a la vez en un solo event loop
+            return asyncio.run(self._warm_up_async(source_names))
+        
+        # Ya hay un event loop en este hilo: carga secuencial por la ruta síncrona
+        results = {}
+        for source_name in source_names:
+            try:
+                print(f"🔥 Precargando fuente: {source_name}")
+                df = self.get_frame(source_name)
+                print(f"✅ Fuente '{source_name}' precargada: {len(df)} registros")
+                self.precompute_rollups(source_name)
+                results[source_name] = True
+            except Exception as e:
+                print(f"❌ Error precargando fuente '{source_name}': {e}")
+                results[source_name] = False
+        return results
+    
+    async def _warm_up_async(self, source_names: List[str]) -> Dict[str, bool]:
+        print(f"🔥 Precargando fuentes: {', '.join(source_names)}")
+        loaded = await self.load_sources_async(source_names)
+        results = {}
+        for source_name, result in loaded.items():
+            if result['success']:
+                print(f"✅ Fuente '{source_name}' precargada: {result['data']['rows']} registros")
+                self.precompute_rollups(source_name)
+            results[source_name] = result['success']
+        return results
+    
+    def invalidate(self, source_name: Optional[str] = None):
+        """Fuerza la recarga de una fuente (o de todas) en todos los workers"""
+        source_names = [source_name] if source_name else list(self.data_sources)
+        for name in source_names:
+            self._frames.pop(name, None)
+            self.frame_store.expire(name)
+    
+    def after_fork(self):
+        """Llamar en cada worker tras el fork: registra como propias las fuentes heredadas del maestro"""
+        self.frame_store.adopt(self._frames)
+    
+    @property
+    def shares_frames(self) -> bool:
+        """True si una fuente cargada en otro proceso queda disponible para este (Redis, disco o shared_dir)"""
+        return isinstance(self.frame_store, SharedFrameStore) or not isinstance(self.cache, MemoryCacheBackend)
+    
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        Memoria del proceso para monitoreo: la caché (si tiene presupuesto, ver core.cache_budget)
+        y la copia local de cada fuente. budgeted indica si esa copia es la entrada frame: que la
+        caché con presupuesto cuenta en max_memory (False con shared_dir, otro backend o si no cupo).
+        """
+        stats = getattr(self.cache, 'stats', None)
+        budgeted = isinstance(self.cache, BudgetedMemoryCacheBackend) and isinstance(self.frame_store, CacheFrameStore)
+        return {
+            'cache': stats() if stats else None,
+            'frames': {name: {'version': version, 'bytes': deep_sizeof(df),
+                              'budgeted': budgeted and self.cache.charged(f"frame:{name}:{version}")}
+                       for name, (version, df) in list(self._frames.items())},
+        }
+    
+    def load_source(self, source_name: str, progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Carga una fuente de datos de forma síncrona (usado por los callbacks en segundo plano)"""
         if source_name not in self.data_sources:
             raise ValueError(f"Fuente de datos '{source_name}' no encontrada")
         
@@ -87,24 +602,36 @@ class DataManager:
             
             if source.file_name is None:
                 # Fuente de datos generada (como opciones de fecha)
-                data = await asyncio.to_thread(source.processor)
+                data = source.processor()
+            else:
+                # Fuente de datos desde archivo: el store solo guarda una referencia,
+                # los datos quedan en la caché del servidor
+                df = self.get_frame(source_name, progress)
+                data = {'source': source_name, 'version': self.get_version(source_name), 'rows': len(df)}
+            
+            print(f"✅ Fuente '{source.name}' cargada exitosamente")
+            return {"success": True, "data": data, "error": None}
+            
+        except Exception as e:
+            print(f"❌ Error cargando fuente '{source.name}': {e}")
+            return {"success": False, "data": [], "error": str(e)}
+    
+    async def load_data_source(self, source_name: str) -> Dict[str, Any]:
+        """Carga una fuente de datos específica (HTTP asyncio nativo, sin ocupar un hilo por petición)"""
+        if source_name not in self.data_sources:
+            raise ValueError(f"Fuente de datos '{source_name}' no encontrada")
+        
+        source = self.data_sources[source_name]
+        
+        try:
+            print(f"🔄 Cargando fuente: {source.name}")
+            
+            if source.file_name is None:
+                data = source.processor()
             else:
-                # Fuente de datos desde archivo
-                access_token = await asyncio.to_thread(get_access_token)
-                files_data = await asyncio.to_thread(
-                    listar_archivos_en_carpeta_compartida,
-                    access_token=access_token,
-                    drive_id=DRIVE_ID_CARPETA_STORAGE,
-                    item_id=FOLDER_ID_CARPETA_STORAGE
-                )
-                
-                url = get_download_url_by_name(files_data, source.file_name)
-                if not url:
-                    raise Exception(f"No se encontró el archivo: {source.file_name}")
-                
-                df = await asyncio.to_thread(pd.read_parquet, url)
-                df = source.processor(df)
-                data = df.to_dict('records')
+                async with async_session():
+                    df = await self.get_frame_async(source_name)
+                data = {'source': source_name, 'version': self.get_version(source_name), 'rows': len(df)}
             
             print(f"✅ Fuente '{source.name}' cargada exitosamente")
             return {"success": True, "data": data, "error": None}
@@ -113,6 +640,12 @@ class DataManager:
             print(f"❌ Error cargando fuente '{source.name}': {e}")
             return {"success": False, "data": [], "error": str(e)}
     
+    async def load_sources_async(self, source_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Carga varias fuentes a la vez compartiendo una sesión HTTP (token y listado incluidos)"""
+        async with async_session():
+            results = await asyncio.gather(*(self.load_data_source(name) for name in source_names))
+        return dict(zip(source_names, results))
+    
     def _generate_date_options(self) -> Dict[str, Any]:
         """Genera opciones de fecha para filtros"""
         df = generate_list_month(2024, 8)
@@ -137,39 +670,213 @@ class DataManager:
             'default_year': str(years[-1]) if years else None
         }
     
-    def apply_filters(self, data: List[Dict], filters: Dict[str, Any]) -> pd.DataFrame:
-        """Aplica filtros a los datos"""
+    def _resolve_data(self, data) -> pd.DataFrame:
+        """Convierte el contenido de un store (referencia a fuente o registros) en DataFrame"""
+        if isinstance(data, dict) and 'source' in data:
+            return self.get_frame(data['source'])
+        return pd.DataFrame(data)
+    
+    def apply_filters(self, data, filters: Dict[str, Any]) -> pd.DataFrame:
+        """Aplica filtros a los datos (referencia a fuente o lista de registros)"""
         if not data:
             return pd.DataFrame()
         
-        df = pd.DataFrame(data)
+        source = self._sql_source(data)
+        if source is not None:
+            path, dtypes = self._mirror(source.name)
+            with span('filter', source.name) as s:
+                df = self.sql_engine.rows(path, self._filter_conditions(filters), dtypes)
+                s.record(rows=len(df))
+            return df
         
-        # Preparar valores para filtro
-        filter_values = []
-        filter_columns = []
+        df = self._resolve_data(data)
+        query = self._filter_query(filters)
+        if query:
+            with span('filter', data.get('source', '') if isinstance(data, dict) else '') as s:
+                df = df.query(query)
+                s.record(rows=len(df))
         
+        return df
+    
+    def _filter_conditions(self, filters: Dict[str, Any]) -> Dict[str, List[int]]:
+        """{columna: valores} de los filtros de año, mes y semanas"""
+        conditions = {}
         for filter_name, filter_value in filters.items():
-            if filter_value and filter_value != "":
-                if filter_name == 'year':
-                    filter_values.append(int(filter_value))
-                    filter_columns.append('YEAR')
-                elif filter_name == 'month':
-                    filter_values.append(int(filter_value))
-                    filter_columns.append('MES')
-                elif filter_name == 'week':
-                    if isinstance(filter_value, list):
-                        week_values = [int(w) for w in filter_value if w]
-                    else:
-                        week_values = [int(filter_value)]
-                    if week_values:
-                        filter_values.append(week_values)
-                        filter_columns.append('SEMANA')
-        
-        # Aplicar filtros
-        query = dataframe_filtro(values=filter_values, columns_df=filter_columns)
-        if query:
-            df = df.query(query)
+            if filter_name not in FILTER_COLUMNS or not filter_value:
+                continue
+            values = [int(value) for value in (filter_value if isinstance(filter_value, list) else [filter_value]) if value]
+            if values:
+                conditions[FILTER_COLUMNS[filter_name]] = values
+        return conditions
+    
+    def _filter_query(self, filters: Dict[str, Any]) -> str:
+        """Query de DataFrame.query para los filtros de año, mes y semanas"""
+        conditions = self._filter_conditions(filters)
+        return dataframe_filtro(
+            values=[values if column == FILTER_COLUMNS['week'] else values[0] for column, values in conditions.items()],
+            columns_df=list(conditions),
+        )
+    
+    @property
+    def sql_engine(self) -> SqlEngine:
+        if self._sql_engine is None:
+            self._sql_engine = SqlEngine.from_config(CACHE_CONFIG)
+        return self._sql_engine
+    
+    def _sql_source(self, data) -> Optional[DataSource]:
+        """Fuente del store si sus consultas van por DuckDB"""
+        if isinstance(data, dict) and data.get('source') in self.data_sources:
+            source = self.data_sources[data['source']]
+            return source if source.engine == 'duckdb' else None
+        return None
+    
+    def _mirror(self, source_name: str) -> Tuple[str, pd.Series]:
+        """Parquet espejo de la versión vigente (se escribe la primera vez) y tipos de sus columnas"""
+        df = self.get_frame(source_name)
+        version = self._frames[source_name][0]
+        with span('mirror', source_name):
+            path = self.sql_engine.mirror(source_name, version, df)
+        return path, df.dtypes
+    
+    def get_rollup(self, source_name: str, grain: str, time_column: str, agg: Dict) -> Optional[pd.DataFrame]:
+        """
+        Rollup de una agregación por fecha ('day', 'week' o 'month') para la versión vigente de la
+        fuente, guardado en la caché compartida. None si la agregación no se puede re-agregar.
+        """
+        if rollup_components(agg) is None:
+            return None
+        df = self.get_frame(source_name)
+        version = self.get_version(source_name)
+        key = "rollup:" + make_cache_key(source_name, version, grain, time_column, agg)
+        rollup = self.cache.get_frame(key) if version else None
+        if rollup is None:
+            with span('rollup', source_name) as s:
+                rollup = build_rollup(df, time_column, agg, grain, list(FILTER_COLUMNS.values()))
+                s.record(rows=len(rollup))
+            if version:
+                self.cache.set_frame(key, rollup, ttl=self.source_ttl)
+        return rollup
+    
+    def _extend_rollups(self, source_name: str, version: str):
+        """
+        Tras una carga que solo anexó filas: rollups de la versión nueva = rollups de la base
+        (si están en caché) combinados con los de las filas nuevas. Los demás se calculan al pedirlos.
+        """
+        appended = self._appended.pop(source_name, None)
+        if appended is None or appended[1] != version:
+            return
+        base_version, _, rows = appended
+        for spec in self.rollup_specs.get(source_name, []):
+            time_column, agg = spec['groupby'][0], spec['agg']
+            if rollup_components(agg) is None:
+                continue
+            for grain in GRAINS:
+                base = self.cache.get_frame("rollup:" + make_cache_key(source_name, base_version, grain, time_column, agg))
+                if base is None:
+                    continue
+                with span('rollup', source_name) as s:
+                    delta = build_rollup(rows, time_column, agg, grain, list(FILTER_COLUMNS.values()))
+                    rollup = merge_rollups(base, delta, time_column, agg)
+                    s.record(rows=len(rollup))
+                key = "rollup:" + make_cache_key(source_name, version, grain, time_column, agg)
+                self.cache.set_frame(key, rollup, ttl=self.source_ttl)
+    
+    def precompute_rollups(self, source_name: str):
+        """
+        Calcula los rollups de las agregaciones por fecha registradas para la fuente.
+        Las fuentes con engine: duckdb no usan rollups: se escribe su parquet espejo.
+        """
+        if self.data_sources[source_name].engine == 'duckdb':
+            self._mirror(source_name)
+            return
+        for spec in self.rollup_specs.get(source_name, []):
+            for grain in GRAINS:
+                self.get_rollup(source_name, grain, spec['groupby'][0], spec['agg'])
+    
+    def get_date_span(self, data, filters: Dict[str, Any], aggregation_config: Dict) -> int:
+        """Días que cubren los datos filtrados (desde el rollup diario; 0 sin datos)"""
+        if not (isinstance(data, dict) and data.get('source')):
+            return 0
+        time_column = aggregation_config['groupby'][0]
+        source = self._sql_source(data)
+        if source is not None:
+            path, _ = self._mirror(source.name)
+            return self.sql_engine.date_span(path, self._filter_conditions(filters), time_column)
+        daily = self.get_rollup(data['source'], 'day', time_column, aggregation_config.get('agg', {}))
+        if daily is None:
+            daily = self.get_frame(data['source'])
+        query = self._filter_query(filters)
+        dates = (daily.query(query) if query else daily)[time_column]
+        if dates.empty:
+            return 0
+        return int((dates.max() - dates.min()).days) + 1
+    
+    def get_cube(self, data, filters: Dict[str, Any], aggregation_config: Dict,
+                 granularity: Optional[str] = None) -> pd.DataFrame:
+        """
+        Retorna los datos filtrados y agregados según la configuración del gráfico.
+        El resultado se guarda en la caché compartida por versión de fuente y filtros.
+        Con `granularity` ('day', 'week', 'month') la agregación por fecha se sirve desde rollups.
+        """
+        version = None
+        if isinstance(data, dict) and 'source' in data:
+            self.get_frame(data['source'])  # asegura que la versión vigente esté cargada
+            version = self.get_version(data['source'])
+        
+        key = None
+        if version:
+            key = "cube:" + make_cache_key(data['source'], version, filters, aggregation_config, granularity)
+            cube = self.cache.get_frame(key)
+            if cube is not None:
+                return cube
+        
+        source = self._sql_source(data)
+        if source is not None and aggregation_config.get('groupby'):
+            path, dtypes = self._mirror(source.name)
+            with span('aggregate', source.name) as s:
+                df = self.sql_engine.cube(path, self._filter_conditions(filters), aggregation_config, dtypes, granularity)
+                s.record(rows=len(df) if df is not None else None)
+            if df is not None:
+                if key:
+                    self.cache.set_frame(key, df, ttl=self.cache_ttl)
+                return df
+        
+        if granularity:
+            df = self._time_cube(data, filters, aggregation_config, granularity)
+            if key:
+                self.cache.set_frame(key, df, ttl=self.cache_ttl)
+            return df
+        
+        df = self.apply_filters(data, filters)
+        if aggregation_config.get('groupby') and not df.empty:
+            with span('aggregate', data.get('source', '') if isinstance(data, dict) else '') as s:
+                df = df.groupby(aggregation_config['groupby']).agg(aggregation_config.get('agg', {})).reset_index()
+                s.record(rows=len(df))
+        
+        if key:
+            self.cache.set_frame(key, df, ttl=self.cache_ttl)
+        return df
+    
+    def _time_cube(self, data, filters: Dict[str, Any], aggregation_config: Dict, granularity: str) -> pd.DataFrame:
+        """Agregación por fecha en la granularidad pedida: desde el rollup, o del DataFrame si no hay"""
+        time_column = aggregation_config['groupby'][0]
+        agg = aggregation_config.get('agg', {})
+        source_name = data.get('source', '') if isinstance(data, dict) else ''
+        rollup = self.get_rollup(source_name, granularity, time_column, agg) if source_name else None
+        
+        if rollup is None:
+            df = self.apply_filters(data, filters)
+            if df.empty:
+                return df
+            with span('aggregate', source_name) as s:
+                df = df.groupby(period_start(df[time_column], granularity).rename(time_column)).agg(agg).reset_index()
+                s.record(rows=len(df))
+            return df
         
+        query = self._filter_query(filters)
+        with span('aggregate', source_name) as s:
+            df = rollup_cube(rollup.query(query) if query else rollup, time_column, agg)
+            s.record(rows=len(df))
         return df
 
 
@@ -0,0 +1,214 @@
+"""
+Cálculos de los callbacks (cubos, figuras, métricas) fuera del hilo de la petición
+
+Con gthread, los callbacks de un worker comparten el GIL: un dashboard pesado (filtro, groupby
+y figura de plotly) detiene a los demás aunque la máquina tenga núcleos libres. ComputeExecutor
+envía esos cálculos a un pool acotado de procesos y las tareas de E/S a un pool de hilos:
+    - al proceso de cálculo solo viaja {fuente: versión} de las fuentes que lee la tarea; el
+      proceso usa esa versión desde el almacén compartido (con shared_dir, el Arrow IPC mapeado
+      en memoria) y la conserva para las tareas siguientes. Los DataFrames no se serializan.
+    - la cola es acotada: con todos los procesos ocupados y max_queue tareas en espera, la tarea
+      se calcula en el hilo de la petición (como sin executor) en lugar de acumular latencia
+    - si el proceso no puede usar esa versión (se publicó otra, o las fuentes no se comparten
+      entre procesos) o el pool se cae, la tarea también se calcula en el hilo de la petición
+    - el tiempo en cola y de ejecución de cada tarea queda en /metrics
+      (apg_bi_executor_queue_seconds y apg_bi_executor_run_seconds por pool y tarea)
+    - las fases que mide la tarea con span (filter, aggregate, rollup, plotly, figure_json) se
+      registran en el registro del proceso de cálculo, que nadie expone: vuelven con el resultado
+      y se registran en el worker (apg_bi_phase_*), igual que si la tarea corriera en el hilo
+
+Configuración (sección 'executor' de config.yaml):
+    executor:
+      processes: 2               # procesos de cálculo por worker; 0 (por defecto) sin pool
+      threads: 8                 # hilos para E/S (run_io)
+      max_queue: 4               # tareas en espera además de las que se están ejecutando
+      start_method: forkserver   # forkserver | spawn (fork no es seguro desde un worker con hilos)
+
+Con gunicorn cada worker crea su pool en la primera tarea (después del fork): workers × processes
+no debería superar los núcleos. Las funciones que se envían deben ser funciones de módulo y sus
+argumentos y resultado, serializables (dicts, bytes, componentes sin callbacks).
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from constants import config
+from .cache_budget import cache_partition, current_partition
+from .data_manager import data_manager
+from .metrics import EXECUTOR_QUEUE_SECONDS, EXECUTOR_RUN_SECONDS, collect_spans, observe_spans
+
+executor_config = config.get('executor', {}) or {}
+
+_in_worker = False  # True en los procesos de cálculo: las tareas anidadas se ejecutan ahí mismo
+
+
+class FrameUnavailable(Exception):
+    """El proceso de cálculo no pudo usar la versión de una fuente que lee la tarea"""
+
+
+def source_versions(data) -> Optional[Dict[str, str]]:
+    """
+    {fuente: versión} que lee un callback a partir del store de su fuente.
+    None si la fuente todavía no está publicada (la tarea la cargará en el hilo de la petición).
+    """
+    if not isinstance(data, dict) or not data.get('source'):
+        return {}
+    version = data_manager.get_version(data['source'])
+    return {data['source']: version} if version else None
+
+
+def _init_worker():
+    global _in_worker
+    _in_worker = True
+
+
+def _run_task(func: Callable, args: tuple, kwargs: dict, sources: Dict[str, str], partition: str, submitted: float):
+    """
+    Se ejecuta en el proceso de cálculo: retorna (resultado, fases medidas con span, segundos en cola,
+    segundos de ejecución)
+    """
+    queued = time.time() - submitted
+    started = time.perf_counter()
+    for name, version in sources.items():
+        if not data_manager.attach(name, version):
+            raise FrameUnavailable(f"{name}@{version}")
+    with cache_partition(partition), collect_spans() as spans:
+        result = func(*args, **kwargs)
+    return result, spans, queued, time.perf_counter() - started
+
+
+def _timed(func: Callable, args: tuple, kwargs: dict):
+    started = time.perf_counter()
+    return func(*args, **kwargs), started, time.perf_counter()
+
+
+class ComputeExecutor:
+    """Pool acotado de procesos para cálculos y pool de hilos para E/S, con tiempos por tarea"""
+
+    def __init__(self, processes: int = 0, threads: int = 4, max_queue: Optional[int] = None,
+                 start_method: Optional[str] = None):
+        self.processes = processes
+        self.threads = threads
+        self.max_queue = processes if max_queue is None else max_queue
+        methods = multiprocessing.get_all_start_methods()
+        self.start_method = start_method or ('forkserver' if 'forkserver' in methods else 'spawn')
+        self._lock = threading.Lock()
+        self._pid = None
+        self._process_pool = None
+        self._thread_pool = None
+        self.pending = 0
+        self.submitted = self.inline = self.fallbacks = 0
+
+    @classmethod
+    def from_config(cls, executor_config: Dict) -> 'ComputeExecutor':
+        return cls(int(executor_config.get('processes', 0) or 0), int(executor_config.get('threads', 4)),
+                   executor_config.get('max_queue'), executor_config.get('start_method'))
+
+    def _check_fork(self):
+        """Los pools del proceso padre no sirven en un hijo (worker de gunicorn): se crean de nuevo"""
+        if self._pid != os.getpid():
+            self._process_pool = self._thread_pool = None
+            self.pending = 0
+            self._pid = os.getpid()
+
+    def _processes(self) -> ProcessPoolExecutor:
+        with self._lock:
+            self._check_fork()
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    self.processes, mp_context=multiprocessing.get_context(self.start_method), initializer=_init_worker)
+            return self._process_pool
+
+    def _threads(self) -> ThreadPoolExecutor:
+        with self._lock:
+            self._check_fork()
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix='apg-bi-io')
+            return self._thread_pool
+
+    def _reserve(self) -> bool:
+        """Toma un lugar en la cola del pool de procesos (False si está llena)"""
+        with self._lock:
+            self._check_fork()
+            if self.pending >= self.processes + self.max_queue:
+                return False
+            self.pending += 1
+            self.submitted += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self.pending = max(self.pending - 1, 0)
+
+    def _run_inline(self, func: Callable, args: tuple, kwargs: dict, task: str):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            EXECUTOR_RUN_SECONDS.observe(time.perf_counter() - started, pool='inline', task=task)
+
+    def run(self, func: Callable, *args, sources: Optional[Dict[str, str]] = None, task: str = '', **kwargs) -> Any:
+        """
+        Ejecuta func(*args, **kwargs) en un proceso de cálculo y retorna su resultado.
+
+        Args:
+            sources: {fuente: versión} que lee la tarea (ver source_versions); None la ejecuta
+                en el hilo actual
+            task: Etiqueta de la tarea en las métricas
+        """
+        if not self.processes or _in_worker or sources is None or not data_manager.shares_frames:
+            return self._run_inline(func, args, kwargs, task)
+        if not self._reserve():
+            self.inline += 1
+            return self._run_inline(func, args, kwargs, task)
+
+        try:
+            future = self._processes().submit(_run_task, func, args, kwargs, sources, current_partition(), time.time())
+            result, spans, queued, seconds = future.result()
+        except (FrameUnavailable, BrokenProcessPool) as e:
+            if isinstance(e, BrokenProcessPool):
+                print(f"⚠️ Pool de cálculo caído, se recrea: {e}")
+                with self._lock:
+                    self._process_pool = None
+            self.fallbacks += 1
+            return self._run_inline(func, args, kwargs, task)
+        finally:
+            self._release()
+
+        observe_spans(spans)
+        EXECUTOR_QUEUE_SECONDS.observe(queued, pool='process', task=task)
+        EXECUTOR_RUN_SECONDS.observe(seconds, pool='process', task=task)
+        return result
+
+    def run_io(self, func: Callable, *args, task: str = '', **kwargs) -> Any:
+        """Ejecuta func(*args, **kwargs) en el pool de hilos de E/S y retorna su resultado"""
+        submitted = time.perf_counter()
+        result, started, finished = self._threads().submit(_timed, func, args, kwargs).result()
+        EXECUTOR_QUEUE_SECONDS.observe(started - submitted, pool='thread', task=task)
+        EXECUTOR_RUN_SECONDS.observe(finished - started, pool='thread', task=task)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Configuración y actividad del executor para monitoreo"""
+        return {
+            'processes': self.processes,
+            'threads': self.threads,
+            'max_queue': self.max_queue,
+            'pending': self.pending,
+            'submitted': self.submitted,
+            'inline': self.inline,          # cola llena
+            'fallbacks': self.fallbacks,    # versión no disponible en el proceso o pool caído
+        }
+
+    def shutdown(self):
+        with self._lock:
+            for pool in (self._process_pool, self._thread_pool):
+                if pool is not None and self._pid == os.getpid():
+                    pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = self._thread_pool = None
+
+
+executor = ComputeExecutor.from_config(executor_config)
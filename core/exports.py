@@ -0,0 +1,155 @@
+"""
+Exportación de datos filtrados de los dashboards (xlsx, csv, parquet)
+
+Los archivos se generan por bloques directamente a disco y se sirven desde allí
+con la ruta /export/<source_name> de Flask, sin armar el archivo completo en memoria.
+La ruta exige sesión iniciada (los enlaces del dashboard) o token Bearer, como /companies.
+Cada archivo queda en un directorio de exportaciones con clave (fuente, versión, filtros, formato),
+así las exportaciones repetidas con los mismos filtros no se vuelven a generar.
+
+Configuración (sección 'cache' de config.yaml o variable EXPORT_DIR):
+    cache:
+      export_dir: /tmp/apg_bi_exports
+      export_ttl: 3600
+"""
+import os
+import tempfile
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+from helpers.helpers import write_excel_streaming
+from constants import CACHE_CONFIG
+from .cache_backends import make_cache_key
+from .data_manager import data_manager
+
+# formato: (mimetype, extensión)
+EXPORT_FORMATS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+EXPORT_CHUNK_SIZE = 50000
+EXPORT_FILTERS = ('year', 'month', 'week')
+
+
+def export_directory() -> str:
+    directory = os.environ.get('EXPORT_DIR', CACHE_CONFIG.get('export_dir')) or \
+        os.path.join(tempfile.gettempdir(), 'apg_bi_exports')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def export_url(source_name: str, filters: Dict[str, Any], fmt: str) -> str:
+    """URL de descarga para la fuente con los filtros actuales del dashboard"""
+    params = [('format', fmt)]
+    for filter_name in EXPORT_FILTERS:
+        value = filters.get(filter_name)
+        if isinstance(value, list):
+            params.extend((filter_name, str(v)) for v in value if v)
+        elif value:
+            params.append((filter_name, str(value)))
+    return f"/export/{source_name}?{urlencode(params)}"
+
+
+def parse_export_filters(args) -> Dict[str, Any]:
+    """Convierte los parámetros de la URL (MultiDict de Flask) en filtros para DataManager"""
+    filters = {}
+    for filter_name in EXPORT_FILTERS:
+        values = [v for v in args.getlist(filter_name) if v]
+        if not values:
+            continue
+        filters[filter_name] = values if filter_name == 'week' else values[0]
+    return filters
+
+
+def _write_csv(df: pd.DataFrame, path: str, chunk_size: int):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        if df.empty:
+            df.to_csv(f, index=False)
+        for start in range(0, len(df), chunk_size):
+            df.iloc[start:start + chunk_size].to_csv(f, index=False, header=start == 0)
+
+
+def _write_parquet(df: pd.DataFrame, path: str, chunk_size: int):
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for start in range(0, len(df), chunk_size):
+            chunk = pa.Table.from_pandas(df.iloc[start:start + chunk_size], schema=schema, preserve_index=False)
+            writer.write_table(chunk)
+
+
+def write_export(df: pd.DataFrame, path: str, fmt: str, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Escribe el DataFrame en el formato pedido, por bloques"""
+    if fmt == 'xlsx':
+        write_excel_streaming(df, path, sheet_name="DATOS", table_name="DATOS_TABLA")
+    elif fmt == 'csv':
+        _write_csv(df, path, chunk_size)
+    elif fmt == 'parquet':
+        _write_parquet(df, path, chunk_size)
+    else:
+        raise ValueError(f"Formato de exportación '{fmt}' no soportado")
+
+
+def prune_exports(directory: str, ttl: int):
+    """Borra exportaciones más antiguas que el TTL (versiones de datos ya reemplazadas)"""
+    limit = time.time() - ttl
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < limit:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def build_export(source_name: str, filters: Dict[str, Any], fmt: str) -> Optional[str]:
+    """
+    Retorna la ruta del archivo exportado para la fuente y filtros dados.
+    Reutiliza el archivo si ya se generó para la misma versión de datos.
+
+    Returns:
+        Ruta del archivo, o None si la fuente no es exportable
+    """
+    source = data_manager.data_sources.get(source_name)
+    if source is None or not source.file_name:
+        return None
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportación '{fmt}' no soportado")
+
+    data_manager.get_frame(source_name)  # asegura que la versión vigente esté cargada
+    version = data_manager.get_version(source_name)
+
+    directory = export_directory()
+    key = make_cache_key(source_name, version, filters, fmt)
+    path = os.path.join(directory, f"{key}.{EXPORT_FORMATS[fmt][1]}")
+    if version and os.path.exists(path):
+        print(f"📦 Exportación reutilizada: {source_name} ({fmt})")
+        return path
+
+    prune_exports(directory, CACHE_CONFIG.get('export_ttl', 3600))
+
+    started = time.time()
+    df = data_manager.apply_filters({'source': source_name}, filters)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    os.close(fd)
+    try:
+        write_export(df, tmp_path, fmt)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"✅ Exportación generada: {source_name} ({fmt}, {len(df)} filas, {time.time() - started:.1f}s)")
+    return path
+
+
+def export_file_name(source_name: str, filters: Dict[str, Any], fmt: str) -> str:
+    """Nombre del archivo descargado, con los filtros aplicados"""
+    parts = [data_manager.data_sources[source_name].file_name.rsplit('.', 1)[0]]
+    for filter_name in EXPORT_FILTERS:
+        value = filters.get(filter_name)
+        if value:
+            parts.append('-'.join(value) if isinstance(value, list) else str(value))
+    return f"{' '.join(parts)}.{EXPORT_FORMATS[fmt][1]}"
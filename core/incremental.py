@@ -0,0 +1,230 @@
+"""
+Carga incremental de parquet que crecen por anexado
+
+El exportador reescribe el parquet completo (cambia el eTag) aunque solo agregue los días
+nuevos al final. Con lecturas por rango (HTTP Range) DataManager evita volver a descargarlo:
+    1. pide solo el footer del parquet (row groups con sus estadísticas, incluida FECHA)
+    2. verifica que el archivo nuevo sea la versión cargada con row groups anexados al final:
+       los primeros row groups conservan su firma (filas, tamaño comprimido y min/max/nulos de
+       cada columna), hay row groups nuevos y su FECHA mínima es posterior a la FECHA máxima
+       de la versión cargada
+    3. descarga y procesa solo los row groups anexados y los agrega a las filas ya procesadas
+    4. los rollups por fecha se extienden con las filas nuevas en lugar de recalcularse
+       (ver DataManager._extend_rollups)
+
+Requisitos: la fuente usa el pipeline declarativo (procesamiento fila a fila), tiene columna
+FECHA con estadísticas y el archivo tiene varios row groups (p. ej. escrito por mes o con
+row_group_size). Cualquier otra reescritura se descarga completa como siempre: cambió el
+esquema o la firma de un row group anterior, no hay row groups nuevos (el eTag cambió por
+una edición), las fechas nuevas no son posteriores a las cargadas, se anexó más de
+MAX_APPENDED_FRACTION de las filas o el servidor no acepta Range.
+
+La firma sale del footer y no incluye los valores: una edición dentro de un row group anterior
+que no cambie su tamaño comprimido ni sus estadísticas y que llegue junto con días anexados no
+se detecta. Si el exportador puede corregir días pasados al anexar, usar incremental: false.
+
+Configuración (sección 'cache' de config.yaml):
+    cache:
+      incremental: true   # false fuerza siempre la descarga completa
+"""
+import io
+import struct
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .cache_backends import make_cache_key
+
+FOOTER_PROBE = 64 * 1024  # bytes finales que se piden para leer el footer en una sola petición
+MAX_APPENDED_FRACTION = 0.5  # sobre esta fracción de filas anexadas conviene la descarga completa
+DATE_COLUMN = 'FECHA'  # las filas anexadas deben ser posteriores a las cargadas según esta columna
+MAGIC = b'PAR1'
+
+
+class RangeFile(io.RawIOBase):
+    """Archivo de solo lectura de `size` bytes del que solo se descargaron algunos rangos {inicio: bytes}"""
+
+    def __init__(self, size: int, ranges: Dict[int, bytes]):
+        super().__init__()
+        self.size = size
+        self.ranges = sorted(ranges.items())
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size}[whence]
+        self.position = base + offset
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.size - self.position
+        size = min(size, self.size - self.position)
+        if size <= 0:
+            return b''
+        for start, data in self.ranges:
+            if start <= self.position and self.position + size <= start + len(data):
+                offset = self.position - start
+                self.position += size
+                return data[offset:offset + size]
+        raise IOError(f"Rango no descargado: bytes {self.position}-{self.position + size - 1}")
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def parse_footer(tail: bytes, size: int) -> Tuple[Optional[pq.FileMetaData], int]:
+    """
+    Metadatos del parquet desde sus últimos bytes.
+    Retorna (metadatos, bytes del footer); metadatos None si `tail` no alcanza a cubrirlo.
+    """
+    if len(tail) < 8 or tail[-4:] != MAGIC:
+        raise ValueError("El archivo no es un parquet")
+    needed = struct.unpack('<I', tail[-8:-4])[0] + 8
+    if needed > len(tail):
+        return None, needed
+    return pq.read_metadata(RangeFile(size, {size - len(tail): tail})), needed
+
+
+def schema_key(metadata: pq.FileMetaData) -> str:
+    """Identifica las columnas y tipos del archivo (sin los metadatos de pandas)"""
+    return make_cache_key(str(metadata.schema.to_arrow_schema().remove_metadata()))
+
+
+def row_group_signature(metadata: pq.FileMetaData, index: int) -> str:
+    """Firma de un row group: filas y, por columna, tamaño comprimido y estadísticas"""
+    row_group = metadata.row_group(index)
+    columns = []
+    for j in range(row_group.num_columns):
+        column = row_group.column(j)
+        stats = column.statistics
+        summary = (stats.min, stats.max, stats.null_count) if stats is not None and stats.has_min_max else ()
+        columns.append((column.path_in_schema, column.total_compressed_size, *summary))
+    return make_cache_key(row_group.num_rows, columns)
+
+
+def row_group_range(metadata: pq.FileMetaData, index: int) -> Tuple[int, int]:
+    """Bytes [inicio, fin) que ocupan las columnas de un row group dentro del archivo"""
+    row_group = metadata.row_group(index)
+    start, end = None, 0
+    for j in range(row_group.num_columns):
+        column = row_group.column(j)
+        offset = column.data_page_offset
+        if column.has_dictionary_page and column.dictionary_page_offset:
+            offset = min(offset, column.dictionary_page_offset)
+        start = offset if start is None else min(start, offset)
+        end = max(end, offset + column.total_compressed_size)
+    return start, end
+
+
+def column_range(metadata: pq.FileMetaData, indices: List[int], column: str) -> Optional[Tuple]:
+    """(min, max) de una columna en los row groups indicados, desde las estadísticas del footer"""
+    names = [metadata.schema.column(j).name for j in range(metadata.num_columns)]
+    if column not in names:
+        return None
+    position = names.index(column)
+    bounds = []
+    for index in indices:
+        stats = metadata.row_group(index).column(position).statistics
+        if stats is None or not stats.has_min_max:
+            return None
+        bounds.append((stats.min, stats.max))
+    return (min(low for low, _ in bounds), max(high for _, high in bounds)) if bounds else None
+
+
+def date_range(metadata: pq.FileMetaData, indices: List[int]) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """(min, max) de FECHA en los row groups indicados; None sin estadísticas utilizables"""
+    bounds = column_range(metadata, indices, DATE_COLUMN)
+    if bounds is None:
+        return None
+    try:
+        low, high = pd.Timestamp(bounds[0]), pd.Timestamp(bounds[1])
+    except (TypeError, ValueError):
+        return None
+    return None if pd.isna(low) or pd.isna(high) else (low, high)
+
+
+def file_layout(metadata: pq.FileMetaData, version: str, fingerprint: str) -> Dict:
+    """Layout de una versión cargada (JSON): esquema, firma y filas de cada row group y FECHA máxima"""
+    dates = date_range(metadata, list(range(metadata.num_row_groups)))
+    return {
+        'version': version,
+        'fingerprint': fingerprint,
+        'schema': schema_key(metadata),
+        'signatures': [row_group_signature(metadata, i) for i in range(metadata.num_row_groups)],
+        'rows': [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)],
+        'max_date': dates[1].isoformat() if dates else None,
+    }
+
+
+class IncrementalPlan:
+    """Row groups anexados a descargar para pasar de la versión cargada (layout) al archivo nuevo (metadata)"""
+
+    def __init__(self, layout: Dict, metadata: pq.FileMetaData):
+        self.layout = layout
+        self.metadata = metadata
+        self.appended = list(range(len(layout['rows']), metadata.num_row_groups))
+        self.rows = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+
+    @property
+    def appended_rows(self) -> int:
+        return sum(self.rows[i] for i in self.appended)
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        """Rangos [inicio, fin) a descargar: los de row groups contiguos se unen en una petición"""
+        merged = []
+        for start, end in sorted(row_group_range(self.metadata, i) for i in self.appended):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def read(self, file: RangeFile) -> pa.Table:
+        """Lee los row groups anexados (sin pre_buffer: cada lectura cae dentro de un rango descargado)"""
+        return pq.ParquetFile(file, metadata=self.metadata, pre_buffer=False).read_row_groups(self.appended)
+
+    def merge(self, base: pd.DataFrame, rows: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Versión nueva completa: filas procesadas de la base seguidas de `rows` (los row groups
+        anexados, ya procesados). None si el procesamiento no conservó las filas.
+        """
+        if len(base) != sum(self.layout['rows']) or len(rows) != self.appended_rows:
+            return None
+        base_table = pa.Table.from_pandas(base, preserve_index=False)
+        try:
+            new_table = pa.Table.from_pandas(rows, schema=base_table.schema, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, KeyError):
+            return None
+        return pa.concat_tables([base_table, new_table]).to_pandas()
+
+
+def plan_increment(layout: Optional[Dict], metadata: pq.FileMetaData) -> Optional[IncrementalPlan]:
+    """
+    Plan incremental si el archivo nuevo es la versión cargada con row groups anexados al final,
+    o None si hay que descargarlo completo (cualquier otra reescritura)
+    """
+    if not layout or layout['schema'] != schema_key(metadata) or not layout.get('max_date'):
+        return None
+    loaded = len(layout['signatures'])
+    if metadata.num_row_groups <= loaded:
+        return None  # se quitaron o editaron filas sin anexar
+    if any(row_group_signature(metadata, i) != layout['signatures'][i] for i in range(loaded)):
+        return None  # se reescribió un row group ya cargado
+    dates = date_range(metadata, list(range(loaded, metadata.num_row_groups)))
+    if dates is None or dates[0] <= pd.Timestamp(layout['max_date']):
+        return None  # las filas nuevas no son solo días posteriores a los cargados
+    plan = IncrementalPlan(layout, metadata)
+    if plan.appended_rows > MAX_APPENDED_FRACTION * metadata.num_rows:
+        return None
+    return plan
@@ -0,0 +1,62 @@
+"""
+Gestor de trabajos en segundo plano para callbacks largos (descarga de fuentes)
+Los callbacks con background=True se ejecutan fuera del worker que atiende la petición,
+así los workers quedan libres para los callbacks interactivos.
+
+Configuración (sección 'jobs' de config.yaml, o variables JOBS_BACKEND / REDIS_URL):
+    jobs:
+      backend: diskcache        # diskcache | celery | none
+      directory: /tmp/apg_bi_jobs
+      redis_url: redis://redis-cache:6379/1   # solo celery
+"""
+import os
+import tempfile
+from constants import config
+
+jobs_config = config.get('jobs', {}) or {}
+
+# Fases de carga de una fuente, en orden, con su etiqueta y porcentaje al iniciar
+LOAD_PHASES = {
+    'token': ("Obteniendo token de acceso", 5),
+    'listing': ("Listando archivos", 15),
+    'download': ("Descargando archivo", 30),
+    'parse': ("Procesando datos", 80),
+    'done': ("Datos listos", 100),
+}
+
+
+def describe_phase(phase: str):
+    """Retorna (etiqueta, porcentaje) para una fase de carga"""
+    return LOAD_PHASES.get(phase, (phase, 0))
+
+
+def create_background_manager():
+    """Crea el manager de callbacks en segundo plano, o None si no está disponible"""
+    backend = os.environ.get('JOBS_BACKEND', jobs_config.get('backend', 'diskcache')).lower()
+
+    try:
+        if backend == 'diskcache':
+            import diskcache
+            from dash import DiskcacheManager
+
+            directory = jobs_config.get('directory') or os.path.join(tempfile.gettempdir(), 'apg_bi_jobs')
+            return DiskcacheManager(diskcache.Cache(directory), expire=jobs_config.get('expire', 3600))
+
+        if backend == 'celery':
+            from celery import Celery
+            from dash import CeleryManager
+
+            redis_url = os.environ.get('REDIS_URL', jobs_config.get('redis_url', 'redis://localhost:6379/1'))
+            celery_app = Celery(__name__, broker=redis_url, backend=redis_url)
+            return CeleryManager(celery_app, expire=jobs_config.get('expire', 3600))
+    except ImportError as e:
+        print(f"⚠️ Callbacks en segundo plano deshabilitados, falta dependencia: {e}")
+        return None
+
+    return None
+
+
+background_manager = create_background_manager()
+
+# Con backend celery, el worker de trabajos se inicia con: celery -A core.jobs:celery_app worker
+celery_app = background_manager.handle if type(background_manager).__name__ == 'CeleryManager' else None
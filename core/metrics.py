@@ -0,0 +1,390 @@
+"""
+Métricas de tiempos por fase (carga de fuentes, filtros, gráficos, callbacks) en formato Prometheus
+
+Cada fase se mide con `span` y queda en histogramas con etiquetas:
+    apg_bi_phase_seconds{phase="download",source="mayor_analitico_packing"}
+    apg_bi_phase_rows{...}   filas procesadas en la fase
+    apg_bi_phase_bytes{...}  bytes descargados o serializados
+    apg_bi_callback_seconds{dashboard="...",role="chart",callback="..."}
+    apg_bi_callback_cpu_seconds / _rows / _input_bytes / _output_bytes{...}  perfil de cada callback
+    apg_bi_executor_queue_seconds / _run_seconds{pool="process",task="..."}  tareas de core.executor
+
+Los callbacks que superan el umbral se registran en el log (🐢). Configuración
+(sección 'metrics' de config.yaml):
+    metrics:
+      slow_callback_seconds: 2   # null para deshabilitar el log
+
+Las métricas son por proceso: con gunicorn cada worker expone las suyas en /metrics
+(Prometheus distingue los workers por instancia o se agregan con sum()). Los callbacks
+en segundo plano se miden en el proceso que los ejecuta; las fases de las tareas de
+core.executor vuelven con su resultado y se registran en el worker (collect_spans).
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from constants import config
+
+metrics_config = config.get('metrics', {}) or {}
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+ROWS_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BYTES_BUCKETS = (1_024, 10_240, 102_400, 1_048_576, 10_485_760, 104_857_600, 1_073_741_824)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for name, value in labels:
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{escaped}"')
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Histogram:
+    """Histograma con etiquetas (thread-safe), acumulativo como los de Prometheus"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict]:
+        with self._lock:
+            return {key: {**series, 'buckets': list(series['buckets'])} for key, series in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.snapshot().items()):
+            labels = list(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, series['buckets']):
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series['count']}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+
+class MetricsRegistry:
+    """Registro de histogramas del proceso"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+                  buckets: Tuple[float, ...] = SECONDS_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+            return self._metrics[name]
+
+    def get(self, name: str) -> Optional[Histogram]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+PHASE_SECONDS = registry.histogram(
+    'apg_bi_phase_seconds', 'Duración de cada fase de carga y render', ('phase', 'source'))
+PHASE_ROWS = registry.histogram(
+    'apg_bi_phase_rows', 'Filas procesadas por fase', ('phase', 'source'), ROWS_BUCKETS)
+PHASE_BYTES = registry.histogram(
+    'apg_bi_phase_bytes', 'Bytes descargados o serializados por fase', ('phase', 'source'), BYTES_BUCKETS)
+
+CALLBACK_LABELS = ('dashboard', 'role', 'callback')
+CALLBACK_SECONDS = registry.histogram(
+    'apg_bi_callback_seconds', 'Duración de los callbacks registrados por DashboardFactory', CALLBACK_LABELS)
+CALLBACK_CPU_SECONDS = registry.histogram(
+    'apg_bi_callback_cpu_seconds', 'Tiempo de CPU del hilo que ejecuta el callback', CALLBACK_LABELS)
+CALLBACK_ROWS = registry.histogram(
+    'apg_bi_callback_rows', 'Filas procesadas por el callback', CALLBACK_LABELS, ROWS_BUCKETS)
+CALLBACK_INPUT_BYTES = registry.histogram(
+    'apg_bi_callback_input_bytes', 'Tamaño de la petición del callback', CALLBACK_LABELS, BYTES_BUCKETS)
+CALLBACK_OUTPUT_BYTES = registry.histogram(
+    'apg_bi_callback_output_bytes', 'Tamaño de la respuesta del callback', CALLBACK_LABELS, BYTES_BUCKETS)
+
+EXECUTOR_LABELS = ('pool', 'task')
+EXECUTOR_QUEUE_SECONDS = registry.histogram(
+    'apg_bi_executor_queue_seconds', 'Espera de cada tarea antes de empezar a ejecutarse', EXECUTOR_LABELS)
+EXECUTOR_RUN_SECONDS = registry.histogram(
+    'apg_bi_executor_run_seconds', 'Duración de cada tarea en el pool (inline: en el hilo de la petición)', EXECUTOR_LABELS)
+
+
+class Span:
+    """Resultado de una fase en curso: permite registrar filas y bytes antes de cerrarla"""
+
+    def __init__(self, phase: str, source: str):
+        self.phase = phase
+        self.source = source
+        self.rows = None
+        self.bytes = None
+
+    def record(self, rows: Optional[int] = None, nbytes: Optional[int] = None):
+        if rows is not None:
+            self.rows = rows
+        if nbytes is not None:
+            self.bytes = nbytes
+
+
+@contextlib.contextmanager
+def span(phase: str, source: str = ''):
+    """
+    Mide la duración de una fase (también si falla).
+
+    Ejemplo:
+        with span('parse', source.name) as s:
+            df = pd.read_parquet(buffer)
+            s.record(rows=len(df))
+    """
+    current = Span(phase, source)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        record = (phase, source, time.perf_counter() - started, current.rows, current.bytes)
+        _observe_span(*record)
+        records = _span_records.get()
+        if records is not None:
+            records.append(record)
+
+
+_span_records = contextvars.ContextVar('apg_bi_span_records', default=None)
+
+
+def _observe_span(phase: str, source: str, seconds: float, rows: Optional[int], nbytes: Optional[int]):
+    PHASE_SECONDS.observe(seconds, phase=phase, source=source)
+    if rows is not None:
+        PHASE_ROWS.observe(rows, phase=phase, source=source)
+    if nbytes is not None:
+        PHASE_BYTES.observe(nbytes, phase=phase, source=source)
+
+
+@contextlib.contextmanager
+def collect_spans():
+    """
+    Junta las fases que se cierran dentro del bloque como tuplas (fase, fuente, segundos, filas, bytes).
+    Un proceso de cálculo (core.executor) las retorna con el resultado para registrarlas con observe_spans
+    en el proceso que expone /metrics.
+    """
+    records = []
+    token = _span_records.set(records)
+    try:
+        yield records
+    finally:
+        _span_records.reset(token)
+
+
+def observe_spans(records: Iterable[Tuple]):
+    """Registra en este proceso las fases medidas en otro (ver collect_spans)"""
+    for record in records:
+        _observe_span(*record)
+
+
+class CallbackProfile:
+    """Mediciones de una invocación de callback"""
+
+    def __init__(self, dashboard: str, role: str, callback: str):
+        self.dashboard = dashboard
+        self.role = role
+        self.callback = callback
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.rows = None
+        self.input_bytes = None
+        self.output_bytes = None
+
+    @property
+    def labels(self) -> Dict[str, str]:
+        return {'dashboard': self.dashboard, 'role': self.role, 'callback': self.callback}
+
+    def observe(self):
+        CALLBACK_SECONDS.observe(self.wall, **self.labels)
+        CALLBACK_CPU_SECONDS.observe(self.cpu, **self.labels)
+        if self.rows is not None:
+            CALLBACK_ROWS.observe(self.rows, **self.labels)
+        if self.input_bytes is not None:
+            CALLBACK_INPUT_BYTES.observe(self.input_bytes, **self.labels)
+        if self.output_bytes is not None:
+            CALLBACK_OUTPUT_BYTES.observe(self.output_bytes, **self.labels)
+
+        threshold = slow_callback_seconds()
+        if threshold is not None and self.wall >= threshold:
+            print(f"🐢 Callback lento [{self.dashboard}] {self.callback} ({self.role}): "
+                  f"{self.wall:.2f}s, CPU {self.cpu:.2f}s, filas {self.rows}, "
+                  f"entrada {self.input_bytes} B, salida {self.output_bytes} B")
+
+
+_current_profile = contextvars.ContextVar('apg_bi_callback_profile', default=None)
+
+
+def slow_callback_seconds() -> Optional[float]:
+    """Umbral del log de callbacks lentos (sección 'metrics' de config.yaml); None lo deshabilita"""
+    value = metrics_config.get('slow_callback_seconds', 2.0)
+    return float(value) if value is not None else None
+
+
+def record_rows(rows: int):
+    """Registra las filas procesadas por el callback en curso (se acumulan si se llama varias veces)"""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.rows = (profile.rows or 0) + rows
+
+
+def _finish(profile: CallbackProfile):
+    """
+    Dentro de una petición de Dash, los bytes de entrada y salida son los de la petición HTTP
+    del callback: se registra al terminar la respuesta (ver init_app). Fuera de ella (callbacks
+    en segundo plano) se registra de inmediato sin tamaños.
+    """
+    from flask import g, has_request_context, request
+
+    if has_request_context():
+        profile.input_bytes = request.content_length
+        g.apg_bi_callback_profile = profile
+    else:
+        profile.observe()
+
+
+def profiled_callback(dashboard_id: str, role: str, name: str) -> Callable:
+    """
+    Decorador que perfila cada invocación de un callback (síncrono o async):
+    tiempo total, tiempo de CPU, filas (record_rows) y bytes de entrada y salida.
+
+    Args:
+        dashboard_id: Dashboard al que pertenece el callback
+        role: 'load', 'options', 'chart', 'metrics' o 'export'
+        name: Identificador del callback dentro del dashboard
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                profile = CallbackProfile(dashboard_id, role, name)
+                token = _current_profile.set(profile)
+                started, cpu_started = time.perf_counter(), time.thread_time()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    profile.wall = time.perf_counter() - started
+                    profile.cpu = time.thread_time() - cpu_started
+                    _current_profile.reset(token)
+                    _finish(profile)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = CallbackProfile(dashboard_id, role, name)
+            token = _current_profile.set(profile)
+            started, cpu_started = time.perf_counter(), time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.wall = time.perf_counter() - started
+                profile.cpu = time.thread_time() - cpu_started
+                _current_profile.reset(token)
+                _finish(profile)
+        return wrapper
+    return decorator
+
+
+def init_app(server):
+    """Registra en Flask el cierre de los perfiles de callback con el tamaño de la respuesta"""
+    from flask import g
+
+    @server.after_request
+    def _record_callback_profile(response):
+        profile = g.pop('apg_bi_callback_profile', None)
+        if profile is not None:
+            profile.output_bytes = None if response.is_streamed else response.calculate_content_length()
+            profile.observe()
+        return response
+
+
+def _render_http_metrics() -> List[str]:
+    """Latencia de las peticiones salientes (helpers.http_client) como histograma por host"""
+    from helpers.http_client import LATENCY_BUCKETS, http_metrics
+
+    name = 'apg_bi_http_request_seconds'
+    lines = [f"# HELP {name} Latencia de peticiones HTTP salientes por host", f"# TYPE {name} histogram"]
+    retries = ['# HELP apg_bi_http_retries_total Reintentos HTTP por host', '# TYPE apg_bi_http_retries_total counter']
+    for host, stats in sorted(http_metrics().items()):
+        for bound in LATENCY_BUCKETS:
+            lines.append(f"{name}_bucket{_format_labels([('host', host), ('le', _format_value(bound))])} "
+                         f"{stats['latency_buckets'][str(bound)]}")
+        lines.append(f"{name}_bucket{_format_labels([('host', host), ('le', '+Inf')])} {stats['requests']}")
+        lines.append(f"{name}_sum{_format_labels([('host', host)])} {_format_value(stats['latency_sum'])}")
+        lines.append(f"{name}_count{_format_labels([('host', host)])} {stats['requests']}")
+        retries.append(f"apg_bi_http_retries_total{_format_labels([('host', host)])} {stats['retries']}")
+    return lines + retries
+
+
+def _render_cache_metrics() -> List[str]:
+    """Memoria de la caché con presupuesto (core.cache_budget) y de las fuentes cargadas en el proceso"""
+    from core.data_manager import data_manager
+
+    memory = data_manager.memory_stats()
+    lines = ['# HELP apg_bi_source_bytes Memoria de la copia local de cada fuente', '# TYPE apg_bi_source_bytes gauge']
+    for source, frame in sorted(memory['frames'].items()):
+        lines.append(f"apg_bi_source_bytes{_format_labels([('source', source)])} {frame['bytes']}")
+    cache = memory['cache']
+    if not cache:
+        return lines
+
+    lines += ['# HELP apg_bi_cache_budget_bytes Presupuesto de memoria de la caché', '# TYPE apg_bi_cache_budget_bytes gauge',
+              f"apg_bi_cache_budget_bytes {cache['max_bytes']}",
+              '# HELP apg_bi_cache_bytes Memoria usada por tipo de entrada', '# TYPE apg_bi_cache_bytes gauge']
+    lines += [f"apg_bi_cache_bytes{_format_labels([('kind', kind)])} {stats['bytes']}" for kind, stats in sorted(cache['kinds'].items())]
+    lines += ['# HELP apg_bi_cache_partition_bytes Memoria usada por partición (empresa)',
+              '# TYPE apg_bi_cache_partition_bytes gauge']
+    lines += [f"apg_bi_cache_partition_bytes{_format_labels([('partition', name)])} {stats['bytes']}"
+              for name, stats in sorted(cache['partitions'].items())]
+    lines += ['# HELP apg_bi_cache_evictions_total Entradas desalojadas por partición',
+              '# TYPE apg_bi_cache_evictions_total counter']
+    lines += [f"apg_bi_cache_evictions_total{_format_labels([('partition', name)])} {stats['evictions']}"
+              for name, stats in sorted(cache['partitions'].items())]
+    for name in ('hits', 'misses'):
+        lines += [f"# HELP apg_bi_cache_{name}_total Consultas a la caché ({name})",
+                  f"# TYPE apg_bi_cache_{name}_total counter", f"apg_bi_cache_{name}_total {cache[name]}"]
+    return lines
+
+
+def render_metrics() -> str:
+    """Texto de exposición Prometheus (text/plain; version=0.0.4) del proceso actual"""
+    return registry.render() + '\n'.join(_render_http_metrics() + _render_cache_metrics()) + '\n'
@@ -0,0 +1,177 @@
+"""
+Pipeline declarativo de procesamiento para las fuentes de DataManager
+
+Cada fuente declara sus pasos en config.yaml y se compilan en un plan: los pasos consecutivos
+del mismo tipo se fusionan en una sola operación vectorizada y las columnas se reemplazan
+en el mismo DataFrame, sin copias intermedias del DataFrame completo.
+
+Ejemplo (sección 'data_sources' de config.yaml):
+    data_sources:
+      - name: recepcion_fruta
+        file_name: RECEPCION FRUTA.parquet
+        cache_key: recepcion-data-store
+        columns: [FECHA, KG EXPORTABLES, JABAS, HORA RECEPCION]   # opcional: valida los dashboards
+        steps:
+          - clean: {KG EXPORTABLES: limpiar_kg_exportables, HORA RECEPCION: corregir_hora_tarde}
+          - cast: {FECHA: datetime, KG EXPORTABLES: float64}
+          - date_parts: {column: FECHA, parts: {YEAR: year, MES: month, SEMANA: week}}
+          - measures: {KG_POR_JABA: "`KG EXPORTABLES` / JABAS"}
+          - rename: {KG EXPORTABLES: KG}
+
+Tipos de paso:
+    clean       {columna: función de limpieza por columna}
+    cast        {columna: dtype de pandas | datetime | numeric}
+    date_parts  {column, parts: {nueva_columna: parte}, optional}; partes: year, month, day, quarter,
+                weekday, week, week_of_month, business_day, month_name, date. Se toman de la dimensión
+                de fechas (helpers.date_dimension): se calculan una vez por día, no por fila
+    measures    {nueva_columna: expresión de DataFrame.eval}
+    rename      {columna: nuevo_nombre}
+"""
+import time
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from helpers.date_dimension import DATE_PARTS, date_parts
+from helpers.helpers import (
+    limpiar_kg_exportables_serie,
+    corregir_hora_tarde_serie,
+)
+from .cache_backends import make_cache_key
+
+# Funciones de limpieza disponibles para el paso 'clean' (Serie -> Serie)
+CLEAN_FUNCTIONS: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    'limpiar_kg_exportables': limpiar_kg_exportables_serie,
+    'corregir_hora_tarde': corregir_hora_tarde_serie,
+    'strip': lambda serie: serie.str.strip(),
+    'upper': lambda serie: serie.str.upper(),
+}
+
+STEP_TYPES = ('clean', 'cast', 'date_parts', 'measures', 'rename')
+
+# Pasos equivalentes al procesador por defecto histórico de DataSource
+DEFAULT_STEPS = [
+    {'date_parts': {'column': 'FECHA', 'parts': {'YEAR': 'year', 'MES': 'month', 'SEMANA': 'week'}, 'optional': True}},
+]
+
+
+def _cast_column(serie: pd.Series, dtype: str) -> pd.Series:
+    if dtype == 'datetime':
+        return pd.to_datetime(serie, errors='coerce')
+    if dtype == 'numeric':
+        return pd.to_numeric(serie, errors='coerce')
+    return serie.astype(dtype)
+
+
+class Stage:
+    """Operación compilada del plan (uno o varios pasos consecutivos del mismo tipo)"""
+
+    def __init__(self, kind: str, spec: Any):
+        self.kind = kind
+        self.spec = spec
+
+    @property
+    def name(self) -> str:
+        if self.kind == 'date_parts':
+            return f"date_parts({', '.join(part['column'] for part in self.spec)})"
+        return f"{self.kind}({', '.join(map(str, self.spec))})"
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.kind == 'clean':
+            for column, function in self.spec.items():
+                df[column] = function(df[column])
+        elif self.kind == 'cast':
+            for column, dtype in self.spec.items():
+                df[column] = _cast_column(df[column], dtype)
+        elif self.kind == 'date_parts':
+            for part in self.spec:
+                if part['column'] not in df.columns:
+                    if part.get('optional'):
+                        continue
+                    raise KeyError(part['column'])
+                for new_column, values in date_parts(df[part['column']], part['parts']).items():
+                    df[new_column] = values
+        elif self.kind == 'measures':
+            # Una sola evaluación para todas las medidas consecutivas
+            df.eval('\n'.join(f"`{name}` = {expression}" for name, expression in self.spec.items()), inplace=True)
+        elif self.kind == 'rename':
+            df.columns = [self.spec.get(column, column) for column in df.columns]
+        return df
+
+
+class ProcessingPlan:
+    """
+    Plan compilado de una fuente. Se usa como procesador de DataSource: plan(df) -> df.
+    Registra el tiempo de cada etapa de la última ejecución en `timings`.
+    """
+
+    def __init__(self, steps: List[Dict], stages: List[Stage]):
+        self.steps = steps
+        self.stages = stages
+        self.fingerprint = make_cache_key('pipeline', steps)
+        self.timings: List[Tuple[str, float]] = []
+
+    def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+        self.timings = []
+        for stage in self.stages:
+            started = time.perf_counter()
+            df = stage.run(df)
+            self.timings.append((stage.name, time.perf_counter() - started))
+        return df
+
+    def output_columns(self, columns: List[str]) -> List[str]:
+        """Columnas que produce el plan a partir de las columnas de entrada (sin ejecutarlo)"""
+        columns = list(columns)
+        for stage in self.stages:
+            if stage.kind == 'date_parts':
+                for part in stage.spec:
+                    if part['column'] in columns or not part.get('optional'):
+                        columns.extend(name for name in part['parts'] if name not in columns)
+            elif stage.kind == 'measures':
+                columns.extend(name for name in stage.spec if name not in columns)
+            elif stage.kind == 'rename':
+                columns = [stage.spec.get(column, column) for column in columns]
+        return columns
+
+    def describe_timings(self) -> str:
+        return ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.timings)
+
+
+def _normalize_step(step: Dict) -> Tuple[str, Any]:
+    if not isinstance(step, dict) or len(step) != 1:
+        raise ValueError(f"Paso de pipeline inválido: {step!r} (se espera {{tipo: especificación}})")
+    kind, spec = next(iter(step.items()))
+    if kind not in STEP_TYPES:
+        raise ValueError(f"Tipo de paso '{kind}' no soportado. Tipos válidos: {', '.join(STEP_TYPES)}")
+
+    if kind == 'clean':
+        unknown = [name for name in spec.values() if name not in CLEAN_FUNCTIONS]
+        if unknown:
+            raise ValueError(f"Funciones de limpieza desconocidas: {', '.join(unknown)}")
+        return kind, {column: CLEAN_FUNCTIONS[name] for column, name in spec.items()}
+    if kind == 'date_parts':
+        unknown = [part for part in spec['parts'].values() if part not in DATE_PARTS]
+        if unknown:
+            raise ValueError(f"Partes de fecha desconocidas: {', '.join(unknown)}")
+        return kind, [spec]
+    return kind, dict(spec)
+
+
+def compile_pipeline(steps: Optional[List[Dict]]) -> ProcessingPlan:
+    """
+    Valida los pasos declarados y los compila en un plan.
+    Los pasos consecutivos del mismo tipo se fusionan en una sola etapa.
+    """
+    steps = list(steps or [])
+    stages: List[Stage] = []
+    for step in steps:
+        kind, spec = _normalize_step(step)
+        previous = stages[-1] if stages else None
+        if previous and previous.kind == kind and kind != 'rename':
+            if kind == 'date_parts':
+                previous.spec.extend(spec)
+            elif not set(spec) & set(previous.spec):
+                previous.spec.update(spec)
+            else:
+                stages.append(Stage(kind, spec))  # misma columna dos veces: se respeta el orden
+        else:
+            stages.append(Stage(kind, spec))
+    return ProcessingPlan(steps, stages)
@@ -0,0 +1,96 @@
+"""
+Rollups por día, semana y mes de las agregaciones por fecha
+
+Los gráficos con x = FECHA y groupby = [FECHA] se sirven desde rollups precalculados por
+versión de fuente (ver DataManager.get_rollup) en lugar de agrupar el DataFrame completo:
+    - el rollup conserva las columnas de filtro (YEAR, MES, SEMANA), así los filtros se aplican
+      sobre el rollup; semanas y meses se parten por esas columnas y se vuelven a agrupar
+      después de filtrar
+    - cada agregación se guarda en componentes re-agregables (sum, count, min, max; mean = sum/count)
+
+Cuando la fuente solo crece por anexado, el rollup de la versión nueva se obtiene combinando
+el anterior con el de las filas nuevas (merge_rollups), sin recorrer el DataFrame completo.
+
+La granularidad de cada gráfico la elige ChartComponent.select_granularity según el rango
+de fechas filtrado y su presupuesto de puntos.
+"""
+from typing import Dict, List, Optional
+import pandas as pd
+
+GRAINS = ('day', 'week', 'month')
+TIME_COLUMNS = ('FECHA',)
+# Cómo se vuelve a agregar cada componente al pasar del rollup al cubo
+REAGGREGATE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def time_series_column(chart_config: Dict, aggregation: Dict) -> Optional[str]:
+    """Columna de fecha si el gráfico agrega solo por ella y la usa como eje x (None si no)"""
+    x = chart_config.get('x')
+    if chart_config.get('granularity') == 'none' or x not in TIME_COLUMNS:
+        return None
+    return x if (aggregation or {}).get('groupby') == [x] else None
+
+
+def rollup_components(agg: Dict) -> Optional[Dict[str, tuple]]:
+    """
+    Componentes re-agregables de una especificación {columna: función}.
+    None si alguna función no se puede re-agregar (p. ej. median, nunique o listas de funciones).
+    """
+    components = {}
+    for column, func in agg.items():
+        if not isinstance(func, str):
+            return None
+        if func == 'mean':
+            parts = ('sum', 'count')
+        elif func in REAGGREGATE:
+            parts = (func,)
+        else:
+            return None
+        for part in parts:
+            components[f"{column}|{part}"] = (column, part)
+    return components
+
+
+def period_start(dates: pd.Series, grain: str) -> pd.Series:
+    """Inicio del día, de la semana ISO (lunes) o del mes de cada fecha"""
+    days = dates.dt.normalize()
+    if grain == 'week':
+        return days - pd.to_timedelta(days.dt.weekday, unit='D')
+    if grain == 'month':
+        return days - pd.to_timedelta(days.dt.day - 1, unit='D')
+    return days
+
+
+def build_rollup(df: pd.DataFrame, time_column: str, agg: Dict, grain: str,
+                 filter_columns: List[str]) -> pd.DataFrame:
+    """Rollup de `agg` por período de `grain` y columnas de filtro presentes en el DataFrame"""
+    components = rollup_components(agg)
+    keys = [column for column in filter_columns if column in df.columns]
+    grouped = df.groupby([period_start(df[time_column], grain).rename(time_column), *[df[k] for k in keys]],
+                         observed=True, sort=False)
+    return grouped.agg(**{name: spec for name, spec in components.items()}).reset_index()
+
+
+def merge_rollups(rollup: pd.DataFrame, delta: pd.DataFrame, time_column: str, agg: Dict) -> pd.DataFrame:
+    """Rollup de la unión de dos conjuntos de filas a partir del rollup de cada uno"""
+    components = rollup_components(agg)
+    keys = [column for column in rollup.columns if column not in components]
+    combined = pd.concat([rollup, delta.astype(rollup.dtypes.to_dict())], ignore_index=True)
+    return combined.groupby(keys, observed=True, sort=False).agg(
+        {name: REAGGREGATE[part] for name, (_, part) in components.items()}
+    ).reset_index()
+
+
+def rollup_cube(rollup: pd.DataFrame, time_column: str, agg: Dict) -> pd.DataFrame:
+    """Cubo final: vuelve a agrupar por período (tras filtrar) y arma las columnas originales"""
+    components = rollup_components(agg)
+    totals = rollup.groupby(time_column, sort=True)[list(components)].agg(
+        {name: REAGGREGATE[part] for name, (_, part) in components.items()}
+    )
+    cube = pd.DataFrame(index=totals.index)
+    for column, func in agg.items():
+        if func == 'mean':
+            cube[column] = totals[f"{column}|sum"] / totals[f"{column}|count"]
+        else:
+            cube[column] = totals[f"{column}|{func}"]
+    return cube.reset_index()
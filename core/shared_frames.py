@@ -0,0 +1,219 @@
+"""
+Almacenes de DataFrames procesados (fuentes completas) para DataManager
+
+- CacheFrameStore: guarda las fuentes en el backend de caché (memoria, disco o Redis)
+- SharedFrameStore: escribe cada fuente una sola vez como archivo Arrow IPC en un
+  directorio compartido (idealmente /dev/shm) y cada worker lo mapea en memoria
+  de solo lectura, obteniendo un DataFrame respaldado por Arrow sin copias.
+
+Ambos exponen la misma interfaz: get_version, get_frame, publish, expire, try_lock, unlock.
+"""
+import glob
+import os
+import tempfile
+import time
+import pandas as pd
+import pyarrow as pa
+from typing import Dict, Optional, Tuple
+from .cache_backends import CacheBackend
+
+
+class CacheFrameStore:
+    """Fuentes guardadas en el backend de caché, con clave versionada"""
+
+    def __init__(self, cache: CacheBackend, ttl: Optional[int] = None):
+        self.cache = cache
+        self.ttl = ttl
+
+    def get_version(self, name: str) -> Optional[str]:
+        version = self.cache.get(f"version:{name}")
+        return version.decode('utf-8') if version is not None else None
+
+    def get_frame(self, name: str, version: str) -> Optional[pd.DataFrame]:
+        return self.cache.get_frame(f"frame:{name}:{version}")
+
+    def publish(self, name: str, version: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Guarda el DataFrame y luego su versión, para que ningún lector vea una versión sin datos"""
+        self.cache.set_frame(f"frame:{name}:{version}", df, ttl=self.ttl * 2 if self.ttl else None)
+        self.cache.set(f"version:{name}", version.encode('utf-8'), ttl=self.ttl or None)
+        return df
+
+    def expire(self, name: str):
+        self.cache.delete(f"version:{name}")
+
+    def try_lock(self, name: str, ttl: int) -> bool:
+        return self.cache.add(f"lock:{name}", b"1", ttl=ttl)
+
+    def is_locked(self, name: str) -> bool:
+        return self.cache.get(f"lock:{name}") is not None
+
+    def unlock(self, name: str):
+        self.cache.delete(f"lock:{name}")
+
+    # Sin mapeos en memoria: no hay leases que administrar
+    def lease(self, name: str, version: str):
+        pass
+
+    def release(self, name: str, version: str):
+        pass
+
+    def release_all(self):
+        pass
+
+    def adopt(self, frames: Dict[str, Tuple[str, pd.DataFrame]]):
+        pass
+
+
+class SharedFrameStore:
+    """
+    Fuentes publicadas como archivos Arrow IPC mapeados en memoria.
+
+    Estructura del directorio:
+        <name>.<version>.arrow          generación de datos (inmutable)
+        <name>.current                  puntero a la generación vigente (se reemplaza atómicamente)
+        <name>.<version>.lease.<pid>    el proceso <pid> tiene mapeada esa generación
+        <name>.lock                     descarga en curso
+
+    Una generación que ya no es la vigente se borra cuando ningún proceso vivo tiene lease sobre ella.
+    """
+
+    def __init__(self, directory: str, ttl: Optional[int] = None):
+        self.directory = directory
+        self.ttl = ttl
+        self._leases = {}  # {(name, version): path} leases de este proceso
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.directory, '.'.join(parts))
+
+    def _write_atomic(self, path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read_pointer(self, name: str) -> Tuple[Optional[str], float]:
+        path = self._path(name, 'current')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+            return version or None, os.path.getmtime(path)
+        except FileNotFoundError:
+            return None, 0.0
+
+    def get_version(self, name: str) -> Optional[str]:
+        """Generación vigente, o None si no existe o superó el TTL"""
+        version, modified = self._read_pointer(name)
+        if self.ttl and modified + self.ttl < time.time():
+            return None
+        return version
+
+    def get_frame(self, name: str, version: str) -> Optional[pd.DataFrame]:
+        """Mapea la generación en memoria (solo lectura) y la retorna como DataFrame Arrow"""
+        path = self._path(name, version, 'arrow')
+        try:
+            source = pa.memory_map(path, 'r')
+        except (FileNotFoundError, OSError):
+            return None
+        table = pa.ipc.open_file(source).read_all()
+        self.lease(name, version)
+        # ArrowDtype mantiene los buffers del mmap sin copiarlos a NumPy
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    def publish(self, name: str, version: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Escribe la generación (si no existe), mueve el puntero y retorna la versión mapeada"""
+        path = self._path(name, version, 'arrow')
+        if not os.path.exists(path):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as f:
+                with pa.ipc.new_file(f, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        self._write_atomic(self._path(name, 'current'), version.encode('utf-8'))
+        self.gc(name)
+        return self.get_frame(name, version)
+
+    def expire(self, name: str):
+        _remove(self._path(name, 'current'))
+
+    def try_lock(self, name: str, ttl: int) -> bool:
+        path = self._path(name, 'lock')
+        try:
+            if os.path.getmtime(path) + ttl < time.time():
+                _remove(path)  # lock abandonado por un proceso caído
+        except FileNotFoundError:
+            pass
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        return True
+
+    def is_locked(self, name: str) -> bool:
+        return os.path.exists(self._path(name, 'lock'))
+
+    def unlock(self, name: str):
+        _remove(self._path(name, 'lock'))
+
+    def lease(self, name: str, version: str):
+        """Registra que este proceso tiene mapeada la generación"""
+        if (name, version) in self._leases:
+            return
+        path = self._path(name, version, 'lease', str(os.getpid()))
+        open(path, 'a').close()
+        self._leases[(name, version)] = path
+
+    def release(self, name: str, version: str):
+        path = self._leases.pop((name, version), None)
+        if path:
+            _remove(path)
+
+    def release_all(self):
+        for name, version in list(self._leases):
+            self.release(name, version)
+
+    def adopt(self, frames: Dict[str, Tuple[str, pd.DataFrame]]):
+        """
+        Tras un fork, el proceso hijo hereda los mapeos del padre pero no sus leases:
+        los registra con su propio pid
+        """
+        self._leases = {}
+        for name, (version, _) in frames.items():
+            if os.path.exists(self._path(name, version, 'arrow')):
+                self.lease(name, version)
+
+    def gc(self, name: str):
+        """Borra generaciones antiguas sin leases de procesos vivos"""
+        current, _ = self._read_pointer(name)
+        for path in glob.glob(self._path(name, '*', 'arrow')):
+            version = os.path.basename(path)[len(name) + 1:-len('.arrow')]
+            if version == current:
+                continue
+            live = False
+            for lease_path in glob.glob(self._path(name, version, 'lease', '*')):
+                if _pid_alive(int(lease_path.rsplit('.', 1)[-1])):
+                    live = True
+                else:
+                    _remove(lease_path)
+            if not live:
+                _remove(path)
+                print(f"🧹 Generación antigua eliminada: {os.path.basename(path)}")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,217 @@
+"""
+Motor DuckDB para los filtros y agregaciones de los dashboards
+
+Con `engine: duckdb` en una fuente, DataManager ejecuta sus cubos (get_cube), filtros
+(apply_filters) y rangos de fechas como SQL en un DuckDB embebido en lugar de pandas:
+    - cada versión procesada de la fuente se escribe una vez como parquet espejo en
+      `mirror_dir` (row groups de ROW_GROUP_SIZE filas, con estadísticas para el pushdown)
+    - el espejo de una versión reemplazada se conserva source_ttl segundos: otros workers pueden
+      seguir consultando la versión que tienen cargada hasta que venza. Se borra en una escritura
+      posterior
+    - los filtros de año/mes/semana van como WHERE y se empujan a la lectura del parquet
+    - la agregación usa todos los núcleos (threads) y puede pasar a disco sobre `memory_limit`
+Las agregaciones que no tienen equivalente SQL exacto (listas de funciones, funciones propias)
+se calculan con pandas como siempre. Los resultados se validan contra la ruta pandas en
+test_sql_engine.py y benchmarks/bench_engines.py.
+
+Configuración (config.yaml):
+    data_sources:
+      - name: mayor_analitico_packing
+        file_name: MAYOR ANALITICO PACKING.parquet
+        engine: duckdb            # pandas (por defecto) | duckdb
+    cache:
+      mirror_dir: /tmp/apg_bi_mirror
+      duckdb_threads: 4           # por defecto: todos los núcleos
+      duckdb_memory_limit: 1GB    # sobre este límite la agregación usa mirror_dir/.spill
+
+duckdb es una dependencia opcional: solo se importa si alguna fuente usa este motor.
+"""
+import glob
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ENGINES = ('pandas', 'duckdb')
+ROW_GROUP_SIZE = 128 * 1024
+# Función de agregación de pandas -> SQL con el mismo resultado (nulos ignorados, grupos sin nulos)
+SQL_AGGREGATES = {
+    'sum': 'COALESCE(SUM({column}), 0)',
+    'count': 'COUNT({column})',
+    'size': 'COUNT(*)',
+    'mean': 'AVG({column})',
+    'min': 'MIN({column})',
+    'max': 'MAX({column})',
+    'median': 'MEDIAN({column})',
+    'nunique': 'COUNT(DISTINCT {column})',
+    'std': 'STDDEV_SAMP({column})',
+    'var': 'VAR_SAMP({column})',
+}
+PERIODS = {'day': 'day', 'week': 'week', 'month': 'month'}  # date_trunc: la semana empieza el lunes (ISO)
+
+
+def quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def where_clause(conditions: Dict[str, List], extra: Optional[List[str]] = None) -> Tuple[str, List]:
+    """WHERE parametrizado de {columna: valores} (más condiciones fijas opcionales)"""
+    clauses, params = list(extra or []), []
+    for column, values in conditions.items():
+        clauses.append(f"{quote(column)} IN ({', '.join('?' for _ in values)})")
+        params.extend(values)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def cube_sql(table: str, conditions: Dict[str, List], aggregation: Dict,
+             granularity: Optional[str] = None) -> Optional[Tuple[str, List]]:
+    """SQL (con parámetros) de una agregación de DashboardConfig, o None si no tiene traducción exacta"""
+    groupby, agg = aggregation.get('groupby') or [], aggregation.get('agg') or {}
+    if not groupby or not agg or any(not isinstance(func, str) or func not in SQL_AGGREGATES for func in agg.values()):
+        return None
+    keys = []
+    for i, column in enumerate(groupby):
+        if i == 0 and granularity:
+            keys.append(f"date_trunc('{PERIODS[granularity]}', {quote(column)}) AS {quote(column)}")
+        else:
+            keys.append(quote(column))
+    measures = [f"{SQL_AGGREGATES[func].format(column=quote(column))} AS {quote(column)}" for column, func in agg.items()]
+    # groupby de pandas descarta las claves nulas y ordena por las claves
+    where, params = where_clause(conditions, [f"{quote(column)} IS NOT NULL" for column in groupby])
+    positions = ', '.join(str(i + 1) for i in range(len(groupby)))
+    return f"SELECT {', '.join(keys + measures)} FROM {table}{where} GROUP BY {positions} ORDER BY {positions}", params
+
+
+def match_dtypes(result: pd.DataFrame, dtypes: pd.Series, agg: Dict) -> pd.DataFrame:
+    """Tipos de pandas en el resultado de DuckDB (UInt32, ns, enteros en sum/min/max)"""
+    for column in result.columns:
+        source = dtypes.get(column)
+        if source is None:
+            continue
+        func = agg.get(column)
+        if func is None or func in ('min', 'max'):
+            target = source
+        elif func == 'sum' and pd.api.types.is_integer_dtype(source) and not result[column].isna().any():
+            target = 'int64'
+        else:
+            continue
+        if result[column].dtype != target:
+            try:
+                result[column] = result[column].astype(target)
+            except (TypeError, ValueError):
+                pass
+    return result
+
+
+class SqlEngine:
+    """DuckDB embebido sobre los parquet espejo de las fuentes (una conexión por proceso, un cursor por hilo)"""
+
+    def __init__(self, directory: str, threads: Optional[int] = None, memory_limit: Optional[str] = None,
+                 ttl: Optional[int] = None):
+        self.directory = directory
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self.ttl = ttl  # segundos que se conserva el espejo de una versión reemplazada
+        os.makedirs(directory, exist_ok=True)
+        self._pid = None
+        self._db = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cache_config: Dict) -> 'SqlEngine':
+        directory = os.environ.get('MIRROR_DIR', cache_config.get('mirror_dir')) or \
+            os.path.join(tempfile.gettempdir(), 'apg_bi_mirror')
+        return cls(directory, cache_config.get('duckdb_threads'), cache_config.get('duckdb_memory_limit'),
+                   cache_config.get('source_ttl', 900))
+
+    def _cursor(self):
+        """Cursor del hilo actual. Tras un fork se abre otra base (las conexiones no se heredan)"""
+        import duckdb  # Dependencia opcional, solo necesaria con engine: duckdb
+
+        with self._lock:
+            if self._db is None or self._pid != os.getpid():
+                self._db = duckdb.connect(':memory:')
+                if self.threads:
+                    self._db.execute(f"SET threads = {int(self.threads)}")
+                if self.memory_limit:
+                    self._db.execute(f"SET memory_limit = '{self.memory_limit}'")
+                self._db.execute(f"SET temp_directory = '{os.path.join(self.directory, '.spill')}'")
+                self._pid = os.getpid()
+                self._local = threading.local()
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            cursor = self._local.cursor = self._db.cursor()
+        return cursor
+
+    def mirror_path(self, source_name: str, version: str) -> str:
+        return os.path.join(self.directory, source_name, f"{version}.parquet")
+
+    def mirror(self, source_name: str, version: str, df: pd.DataFrame) -> str:
+        """Escribe (una vez) el parquet espejo de la versión y borra los de versiones reemplazadas hace más de ttl"""
+        path = self.mirror_path(source_name, version)
+        if os.path.exists(path):
+            return path
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), f, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, path)
+        self._gc(directory, path)
+        return path
+
+    def _gc(self, directory: str, current: str):
+        """
+        Marca como reemplazados los espejos de otras versiones (<versión>.superseded) y borra los
+        que llevan más de ttl reemplazados: un worker puede haber resuelto la ruta antes de consultar
+        """
+        for old in glob.glob(os.path.join(directory, '*.parquet')):
+            if old == current:
+                continue
+            marker = old[:-len('.parquet')] + '.superseded'
+            try:
+                superseded_at = os.path.getmtime(marker)
+            except FileNotFoundError:
+                open(marker, 'a').close()
+                continue
+            if superseded_at + (self.ttl or 0) < time.time():
+                for stale in (old, marker):
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+
+    def _query(self, sql: str, params: List) -> pd.DataFrame:
+        return self._cursor().execute(sql, params).df()
+
+    @staticmethod
+    def _table(path: str) -> str:
+        return "read_parquet('" + path.replace("'", "''") + "')"
+
+    def cube(self, path: str, conditions: Dict[str, List], aggregation: Dict, dtypes: pd.Series,
+             granularity: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Cubo filtrado y agregado como lo calcula get_cube con pandas (None si no hay traducción)"""
+        compiled = cube_sql(self._table(path), conditions, aggregation, granularity)
+        if compiled is None:
+            return None
+        result = self._query(*compiled)
+        return match_dtypes(result, dtypes, aggregation['agg'])
+
+    def rows(self, path: str, conditions: Dict[str, List], dtypes: pd.Series) -> pd.DataFrame:
+        """Filas filtradas (equivale a apply_filters)"""
+        where, params = where_clause(conditions)
+        return match_dtypes(self._query(f"SELECT * FROM {self._table(path)}{where}", params), dtypes, {})
+
+    def date_span(self, path: str, conditions: Dict[str, List], time_column: str) -> int:
+        """Días entre la primera y la última fecha filtradas (0 sin datos)"""
+        where, params = where_clause(conditions)
+        column = quote(time_column)
+        days = self._cursor().execute(
+            f"SELECT floor((epoch(MAX({column})) - epoch(MIN({column}))) / 86400) FROM {self._table(path)}{where}", params
+        ).fetchone()[0]
+        return 0 if days is None else int(days) + 1
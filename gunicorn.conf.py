@@ -0,0 +1,66 @@
+"""
+Configuración de gunicorn para producción
+Todos los valores se pueden sobreescribir con variables de entorno o en la sección
+'server' de config.yaml
+"""
+import multiprocessing
+import os
+from constants import config as app_config, PORT
+
+server_config = app_config.get('server', {}) or {}
+
+
+def _setting(env_name: str, key: str, default):
+    """Variable de entorno > config.yaml > valor por defecto"""
+    value = os.environ.get(env_name) or server_config.get(key, default)
+    if isinstance(default, bool):
+        return str(value).lower() in ('1', 'true', 'yes')
+    return type(default)(value)
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', PORT)}"
+workers = _setting('WEB_CONCURRENCY', 'workers', min(multiprocessing.cpu_count() * 2 + 1, 8))
+threads = _setting('GUNICORN_THREADS', 'threads', 4)
+worker_class = 'gthread'
+timeout = _setting('GUNICORN_TIMEOUT', 'timeout', 180)
+graceful_timeout = 30
+keepalive = 5
+max_requests = _setting('GUNICORN_MAX_REQUESTS', 'max_requests', 0)
+max_requests_jitter = max_requests // 10
+
+# Importar la app (páginas, DashboardFactory y DataManager) en el maestro antes del fork
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+warmup = _setting('WARMUP', 'warmup', True)
+
+
+def on_starting(server):
+    """Se ejecuta en el maestro, después de preload_app y antes de crear los workers"""
+    import wsgi
+    from core.data_manager import data_manager
+    from core.dashboard_factory import dashboard_factory
+
+    wsgi.prime_app()
+    if warmup:
+        # Sin lista configurada se precargan las fuentes que usa algún dashboard
+        data_manager.warm_up(server_config.get('warmup_sources') or dashboard_factory.plan.file_sources())
+        # El maestro no atiende peticiones: los workers toman los leases de las fuentes tras el fork
+        data_manager.frame_store.release_all()
+
+
+def post_fork(server, worker):
+    from core.data_manager import data_manager
+
+    data_manager.after_fork()
+    server.log.info(f"Worker {worker.pid} listo ({threads} hilos)")
+
+
+def worker_exit(server, worker):
+    """Cierra el pool de cálculo del worker (core.executor) junto con él"""
+    from core.executor import executor
+
+    executor.shutdown()
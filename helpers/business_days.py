@@ -0,0 +1,199 @@
+"""
+Calendario de días laborables y motor vectorizado de distribución de planilla
+
+La planilla mensual de cada proyecto se reparte en partes iguales entre los días laborables
+del mes (lunes a viernes, menos feriados). Los días laborables salen de la dimensión de fechas
+(helpers.date_dimension), el calendario de cada mes se calcula una sola vez y la distribución
+de cada mes se memoriza por contenido, así los meses históricos no se recalculan.
+
+Configuración (sección 'planilla' de config.yaml):
+    planilla:
+      holidays: peru              # peru | none
+      extra_holidays: ['2025-06-06']
+"""
+from collections import OrderedDict
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Optional, Tuple
+import pandas as pd
+
+# Feriados nacionales de fecha fija en Perú: (mes, día, primer año vigente)
+PERU_FIXED_HOLIDAYS = [
+    (1, 1, None),     # Año Nuevo
+    (5, 1, None),     # Día del Trabajo
+    (6, 7, 2022),     # Batalla de Arica y Día de la Bandera
+    (6, 29, None),    # San Pedro y San Pablo
+    (7, 23, 2024),    # Día de la Fuerza Aérea
+    (7, 28, None),    # Fiestas Patrias
+    (7, 29, None),    # Fiestas Patrias
+    (8, 6, 2024),     # Batalla de Junín
+    (8, 30, None),    # Santa Rosa de Lima
+    (10, 8, None),    # Combate de Angamos
+    (11, 1, None),    # Todos los Santos
+    (12, 8, None),    # Inmaculada Concepción
+    (12, 9, 2022),    # Batalla de Ayacucho
+    (12, 25, None),   # Navidad
+]
+
+MONTH_CACHE_SIZE = 512
+
+
+def easter_sunday(year: int) -> date:
+    """Domingo de Pascua (algoritmo de Meeus/Jones/Butcher)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=64)
+def peru_holidays(year: int) -> FrozenSet[date]:
+    """Feriados nacionales de Perú para un año (incluye Jueves y Viernes Santo)"""
+    holidays = {date(year, month, day) for month, day, since in PERU_FIXED_HOLIDAYS if since is None or year >= since}
+    easter = easter_sunday(year)
+    holidays.update({easter - timedelta(days=3), easter - timedelta(days=2)})
+    return frozenset(holidays)
+
+
+def load_holiday_config() -> Tuple[str, FrozenSet[date]]:
+    """Lee la sección 'planilla' de config.yaml: (calendario, feriados adicionales)"""
+    try:
+        from constants import config
+        planilla_config = config.get('planilla', {}) or {}
+    except (ImportError, FileNotFoundError):
+        planilla_config = {}
+    extra = frozenset(pd.to_datetime(planilla_config.get('extra_holidays', [])).date)
+    return str(planilla_config.get('holidays', 'none')).lower(), extra
+
+
+@lru_cache(maxsize=1024)
+def business_days(year: int, month: int, calendar: str = 'none',
+                  extra_holidays: FrozenSet[date] = frozenset()) -> pd.DatetimeIndex:
+    """
+    Días laborables (lunes a viernes, sin feriados) de un mes. Resultado cacheado por mes.
+
+    Args:
+        year, month: Mes a calcular
+        calendar: 'peru' para excluir los feriados nacionales de Perú, 'none' sin feriados
+        extra_holidays: Fechas adicionales no laborables
+    """
+    # Import diferido: la dimensión de fechas usa los feriados de este módulo
+    from helpers.date_dimension import get_date_dimension
+
+    first = pd.Timestamp(year, month, 1)
+    last = first + pd.offsets.MonthEnd(0)
+    table = get_date_dimension(calendar, extra_holidays).covering(first, last).loc[first:last]
+    return table.index[table['business_day'].to_numpy()].rename(None)
+
+
+def business_day_calendar(months: Iterable[Tuple[int, int]], calendar: str = 'none',
+                          extra_holidays: FrozenSet[date] = frozenset()) -> pd.DataFrame:
+    """Calendario largo ['YEAR', 'MES', 'FECHA', 'DIAS_LABORABLES'] para varios meses"""
+    frames = []
+    for year, month in months:
+        days = business_days(int(year), int(month), calendar, extra_holidays)
+        frames.append(pd.DataFrame({'YEAR': int(year), 'MES': int(month), 'FECHA': days, 'DIAS_LABORABLES': len(days)}))
+    if not frames:
+        return pd.DataFrame(columns=['YEAR', 'MES', 'FECHA', 'DIAS_LABORABLES'])
+    return pd.concat(frames, ignore_index=True)
+
+
+class PlanillaAllocator:
+    """
+    Reparte costos mensuales por proyecto entre los días laborables del mes.
+    La distribución de cada mes se memoriza por (mes, contenido del mes, calendario).
+    """
+
+    def __init__(self, calendar: Optional[str] = None, extra_holidays: Optional[Iterable] = None,
+                 cache_size: int = MONTH_CACHE_SIZE):
+        config_calendar, config_extra = load_holiday_config()
+        self.calendar = (calendar or config_calendar).lower()
+        self.extra_holidays = frozenset(pd.to_datetime(list(extra_holidays)).date) if extra_holidays else config_extra
+        self.cache_size = cache_size
+        self._months = OrderedDict()  # {(año, mes, hash): DataFrame}
+
+    def _month_key(self, year: int, month: int, grouped: pd.DataFrame) -> tuple:
+        content = int(pd.util.hash_pandas_object(grouped, index=False).sum())
+        return year, month, content
+
+    def allocate(self, df_costos: pd.DataFrame, target_month: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
+        """
+        Distribuye los costos entre días laborables.
+
+        Args:
+            df_costos: DataFrame con columnas ['Mes', 'DESCRIPCION PROYECTO', 'Costos']
+            target_month: (año, mes) donde repartir todos los costos; por defecto cada mes en su propio mes
+
+        Returns:
+            pd.DataFrame: columnas ['DESCRIPCION PROYECTO', 'FECHA', 'TOTAL']
+        """
+        columns = ['DESCRIPCION PROYECTO', 'FECHA', 'TOTAL']
+        if df_costos.empty:
+            return pd.DataFrame(columns=columns)
+
+        meses = pd.to_datetime(df_costos['Mes'])
+        costos = pd.DataFrame({
+            'YEAR': meses.dt.year.to_numpy(),
+            'MES': meses.dt.month.to_numpy(),
+            'DESCRIPCION PROYECTO': df_costos['DESCRIPCION PROYECTO'].to_numpy(),
+            'Costos': df_costos['Costos'].to_numpy(),
+        })
+        grouped = costos.groupby(['YEAR', 'MES', 'DESCRIPCION PROYECTO'], as_index=False)['Costos'].sum()
+        if target_month is not None:
+            grouped = grouped.groupby('DESCRIPCION PROYECTO', as_index=False)['Costos'].sum()
+            grouped.insert(0, 'YEAR', target_month[0])
+            grouped.insert(1, 'MES', target_month[1])
+
+        results, pending = [], []
+        for (year, month), df_mes in grouped.groupby(['YEAR', 'MES'], sort=True):
+            key = self._month_key(year, month, df_mes)
+            cached = self._months.get(key)
+            if cached is not None:
+                self._months.move_to_end(key)
+                results.append(cached)
+            else:
+                pending.append((len(results), key, df_mes))
+                results.append(None)
+
+        if pending:
+            # Un solo cruce de todos los meses nuevos contra su calendario
+            new_costs = pd.concat([df_mes for _, _, df_mes in pending], ignore_index=True)
+            calendar = business_day_calendar([key[:2] for _, key, _ in pending], self.calendar, self.extra_holidays)
+            allocated = new_costs.merge(calendar, on=['YEAR', 'MES'], how='inner')
+            allocated['TOTAL'] = allocated['Costos'] / allocated['DIAS_LABORABLES']
+            allocated = allocated.sort_values(['YEAR', 'MES', 'DESCRIPCION PROYECTO', 'FECHA'], kind='stable')
+
+            by_month = dict(iter(allocated.groupby(['YEAR', 'MES'], sort=False)))
+            for position, key, _ in pending:
+                month_frame = by_month.get(key[:2], allocated.iloc[0:0])[columns].reset_index(drop=True)
+                self._months[key] = month_frame
+                results[position] = month_frame
+            while len(self._months) > self.cache_size:
+                self._months.popitem(last=False)
+
+        return pd.concat(results, ignore_index=True)
+
+    def clear(self):
+        self._months.clear()
+
+
+def next_month(year: int, month: int) -> Tuple[int, int]:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+_default_allocator = None
+
+
+def get_planilla_allocator() -> PlanillaAllocator:
+    """Instancia compartida del motor (la memoización por mes dura lo que el proceso)"""
+    global _default_allocator
+    if _default_allocator is None:
+        _default_allocator = PlanillaAllocator()
+    return _default_allocator
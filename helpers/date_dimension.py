@@ -0,0 +1,154 @@
+"""
+Dimensión de fechas: una fila por día con los atributos de calendario que usan las fuentes
+
+Las columnas derivadas de FECHA (YEAR, MES, SEMANA...) se calculaban fila por fila en cada
+carga de fuente, y dt.isocalendar() es de lo más lento del procesamiento. La dimensión las
+calcula una vez por día y las fuentes solo ubican cada fecha en la tabla (posición del día),
+así el costo de calendario es O(fechas distintas) y no O(filas).
+
+Atributos (nombre de la parte en el paso date_parts del pipeline):
+    year, month, day, quarter, weekday   como los de Series.dt
+    week                                 semana ISO (UInt32, como dt.isocalendar().week)
+    week_of_month                        semana dentro del mes: días 1-7 -> 1, 8-14 -> 2...
+    business_day                         lunes a viernes que no es feriado
+    month_name                           nombre del mes en español
+    date                                 la fecha sin hora
+
+La tabla crece por años completos según las fechas que llegan y se comparte en el proceso.
+Los feriados salen de la sección 'planilla' de config.yaml, como en helpers.business_days.
+"""
+import threading
+from datetime import date
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional
+import numpy as np
+import pandas as pd
+from helpers.business_days import load_holiday_config, peru_holidays
+
+MONTH_NAMES = [
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
+]
+DATE_PARTS = ('year', 'month', 'day', 'quarter', 'weekday', 'week', 'week_of_month',
+              'business_day', 'month_name', 'date')
+MAX_SPAN_DAYS = 100 * 366  # con fechas más dispersas la tabla se arma solo con los días presentes
+
+
+def build_date_dimension(days: pd.DatetimeIndex, calendar: str = 'none',
+                         extra_holidays: FrozenSet[date] = frozenset()) -> pd.DataFrame:
+    """Atributos de calendario de cada día de `days` (índice normalizado y ordenado)"""
+    holidays = set(extra_holidays)
+    if calendar == 'peru':
+        for year in np.unique(days.year):
+            holidays |= peru_holidays(int(year))
+    return pd.DataFrame({
+        'year': days.year,
+        'month': days.month,
+        'day': days.day,
+        'quarter': days.quarter,
+        'weekday': days.weekday,
+        'week': days.isocalendar()['week'].array,
+        'week_of_month': (days.day - 1) // 7 + 1,
+        'business_day': (days.weekday < 5) & ~days.isin(pd.to_datetime(sorted(holidays))),
+        'month_name': np.array(MONTH_NAMES, dtype=object)[days.month - 1],
+    }, index=days.rename('FECHA'))
+
+
+def _with_missing(values, missing: np.ndarray):
+    """Valores tomados de la tabla con nulos donde la fecha era NaT (mismos tipos que Series.dt)"""
+    if not missing.any():
+        return values
+    if isinstance(values, pd.api.extensions.ExtensionArray):
+        values = values.copy()
+        values[missing] = pd.NA
+        return values
+    if values.dtype == bool:
+        values = pd.array(values, dtype='boolean')
+        values[missing] = pd.NA
+        return values
+    if values.dtype == object:
+        values = values.copy()
+        values[missing] = np.nan
+        return values
+    values = values.astype('float64')
+    values[missing] = np.nan
+    return values
+
+
+class DateDimension:
+    """Tabla de fechas de un calendario de feriados, extendida por años completos según se necesite"""
+
+    def __init__(self, calendar: str = 'none', extra_holidays: FrozenSet[date] = frozenset()):
+        self.calendar = calendar
+        self.extra_holidays = extra_holidays
+        self.table: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+    def covering(self, start, end) -> pd.DataFrame:
+        """Tabla (diaria y continua) que incluye el rango [start, end]"""
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        with self._lock:
+            table = self.table
+            if table is None or start < table.index[0] or end > table.index[-1]:
+                first, last = pd.Timestamp(start.year, 1, 1), pd.Timestamp(end.year, 12, 31)
+                if table is not None:
+                    first, last = min(first, table.index[0]), max(last, table.index[-1])
+                table = build_date_dimension(pd.date_range(first, last, freq='D'), self.calendar, self.extra_holidays)
+                self.table = table
+            return table
+
+    def lookup(self, serie: pd.Series, parts: Dict[str, str]) -> Dict[str, pd.Series]:
+        """
+        Columnas {nueva_columna: Serie} con las partes pedidas de cada fecha de `serie`.
+        Cada fila solo se ubica en la tabla; los atributos se calcularon una vez por día.
+        """
+        if not pd.api.types.is_datetime64_any_dtype(serie.dtype):
+            raise AttributeError(f"La columna '{serie.name}' no es de fechas ({serie.dtype})")
+        if isinstance(serie.dtype, pd.DatetimeTZDtype):
+            serie = serie.dt.tz_localize(None)  # hora local, como Series.dt
+        days = serie.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        missing = np.isnat(days)
+        present = days[~missing]
+
+        if not len(present):
+            table = self.covering(date.today(), date.today())
+            positions = np.zeros(len(days), dtype=np.int64)
+        elif (present.max() - present.min()).astype(np.int64) > MAX_SPAN_DAYS:
+            uniques = np.unique(present)
+            table = build_date_dimension(pd.DatetimeIndex(uniques.astype('datetime64[ns]')),
+                                         self.calendar, self.extra_holidays)
+            positions = np.searchsorted(uniques, np.where(missing, uniques[0], days))
+        else:
+            table = self.covering(present.min(), present.max())
+            positions = (days - table.index[0].to_datetime64().astype('datetime64[D]')).astype(np.int64)
+            positions[missing] = 0
+
+        columns = {}
+        for new_column, part in parts.items():
+            if part == 'date':
+                values = days.astype('datetime64[ns]')
+            else:
+                values = _with_missing(table[part].array.take(positions) if part == 'week'
+                                       else table[part].to_numpy().take(positions), missing)
+            columns[new_column] = pd.Series(values, index=serie.index, name=new_column)
+        return columns
+
+
+@lru_cache(maxsize=8)
+def _dimension(calendar: str, extra_holidays: FrozenSet[date]) -> DateDimension:
+    return DateDimension(calendar, extra_holidays)
+
+
+def get_date_dimension(calendar: Optional[str] = None,
+                       extra_holidays: Optional[FrozenSet[date]] = None) -> DateDimension:
+    """Dimensión compartida del proceso (por defecto con los feriados de config.yaml)"""
+    if calendar is None or extra_holidays is None:
+        config_calendar, config_extra = load_holiday_config()
+        calendar = config_calendar if calendar is None else calendar
+        extra_holidays = config_extra if extra_holidays is None else extra_holidays
+    return _dimension(calendar.lower(), frozenset(extra_holidays))
+
+
+def date_parts(serie: pd.Series, parts: Dict[str, str]) -> Dict[str, pd.Series]:
+    """Partes de fecha de una columna desde la dimensión compartida"""
+    return get_date_dimension().lookup(serie, parts)
@@ -0,0 +1,212 @@
+"""
+Tipo de cambio SUNAT persistente y conversión de moneda vectorizada
+
+Los tipos de cambio se guardan por fecha en un archivo parquet. Solo se consulta la API
+por las fechas que faltan, en paralelo con concurrencia acotada. Las fechas sin publicación
+(fines de semana, feriados) se registran como tales para no volver a consultarlas y toman
+el tipo de cambio del día hábil anterior. Solo cuentan como "sin publicación" un 404 o una
+respuesta de otra fecha; cualquier otro error (400/422 por token o formato, 5xx, red) no se
+guarda y la fecha se vuelve a consultar en la próxima carga.
+
+Configuración (sección 'exchange_rates' de config.yaml o variable EXCHANGE_RATES_PATH):
+    exchange_rates:
+      path: data/tipo_cambio_sunat.parquet
+      max_workers: 4
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Callable, Dict, Optional
+import numpy as np
+import pandas as pd
+import requests
+
+RATE_COLUMNS = ['FECHA', 'COMPRA', 'VENTA']
+LOOKBACK_DAYS = 10  # días hacia atrás para encontrar el día hábil anterior al rango
+
+
+def _default_path() -> str:
+    try:
+        from constants import config
+        rates_config = config.get('exchange_rates', {}) or {}
+    except (ImportError, FileNotFoundError):
+        rates_config = {}
+    return os.environ.get('EXCHANGE_RATES_PATH', rates_config.get('path')) or \
+        os.path.join(tempfile.gettempdir(), 'tipo_cambio_sunat.parquet')
+
+
+class ExchangeRateStore:
+    """
+    Almacén de tipos de cambio SUNAT por fecha.
+
+    Args:
+        path: Archivo parquet donde se persisten las fechas consultadas
+        fetcher: Función fecha 'YYYY-MM-DD' -> JSON de la API (por defecto get_tc_sunat_diario)
+        max_workers: Consultas simultáneas a la API
+    """
+
+    def __init__(self, path: Optional[str] = None, fetcher: Optional[Callable[[str], Dict]] = None,
+                 max_workers: int = 4):
+        self.path = path or _default_path()
+        self.fetcher = fetcher or self._default_fetcher
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._table = self._read()
+
+    @staticmethod
+    def _default_fetcher(day: str) -> Dict:
+        from helpers.get_api import get_tc_sunat_diario
+        return get_tc_sunat_diario(day)
+
+    def _read(self) -> pd.DataFrame:
+        """Fechas guardadas; COMPRA/VENTA nulos = fecha sin publicación"""
+        try:
+            table = pd.read_parquet(self.path)
+        except (FileNotFoundError, OSError):
+            return pd.DataFrame({'COMPRA': pd.Series(dtype='float64'), 'VENTA': pd.Series(dtype='float64')},
+                                index=pd.DatetimeIndex([], name='FECHA'))
+        return table.set_index('FECHA').sort_index()
+
+    def _write(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.parquet')
+        os.close(fd)
+        self._table.reset_index().to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+
+    def _fetch(self, day: pd.Timestamp):
+        """
+        Consulta una fecha. Retorna (compra, venta), (nan, nan) si no hay publicación (se guarda)
+        o None si falló (no se guarda: se reintenta más tarde)
+        """
+        try:
+            data = self.fetcher(day.strftime('%Y-%m-%d'))
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status == 404:
+                return np.nan, np.nan
+            print(f"❌ Error consultando tipo de cambio {day.date()}: {e}")
+            return None
+        except Exception as e:
+            print(f"❌ Error consultando tipo de cambio {day.date()}: {e}")
+            return None
+
+        if not data:
+            print(f"❌ Respuesta vacía de tipo de cambio {day.date()}")
+            return None
+        # La API puede responder con el último día publicado: solo cuenta si es la misma fecha
+        if data.get('fecha') and pd.Timestamp(data['fecha']) != day:
+            return np.nan, np.nan
+        return float(data['precioCompra']), float(data['precioVenta'])
+
+    def backfill(self, start, end) -> int:
+        """
+        Consulta y guarda las fechas del rango que aún no están en el almacén.
+        Las fechas sin publicación de hoy en adelante no se guardan (pueden publicarse más tarde).
+
+        Returns:
+            Número de fechas consultadas
+        """
+        days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq='D')
+        with self._lock:
+            missing = days.difference(self._table.index)
+        if missing.empty:
+            return 0
+
+        print(f"💱 Consultando tipo de cambio SUNAT: {len(missing)} fechas ({missing[0].date()} a {missing[-1].date()})")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self._fetch, missing))
+
+        today = pd.Timestamp(date.today())
+        rows = {day: result for day, result in zip(missing, results)
+                if result is not None and not (np.isnan(result[1]) and day >= today)}
+        if rows:
+            new = pd.DataFrame.from_dict(rows, orient='index', columns=['COMPRA', 'VENTA'])
+            new.index.name = 'FECHA'
+            with self._lock:
+                current = self._read()  # otro proceso pudo haber guardado fechas mientras tanto
+                table = pd.concat([current, self._table, new])
+                self._table = table[~table.index.duplicated(keep='last')].sort_index()
+                self._write()
+        return len(missing)
+
+    def rates(self, start, end) -> pd.DataFrame:
+        """
+        Tipo de cambio diario del rango, con los días sin publicación completados
+        con el día hábil anterior
+
+        Returns:
+            pd.DataFrame: columnas ['FECHA', 'COMPRA', 'VENTA']
+        """
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        self.backfill(start - timedelta(days=LOOKBACK_DAYS), end)
+
+        days = pd.date_range(start, end, freq='D')
+        with self._lock:
+            published = self._table.dropna()
+        daily = published.reindex(published.index.union(days)).ffill().reindex(days)
+        daily.index.name = 'FECHA'
+        return daily.reset_index()[RATE_COLUMNS]
+
+    def convert(self, df: pd.DataFrame, amount_column: str = 'MONTO', date_column: str = 'FECHA',
+                to_currency: str = 'USD', rate: str = 'VENTA', output_column: Optional[str] = None) -> pd.DataFrame:
+        """
+        Convierte una columna de montos con un solo merge_asof contra el tipo de cambio
+        (cada fecha toma el último tipo publicado hasta ese día).
+
+        Args:
+            df: DataFrame con la columna de montos y la de fechas
+            amount_column: Columna de montos
+            date_column: Columna de fechas
+            to_currency: 'USD' (montos en soles) o 'PEN' (montos en dólares)
+            rate: 'VENTA' o 'COMPRA'
+            output_column: Columna de salida (por defecto '<amount_column>_<to_currency>')
+
+        Returns:
+            Copia del DataFrame con la columna convertida y el tipo de cambio usado (TC)
+        """
+        if to_currency not in ('USD', 'PEN'):
+            raise ValueError(f"Moneda '{to_currency}' no soportada")
+        output_column = output_column or f"{amount_column}_{to_currency}"
+        result = df.copy()
+        fechas = pd.to_datetime(result[date_column]).dt.normalize()
+        if fechas.dropna().empty:
+            result['TC'] = np.nan
+            result[output_column] = np.nan
+            return result
+
+        self.backfill(fechas.min() - timedelta(days=LOOKBACK_DAYS), fechas.max())
+        with self._lock:
+            published = self._table[rate].dropna().rename('TC').reset_index()
+        published['FECHA'] = published['FECHA'].astype(fechas.dtype)
+
+        # merge_asof requiere claves ordenadas: se ordena por fecha y se restaura el orden original
+        keys = pd.DataFrame({'FECHA': fechas.to_numpy(), '_pos': np.arange(len(result))}).dropna(subset=['FECHA'])
+        matched = pd.merge_asof(keys.sort_values('FECHA', kind='stable'), published, on='FECHA', direction='backward')
+        tc = np.full(len(result), np.nan)
+        tc[matched['_pos'].to_numpy()] = matched['TC'].to_numpy()
+
+        montos = result[amount_column].to_numpy(dtype='float64')
+        result['TC'] = tc
+        result[output_column] = montos / tc if to_currency == 'USD' else montos * tc
+        return result
+
+
+_default_store = None
+
+
+def get_exchange_rate_store() -> ExchangeRateStore:
+    """Instancia compartida del almacén (una por proceso)"""
+    global _default_store
+    if _default_store is None:
+        try:
+            from constants import config
+            max_workers = (config.get('exchange_rates', {}) or {}).get('max_workers', 4)
+        except (ImportError, FileNotFoundError):
+            max_workers = 4
+        _default_store = ExchangeRateStore(max_workers=max_workers)
+    return _default_store
@@ -1,10 +1,12 @@
-import requests
 import time
 import pandas as pd
 import io
 from pathlib import Path
+from typing import Optional, Tuple
+from constants import MICROSOFT_GRAPH_BASE_URL
 from helpers.get_token import get_access_token, load_config 
 from helpers.helpers import create_format_excel_in_memory
+from helpers.http_client import get_session, async_get_json, range_header, content_range_size, RangeNotSupported
 
 config = load_config()
 
@@ -23,18 +25,18 @@ def listar_archivos_en_carpeta_compartida(access_token: str  ,drive_id: str, ite
     :return: Lista de archivos o carpetas dentro de esa carpeta
     """
     
-    url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{item_id}/children"
+    url = f"{MICROSOFT_GRAPH_BASE_URL}/drives/{drive_id}/items/{item_id}/children"
     headers = {
         "Authorization": f"Bearer {access_token}"
     }
 
-    response = requests.get(url, headers=headers)
+    response = get_session().get(url, headers=headers)
 
     if response.status_code == 200:
         return response.json().get("value", [])
     else:
         print("❌ Error al obtener archivos:", response.status_code)
-        print(response.json())
+        print(response.text)
         return []
 
 
@@ -43,19 +45,64 @@ def listar_archivos_en_carpeta_compartida(access_token: str  ,drive_id: str, ite
         
 
 
-def get_tc_sunat_diario(date=None):
+async def listar_archivos_en_carpeta_compartida_async(access_token: str, drive_id: str, item_id: str):
+    """
+    Versión async de listar_archivos_en_carpeta_compartida
+    """
+    url = f"{MICROSOFT_GRAPH_BASE_URL}/drives/{drive_id}/items/{item_id}/children"
+    status, data = await async_get_json(url, headers={"Authorization": f"Bearer {access_token}"})
+
+    if status == 200:
+        return data.get("value", [])
+    print("❌ Error al obtener archivos:", status)
+    print(data)
+    return []
+
+
+def get_tc_sunat_diario(date=None, base_url=None):
+        """
+        Tipo de cambio SUNAT (USD/PEN) de una fecha 'YYYY-MM-DD'.
+        Retorna el JSON de la API: {'precioCompra', 'precioVenta', 'moneda', 'fecha'}
+        """
         headers = {
             "Authorization": f"Bearer {TOKEN}",
             "Accept": "application/json"
         }
 
         params = {"date": date}
-        response = requests.get(
-            BASE_URL,
+        response = get_session().get(
+            base_url or BASE_URL,
             headers=headers,
             params=params,
             timeout=30
         )
         response.raise_for_status()
         data = response.json()
-        return data
\ No newline at end of file
+        return data
+
+
+def download_file(url: str, chunk_size: int = 1024 * 1024) -> io.BytesIO:
+    """
+    Descarga un archivo (p. ej. @microsoft.graph.downloadUrl) con la sesión compartida,
+    por bloques y con timeout de lectura entre bloques. Retorna un buffer posicionado al inicio
+    """
+    with get_session().get(url, stream=True) as response:
+        response.raise_for_status()
+        buffer = io.BytesIO()
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+
+def download_range(url: str, start: int, end: Optional[int] = None) -> Tuple[bytes, Optional[int]]:
+    """
+    Descarga los bytes [start, end] (inclusive) de un archivo con una petición Range;
+    start negativo pide los últimos -start bytes. Retorna (bytes, tamaño total del archivo).
+    Lanza RangeNotSupported si el servidor responde el archivo completo en lugar de 206
+    """
+    with get_session().get(url, headers={"Range": range_header(start, end)}, stream=True) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise RangeNotSupported(url)
+        return response.content, content_range_size(response.headers.get("Content-Range"))
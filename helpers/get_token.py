@@ -1,7 +1,7 @@
-import requests
 from typing import Optional
-from constants import MICROSOFT_GRAPH_TENANT_ID, MICROSOFT_GRAPH_CLIENT_ID, MICROSOFT_GRAPH_CLIENT_SECRET
+from constants import MICROSOFT_GRAPH_TENANT_ID, MICROSOFT_GRAPH_CLIENT_ID, MICROSOFT_GRAPH_CLIENT_SECRET, MICROSOFT_LOGIN_BASE_URL
 from helpers.config import load_config
+from helpers.http_client import get_session, async_get_json
 config = load_config()
 
 def get_access_token() -> Optional[str]:
@@ -12,9 +12,9 @@ def get_access_token() -> Optional[str]:
         print("Error: Microsoft Graph API credentials no configuradas en config.yaml")
         return None
     
-    AUTHORITY = f"https://login.microsoftonline.com/{MICROSOFT_GRAPH_TENANT_ID}/oauth2/v2.0/token"
+    AUTHORITY = f"{MICROSOFT_LOGIN_BASE_URL}/{MICROSOFT_GRAPH_TENANT_ID}/oauth2/v2.0/token"
     try:
-        response = requests.post(AUTHORITY, data={
+        response = get_session().post(AUTHORITY, data={
             "grant_type": "client_credentials",
             "client_id": MICROSOFT_GRAPH_CLIENT_ID,
             "client_secret": MICROSOFT_GRAPH_CLIENT_SECRET,
@@ -39,6 +39,33 @@ def get_access_token() -> Optional[str]:
         print(f"Error al obtener el token: {e}")
         return None
 
+async def get_access_token_async() -> Optional[str]:
+    """
+    Versión async de get_access_token (sin ocupar un hilo mientras espera a Microsoft)
+    """
+    if not all([MICROSOFT_GRAPH_TENANT_ID, MICROSOFT_GRAPH_CLIENT_ID, MICROSOFT_GRAPH_CLIENT_SECRET]):
+        print("Error: Microsoft Graph API credentials no configuradas en config.yaml")
+        return None
+    
+    AUTHORITY = f"{MICROSOFT_LOGIN_BASE_URL}/{MICROSOFT_GRAPH_TENANT_ID}/oauth2/v2.0/token"
+    try:
+        status, token_response = await async_get_json(AUTHORITY, method='POST', data={
+            "grant_type": "client_credentials",
+            "client_id": MICROSOFT_GRAPH_CLIENT_ID,
+            "client_secret": MICROSOFT_GRAPH_CLIENT_SECRET,
+            "scope": "https://graph.microsoft.com/.default"
+        })
+        
+        if status == 200 and isinstance(token_response, dict) and token_response.get("access_token"):
+            print("Token de acceso obtenido exitosamente")
+            return token_response["access_token"]
+        print(f"Error HTTP {status}: {token_response}")
+        return None
+    
+    except Exception as e:
+        print(f"Error al obtener el token: {e}")
+        return None
+
 def get_config_value(section: str, key: str = None):
     """
     Obtiene un valor específico de la configuración
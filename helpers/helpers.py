@@ -1,14 +1,13 @@
 import re
 import pandas as pd
-import openpyxl
 import numpy as np
 import calendar
 from datetime import datetime
-from openpyxl.styles import Font, PatternFill
-from openpyxl.utils import get_column_letter
 import re
-from openpyxl.worksheet.table import Table, TableStyleInfo
 import io
+import warnings
+import pyarrow as pa
+import pyarrow.compute as pc
 
 
 change_month = {
@@ -79,50 +78,264 @@ def corregir_hora_tarde(hora_str):
         return f"{h:02d}:{m:02d}:{s:02d}"
 
 
-def create_format_excel(dff: pd.DataFrame, nombre_archivo: str) -> str:
-     with pd.ExcelWriter(nombre_archivo, engine="openpyxl") as writer:
-        dff.to_excel(writer, index=False, sheet_name="TIEMPOS")
-        ws = writer.sheets["TIEMPOS"]
-
-        # Encabezados en negrita y fondo azul claro
-        header_fill = PatternFill(start_color="B7DEE8", end_color="B7DEE8", fill_type="solid")
-        for col_num, col in enumerate(dff.columns, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.font = Font(bold=True)
-            cell.fill = header_fill
-
-        # Ajustar ancho de columnas automáticamente
-        for i, col in enumerate(dff.columns, 1):
-            max_length = max(
-                [len(str(cell.value)) if cell.value is not None else 0 for cell in ws[get_column_letter(i)]]
-            )
-            ws.column_dimensions[get_column_letter(i)].width = max_length + 2
-
-        # Congelar la primera fila
-        ws.freeze_panes = "A2"
-
-        # Validar encabezados para tabla de Excel
-        columnas_validas = True
-        colnames = list(dff.columns)
-        if any(pd.isna(col) or str(col).strip() == '' for col in colnames):
-            columnas_validas = False
-        if len(set(colnames)) != len(colnames):
-            columnas_validas = False
-        if any(any(c in str(col) for c in ['[', ']', '*', '?', '/', '\\']) for col in colnames):
-            columnas_validas = False
-
-        # Crear tabla de Excel real solo si los encabezados son válidos
-        if columnas_validas:
-            nrows = dff.shape[0] + 1  # +1 por encabezado
-            ncols = dff.shape[1]
-            last_col = get_column_letter(ncols)
-            table_ref = f"A1:{last_col}{nrows}"
-            tabla = Table(displayName="TIEMPOS_TABLA", ref=table_ref)
-            style = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False, showLastColumn=False, showRowStripes=True, showColumnStripes=False)
-            tabla.tableStyleInfo = style
-            ws.add_table(tabla)
+# Versiones por columna de los helpers anteriores (misma semántica, sin .apply fila por fila).
+# Los valores ASCII con el formato esperado se resuelven con kernels de pyarrow.compute;
+# los demás (texto no ASCII, formatos raros) pasan por el helper escalar, que define la semántica.
+PYTHON_ASCII_WHITESPACE = " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+KG_DECIMAL_PATTERN = r"^[+-]?(\d+\.\d*|\.\d+)([eE][+-]?\d+)?$"
+KG_ENTERO_PATTERN = r"^[+-]?\d{1,18}$"
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+HORA_PATTERN = r"^(?P<h>\d{2}):(?P<m>\d{2}):(?P<s>\d{2})"
+
+
+def _texto_arrow(serie: pd.Series, convertir: bool = False):
+    """
+    Convierte una columna en un arreglo de texto Arrow (sin copia si ya es texto Arrow).
+
+    Args:
+        serie: Columna a convertir
+        convertir: Si es True los valores no nulos que no son texto se convierten con str()
+
+    Returns:
+        (arreglo Arrow con nulos donde no hay texto, máscara de filas con texto ASCII)
+    """
+    if isinstance(serie.dtype, pd.ArrowDtype) and pa.types.is_string(serie.dtype.pyarrow_dtype) \
+            or isinstance(serie.dtype, pd.StringDtype):
+        texto = pa.array(serie.array).cast(pa.string())
+        es_texto = pc.is_valid(texto).to_numpy(zero_copy_only=False)
+    else:
+        valores = serie.to_numpy(dtype=object)
+        if pd.api.types.infer_dtype(valores, skipna=True) == "string":
+            texto = pa.array(valores, type=pa.string(), from_pandas=True)
+            es_texto = pc.is_valid(texto).to_numpy(zero_copy_only=False)
         else:
-            print("No se pudo crear la tabla de Excel porque los encabezados no son válidos para Excel. Solo se exportó el formato básico.")
+            nulos = pd.isna(valores)
+            es_texto = np.fromiter((isinstance(v, str) for v in valores), dtype=bool, count=len(valores))
+            if convertir:
+                otros = ~es_texto & ~nulos
+                valores = valores.copy()
+                valores[otros] = [str(v) for v in valores[otros]]
+                es_texto |= otros
+            texto = pa.array(np.where(es_texto, valores, None), type=pa.string())
+    ascii_ = pc.fill_null(pc.string_is_ascii(texto), False).to_numpy(zero_copy_only=False)
+    return texto, es_texto & ascii_
+
+
+def _convertir_texto(texto: pa.Array, mascara: np.ndarray, tipo: pa.DataType, patron: str,
+                     destino: np.ndarray) -> np.ndarray:
+    """
+    Convierte a número las filas de la máscara que cumplen el patrón y las escribe en destino.
+    El cast de Arrow acepta formatos que Python rechaza (p. ej. '0x10' como entero): solo se
+    convierten las filas validadas con el patrón. Retorna la máscara de filas convertidas;
+    las demás quedan para el helper escalar.
+    """
+    if not mascara.any():
+        return mascara
+    validos = mascara & pc.fill_null(pc.match_substring_regex(texto, patron), False).to_numpy(zero_copy_only=False)
+    if not validos.any():
+        return validos
+    seleccion = pc.filter(texto, pa.array(validos))
+    if pa.types.is_integer(tipo):
+        seleccion = pc.replace_substring_regex(seleccion, r"^\+", "")
+    destino[validos] = pc.cast(seleccion, tipo).to_numpy(zero_copy_only=False)
+    return validos
+
+
+def limpiar_kg_exportables_serie(serie: pd.Series) -> pd.Series:
+    """
+    Equivalente por columna de limpiar_kg_exportables: los valores con punto se multiplican por 1000,
+    el resto se convierte a entero. Lanza ValueError si algún valor no es convertible.
+    Los enteros se calculan en int64 (sin pasar por float64) y los que no caben en int64 dan el
+    mismo resultado que .apply (uint64 u object).
+    """
+    if pd.api.types.is_integer_dtype(serie) and not serie.isna().any():
+        return serie.astype("int64")
+
+    valores = serie.to_numpy(dtype=object)
+    if pd.api.types.is_float_dtype(serie):
+        # str(x) de un float tiene punto salvo en nan/inf y notación exponencial sin decimales
+        numeros = serie.to_numpy(dtype="float64", na_value=np.nan)
+        absolutos = np.abs(numeros)
+        rapidos = (absolutos == 0) | ((absolutos >= 1e-4) & (absolutos < 1e16))
+        resultado = np.where(rapidos, numeros * 1000, np.nan)
+        enteros = np.zeros(len(serie), dtype=np.int64)
+        es_decimal = rapidos.copy()
+    else:
+        texto, ascii_ = _texto_arrow(serie, convertir=True)
+        texto = pc.utf8_trim(texto, PYTHON_ASCII_WHITESPACE)
+        con_punto = pc.fill_null(pc.match_substring(texto, "."), False).to_numpy(zero_copy_only=False)
+
+        resultado = np.full(len(serie), np.nan)
+        enteros = np.zeros(len(serie), dtype=np.int64)
+        es_decimal = _convertir_texto(texto, ascii_ & con_punto, pa.float64(), KG_DECIMAL_PATTERN, resultado)
+        resultado[es_decimal] *= 1000
+        es_entero = _convertir_texto(texto, ascii_ & ~con_punto, pa.int64(), KG_ENTERO_PATTERN, enteros)
+        rapidos = es_decimal | es_entero
+
+    # Resto de filas: helper escalar (lanza ValueError igual que .apply)
+    lentos = np.flatnonzero(~rapidos)
+    if len(lentos):
+        escalares = [limpiar_kg_exportables(v) for v in valores[lentos]]
+        if any(isinstance(v, int) and not INT64_MIN <= v <= INT64_MAX for v in escalares):
+            # Enteros fuera de int64: el tipo lo infiere pandas como en .apply
+            return pd.Series([limpiar_kg_exportables(v) for v in valores], index=serie.index, name=serie.name)
+        flotantes = np.fromiter((isinstance(v, float) for v in escalares), dtype=bool, count=len(escalares))
+        resultado[lentos[flotantes]] = [v for v in escalares if isinstance(v, float)]
+        enteros[lentos[~flotantes]] = [v for v in escalares if not isinstance(v, float)]
+        es_decimal[lentos[flotantes]] = True
+
+    if es_decimal.any():
+        # Con algún decimal la columna es float64 (como .apply): los enteros se convierten al final
+        return pd.Series(np.where(es_decimal, resultado, enteros), index=serie.index, name=serie.name)
+    return pd.Series(enteros, index=serie.index, name=serie.name)
+
+
+def corregir_hora_tarde_serie(serie: pd.Series) -> pd.Series:
+    """
+    Equivalente por columna de corregir_hora_tarde: las horas 'HH:MM:SS' antes del mediodía pasan a la tarde.
+    Los nulos y los valores sin formato de hora se mantienen sin cambios.
+    """
+    valores = serie.to_numpy(dtype=object)
+    resultado = valores.copy()
+    nulos = pd.isna(valores)
+
+    texto, ascii_ = _texto_arrow(serie, convertir=True)
+    partes = pc.extract_regex(texto, HORA_PATTERN)
+    validos = ascii_ & pc.fill_null(pc.is_valid(partes), False).to_numpy(zero_copy_only=False)
+    if validos.any():
+        partes = pc.filter(partes, pa.array(validos))
+        horas = pc.cast(pc.struct_field(partes, "h"), pa.int64())
+        horas = pc.if_else(pc.less(horas, 12), pc.add(horas, 12), horas)
+        horas = pc.utf8_lpad(pc.cast(horas, pa.string()), 2, "0")
+        horas = pc.binary_join_element_wise(horas, pc.struct_field(partes, "m"), pc.struct_field(partes, "s"), ":")
+        resultado[validos] = horas.to_numpy(zero_copy_only=False)
+
+    # Texto no ASCII: helper escalar
+    lentos = ~ascii_ & ~nulos
+    if lentos.any():
+        resultado[lentos] = [corregir_hora_tarde(v) for v in valores[lentos]]
+    return pd.Series(resultado, index=serie.index, name=serie.name, dtype=object)
+
+
+def split_if_colon_at_3_serie(serie: pd.Series) -> pd.DataFrame:
+    """
+    Equivalente por columna de split_if_colon_at_3: retorna un DataFrame de dos columnas (0, 1),
+    listo para asignar con df[['CODIGO', 'DESCRIPCION']] = split_if_colon_at_3_serie(df['COLUMNA'])
+    """
+    valores = serie.to_numpy(dtype=object)
+    codigo = np.full(len(valores), None, dtype=object)
+    resto = valores.copy()
+
+    if pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+        texto, ascii_ = _texto_arrow(serie)
+        mascara = pc.fill_null(pc.equal(pc.utf8_slice_codeunits(texto, 2, 3), ":"), False).to_numpy(zero_copy_only=False)
+        rapidos = mascara & ascii_
+        if rapidos.any():
+            seleccion = pc.filter(texto, pa.array(rapidos))
+            codigo[rapidos] = pc.utf8_slice_codeunits(seleccion, 0, 2).to_numpy(zero_copy_only=False)
+            resto[rapidos] = pc.utf8_trim(pc.utf8_slice_codeunits(seleccion, 3), PYTHON_ASCII_WHITESPACE).to_numpy(zero_copy_only=False)
+        # Texto no ASCII con ':' en la tercera posición: helper escalar (str.strip de Python)
+        lentos = mascara & ~ascii_
+        for i in np.flatnonzero(lentos):
+            codigo[i], resto[i] = split_if_colon_at_3(valores[i])
+    return pd.DataFrame({0: codigo, 1: resto}, index=serie.index)
+
+
+EXCEL_HEADER_FILL = "B7DEE8"
+EXCEL_WIDTH_SAMPLE = 10000
+
+
+def excel_column_widths(dff: pd.DataFrame, sample_size: int = EXCEL_WIDTH_SAMPLE) -> list:
+    """
+    Calcula el ancho de cada columna de forma vectorizada sobre una muestra de filas
+    (encabezado incluido), en lugar de recorrer celda por celda la hoja
+    """
+    sample = dff.sample(n=sample_size, random_state=0) if len(dff) > sample_size else dff
+    widths = []
+    for i, col in enumerate(dff.columns):
+        lengths = sample.iloc[:, i].dropna().astype(str).str.len()
+        max_length = max(len(str(col)), int(lengths.max()) if not lengths.empty else 0)
+        widths.append(max_length + 2)
+    return widths
+
+
+def valid_excel_table_headers(columns) -> bool:
+    """Valida que los encabezados sirvan para una tabla de Excel"""
+    colnames = list(columns)
+    if any(pd.isna(col) or str(col).strip() == '' for col in colnames):
+        return False
+    if len(set(colnames)) != len(colnames):
+        return False
+    if any(any(c in str(col) for c in ['[', ']', '*', '?', '/', '\\']) for col in colnames):
+        return False
+    return True
+
+
+def write_excel_streaming(dff: pd.DataFrame, destination, sheet_name: str = "TIEMPOS",
+                          table_name: str = "TIEMPOS_TABLA", chunk_size: int = 10000):
+    """
+    Motor de exportación a Excel en modo write-only de openpyxl (memoria constante).
+    Las filas se escriben por bloques directamente al archivo, sin construir el libro en memoria.
+    Mantiene encabezados en negrita con fondo azul claro, primera fila congelada y tabla de Excel.
+
+    Args:
+        dff: DataFrame de pandas a exportar
+        destination: Ruta del archivo o buffer binario (io.BytesIO, archivo abierto)
+        sheet_name: Nombre de la hoja
+        table_name: Nombre de la tabla de Excel
+        chunk_size: Filas convertidas a objetos Python por bloque
+    """
+    # openpyxl se importa al exportar: evita su costo en el arranque de cada worker
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+    from openpyxl.worksheet.table import Table, TableStyleInfo, TableColumn
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+
+    # En modo write-only el ancho y el panel congelado se definen antes de escribir filas
+    for i, width in enumerate(excel_column_widths(dff), 1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+    ws.freeze_panes = "A2"
+
+    # Encabezados en negrita y fondo azul claro
+    header_fill = PatternFill(start_color=EXCEL_HEADER_FILL, end_color=EXCEL_HEADER_FILL, fill_type="solid")
+    header = []
+    for col in dff.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font = Font(bold=True)
+        cell.fill = header_fill
+        header.append(cell)
+    ws.append(header)
+
+    for start in range(0, len(dff), chunk_size):
+        chunk = dff.iloc[start:start + chunk_size].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            ws.append(row)
+
+    # Crear tabla de Excel real solo si los encabezados son válidos
+    if len(dff.columns) and valid_excel_table_headers(dff.columns):
+        table_ref = f"A1:{get_column_letter(dff.shape[1])}{dff.shape[0] + 1}"
+        tabla = Table(displayName=table_name, ref=table_ref)
+        tabla.tableStyleInfo = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False, showLastColumn=False, showRowStripes=True, showColumnStripes=False)
+        # En write-only openpyxl no puede leer los encabezados de la hoja: se asignan aquí
+        tabla.tableColumns = [TableColumn(id=i, name=str(col)) for i, col in enumerate(dff.columns, 1)]
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="In write-only mode you must add table columns manually")
+            ws.add_table(tabla)
+    else:
+        print("⚠️  No se pudo crear la tabla de Excel porque los encabezados no son válidos. Solo se aplicó el formato básico.")
+
+    wb.save(destination)
+
+
+def create_format_excel(dff: pd.DataFrame, nombre_archivo: str) -> str:
+    """Exporta el DataFrame formateado a un archivo Excel y retorna la ruta"""
+    write_excel_streaming(dff, nombre_archivo)
+    return nombre_archivo
 
 def create_format_excel_in_memory(dff: pd.DataFrame) -> bytes:
     """
@@ -134,59 +347,29 @@ def create_format_excel_in_memory(dff: pd.DataFrame) -> bytes:
     Returns:
         bytes: Contenido del archivo Excel formateado
     """
-    # Crear buffer en memoria
     excel_buffer = io.BytesIO()
-    
-    with pd.ExcelWriter(excel_buffer, engine="openpyxl") as writer:
-        dff.to_excel(writer, index=False, sheet_name="TIEMPOS")
-        ws = writer.sheets["TIEMPOS"]
-
-        # Encabezados en negrita y fondo azul claro
-        header_fill = PatternFill(start_color="B7DEE8", end_color="B7DEE8", fill_type="solid")
-        for col_num, col in enumerate(dff.columns, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.font = Font(bold=True)
-            cell.fill = header_fill
-
-        # Ajustar ancho de columnas automáticamente
-        for i, col in enumerate(dff.columns, 1):
-            max_length = max(
-                [len(str(cell.value)) if cell.value is not None else 0 for cell in ws[get_column_letter(i)]]
-            )
-            ws.column_dimensions[get_column_letter(i)].width = max_length + 2
-
-        # Congelar la primera fila
-        ws.freeze_panes = "A2"
-
-        # Validar encabezados para tabla de Excel
-        columnas_validas = True
-        colnames = list(dff.columns)
-        if any(pd.isna(col) or str(col).strip() == '' for col in colnames):
-            columnas_validas = False
-        if len(set(colnames)) != len(colnames):
-            columnas_validas = False
-        if any(any(c in str(col) for c in ['[', ']', '*', '?', '/', '\\']) for col in colnames):
-            columnas_validas = False
-
-        # Crear tabla de Excel real solo si los encabezados son válidos
-        if columnas_validas:
-            nrows = dff.shape[0] + 1  # +1 por encabezado
-            ncols = dff.shape[1]
-            last_col = get_column_letter(ncols)
-            table_ref = f"A1:{last_col}{nrows}"
-            tabla = Table(displayName="TIEMPOS_TABLA", ref=table_ref)
-            style = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False, showLastColumn=False, showRowStripes=True, showColumnStripes=False)
-            tabla.tableStyleInfo = style
-            ws.add_table(tabla)
-        else:
-            print("⚠️  No se pudo crear la tabla de Excel porque los encabezados no son válidos. Solo se aplicó el formato básico.")
-    
-    # Obtener los bytes del archivo Excel formateado
+    write_excel_streaming(dff, excel_buffer)
     excel_data = excel_buffer.getvalue()
     excel_buffer.close()
     
     return excel_data
 
+def get_item_by_name(json_data, name):
+    """
+    Busca en el JSON un archivo por su nombre y retorna el item completo
+    (incluye eTag, lastModifiedDateTime, size y downloadUrl)
+    
+    Args:
+        json_data (list): Lista de diccionarios con información de archivos
+        name (str): Nombre del archivo a buscar
+    
+    Returns:
+        dict: Item del archivo encontrado, o None si no se encuentra
+    """
+    for item in json_data:
+        if item.get('name') == name:
+            return item
+
 def get_download_url_by_name(json_data, name):
     """
     Busca en el JSON un archivo por su nombre y retorna su downloadUrl
@@ -198,46 +381,31 @@ def get_download_url_by_name(json_data, name):
     Returns:
         str: URL de descarga del archivo encontrado, o None si no se encuentra
     """
-    for item in json_data:
-        if item.get('name') == name:
-            return item.get('@microsoft.graph.downloadUrl')
+    item = get_item_by_name(json_data, name)
+    if item:
+        return item.get('@microsoft.graph.downloadUrl')
         
 def structure_planilla_historica_like_estimate(df_planilla_historica):
     """
     Estructura la planilla histórica igual que estimate_current_planilla_by_previous:
-    Para cada mes y proyecto, distribuye el costo total entre los días laborables (lunes a viernes) del mes.
+    Para cada mes y proyecto, distribuye el costo total entre los días laborables del mes
+    (lunes a viernes, menos los feriados configurados en la sección 'planilla').
+    Los meses ya distribuidos se reutilizan desde la memoización del motor.
 
     Args:
         df_planilla_historica (pd.DataFrame): DataFrame con columnas ['Mes', 'DESCRIPCION PROYECTO', 'Costos']
 
     Returns:
-        pd.DataFrame: DataFrame con columnas ['DESCRIPCION PROYECTO', 'FECHA', 'TOTAL', 'MES_ACTUAL', 'AÑO_ACTUAL']
+        pd.DataFrame: DataFrame con columnas ['DESCRIPCION PROYECTO', 'FECHA', 'TOTAL']
     """
-    if not np.issubdtype(df_planilla_historica['Mes'].dtype, np.datetime64):
-        df_planilla_historica = df_planilla_historica.copy()
-        df_planilla_historica['Mes'] = pd.to_datetime(df_planilla_historica['Mes'])
+    from helpers.business_days import get_planilla_allocator
 
-    resultados = []
-    for (año, mes), df_mes in df_planilla_historica.groupby([df_planilla_historica['Mes'].dt.year, df_planilla_historica['Mes'].dt.month]):
-        # Solo días laborables (lunes=0, ..., viernes=4)
-        dias_mes = pd.date_range(start=datetime(año, mes, 1), end=datetime(año, mes, pd.Period(f'{año}-{mes:02d}').days_in_month))
-        dias_laborables = dias_mes[dias_mes.weekday < 5]  # lunes a viernes
-        df_grouped = df_mes.groupby('DESCRIPCION PROYECTO', as_index=False)['Costos'].sum()
-        for _, row in df_grouped.iterrows():
-            costo_diario = row['Costos'] / len(dias_laborables) if len(dias_laborables) > 0 else 0
-            for fecha in dias_laborables:
-                resultados.append({
-                    'DESCRIPCION PROYECTO': row['DESCRIPCION PROYECTO'],
-                    'FECHA': fecha,
-                    'TOTAL': costo_diario,
-                })
-    
-    return pd.DataFrame(resultados)
+    return get_planilla_allocator().allocate(df_planilla_historica)
 
 def estimate_current_planilla_by_previous(df_planilla_historica):
     """
     Calcula la planilla "actual" (mes más reciente sin datos) usando la planilla del mes anterior,
-    agrupando por proyecto y distribuyendo el costo total entre los días laborables (lunes a viernes) del mes actual.
+    agrupando por proyecto y distribuyendo el costo total entre los días laborables del mes actual.
     Si existe la planilla del mes actual, se usa esa. Si no, se usa la del mes anterior.
 
     Args:
@@ -245,71 +413,30 @@ def estimate_current_planilla_by_previous(df_planilla_historica):
             donde 'Mes' es tipo datetime o string 'YYYY-MM'.
 
     Returns:
-        pd.DataFrame: DataFrame con columnas ['DESCRIPCION PROYECTO', 'DIA', 'COSTO_DIARIO', 'MES_ACTUAL', 'AÑO_ACTUAL']
-        donde 'DIA' es una fecha completa (datetime)
+        pd.DataFrame: DataFrame con columnas ['DESCRIPCION PROYECTO', 'FECHA', 'TOTAL']
+        donde 'FECHA' es una fecha completa (datetime)
     """
+    from helpers.business_days import get_planilla_allocator, next_month
+
     # Normalizar columna 'Mes' a datetime
     if not np.issubdtype(df_planilla_historica['Mes'].dtype, np.datetime64):
         df_planilla_historica = df_planilla_historica.copy()
         df_planilla_historica['Mes'] = pd.to_datetime(df_planilla_historica['Mes'])
 
-    # Encontrar el mes más reciente en la planilla histórica
+    # El mes "actual" es el siguiente al más reciente en la planilla
     max_mes = df_planilla_historica['Mes'].max()
-    
-    año_max = max_mes.year
-    mes_max = max_mes.month
-    
-    # Calcular el mes "actual" (el siguiente al más reciente en la planilla)
-    if mes_max == 12:
-        año_actual = año_max + 1
-        mes_actual = 1
-    else:
-        año_actual = año_max
-        mes_actual = mes_max + 1
-
-    # Verificar si ya existe la planilla del mes actual
-    existe_actual = (
-        (df_planilla_historica['Mes'].dt.year == año_actual) &
-        (df_planilla_historica['Mes'].dt.month == mes_actual)
-    ).any()
-
-    if existe_actual:
-        # Usar la planilla del mes actual
-        df_mes = df_planilla_historica[
-            (df_planilla_historica['Mes'].dt.year == año_actual) &
-            (df_planilla_historica['Mes'].dt.month == mes_actual)
-        ]
-        # Solo días laborables (lunes=0, ..., viernes=4)
-        dias_mes_actual = pd.date_range(start=datetime(año_actual, mes_actual, 1), end=datetime(año_actual, mes_actual, pd.Period(f'{año_actual}-{mes_actual:02d}').days_in_month))
-        dias_laborables = dias_mes_actual[dias_mes_actual.weekday < 5]
+    año_actual, mes_actual = next_month(max_mes.year, max_mes.month)
+
+    # Usar la planilla del mes actual si existe, si no la del mes anterior
+    meses = df_planilla_historica['Mes']
+    es_actual = (meses.dt.year == año_actual) & (meses.dt.month == mes_actual)
+    if es_actual.any():
+        df_mes = df_planilla_historica[es_actual]
     else:
-        # Usar la planilla del mes anterior
-        df_mes = df_planilla_historica[
-            (df_planilla_historica['Mes'].dt.year == año_max) &
-            (df_planilla_historica['Mes'].dt.month == mes_max)
-        ]
-        # El mes actual es el siguiente al más reciente
-        dias_mes_actual = pd.date_range(start=datetime(año_actual, mes_actual, 1), end=datetime(año_actual, mes_actual, pd.Period(f'{año_actual}-{mes_actual:02d}').days_in_month))
-        dias_laborables = dias_mes_actual[dias_mes_actual.weekday < 5]
-
-    # Agrupar por proyecto y sumar costos
-    df_grouped = df_mes.groupby('DESCRIPCION PROYECTO', as_index=False)['Costos'].sum()
-    num_dias_laborables = len(dias_laborables)
-    df_grouped['COSTO_DIARIO'] = df_grouped['Costos'] / num_dias_laborables if num_dias_laborables > 0 else 0
-
-    # Expandir a cada día laborable del mes actual como fecha completa
-    df_result = pd.DataFrame([
-        {
-            'DESCRIPCION PROYECTO': row['DESCRIPCION PROYECTO'],
-            'FECHA': fecha,
-            'TOTAL': row['COSTO_DIARIO'],
-            'MES_ACTUAL': mes_actual,
-            'AÑO_ACTUAL': año_actual
-        }
-        for _, row in df_grouped.iterrows() for fecha in dias_laborables
-    ])
-    df_result = df_result[["DESCRIPCION PROYECTO","FECHA","TOTAL"]]
-    return df_result
+        df_mes = df_planilla_historica[(meses.dt.year == max_mes.year) & (meses.dt.month == max_mes.month)]
+
+    # Repartir entre los días laborables del mes actual
+    return get_planilla_allocator().allocate(df_mes, target_month=(año_actual, mes_actual))
 
 def generate_date_options_dataframe(start_year=2024, start_month=8):
     """
@@ -508,7 +635,7 @@ def generate_list_month(start_year, start_month):
             - MES: Nombre del mes en español
             - SEMANA: Número de semana por mes (se reinicia en cada mes)
     """
-    from datetime import datetime, timedelta
+    from datetime import datetime
     import pandas as pd
     
     # Fecha actual
@@ -523,48 +650,17 @@ def generate_list_month(start_year, start_month):
         start_year = current_date.year
         start_month = current_date.month
     
-    # Nombres de meses en español
-    month_names = [
-        "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-        "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
-    ]
-    
-    # Generar todas las fechas desde la fecha de inicio hasta la fecha actual
-    date_list = []
-    current_date_iter = start_date
-    
-    while current_date_iter <= current_date:
-        date_list.append(current_date_iter)
-        current_date_iter += timedelta(days=1)
-    
-    # Crear DataFrame con columna FECHA
-    df = pd.DataFrame({'FECHA': date_list})
-    
-    # Extraer año, mes y semana de la columna FECHA
-    df['YEAR'] = df['FECHA'].dt.year
-    df['MES'] = df['FECHA'].dt.month
-    df['MES_TEXT'] = df['FECHA'].dt.month.map(lambda x: month_names[x - 1])
-    
-    # Calcular semana por mes (se reinicia en cada mes)
-    def get_week_of_month(date):
-        """Calcula la semana del mes para una fecha dada"""
-        year = date.year
-        month = date.month
-        day = date.day
-        
-        # Obtener el primer día del mes
-        first_day = datetime(year, month, 1)
-        
-        # Calcular cuántos días han pasado desde el inicio del mes
-        days_since_start = (date - first_day).days
-        
-        # Calcular la semana (cada 7 días es una semana)
-        week_number = (days_since_start // 7) + 1
-        
-        return week_number
-    
-    #df['SEMANA'] = df['FECHA'].apply(get_week_of_month)
-    df['SEMANA'] = df['FECHA'].dt.isocalendar().week 
+    # Año, mes, nombre del mes y semana ISO de cada día desde la dimensión de fechas
+    from helpers.date_dimension import get_date_dimension
+
+    days = get_date_dimension().covering(start_date, current_date).loc[start_date:current_date]
+    df = pd.DataFrame({
+        'FECHA': days.index,
+        'YEAR': days['year'].to_numpy(),
+        'MES': days['month'].to_numpy(),
+        'MES_TEXT': days['month_name'].to_numpy(),
+        'SEMANA': days['week'].array,
+    })
     # Agrupar por YEAR, MES y SEMANA
     grouped_df = df.groupby(['YEAR', 'MES','MES_TEXT', 'SEMANA']).size().reset_index(name='count')
     
@@ -0,0 +1,333 @@
+"""
+Cliente HTTP compartido para Microsoft Graph, SUNAT y descargas de archivos
+
+- Una sesión por proceso con pool de conexiones keep-alive (se recrea tras un fork)
+- Timeouts por defecto (conexión, lectura): ninguna llamada bloquea un worker indefinidamente
+- Reintentos con backoff exponencial para errores de conexión y 429/5xx, respetando Retry-After
+- Métricas por host: peticiones, errores, reintentos y latencia
+- Ruta asyncio nativa (aiohttp) con la misma configuración, para cargas concurrentes en un solo event loop
+- Lecturas parciales con HTTP Range (footer y row groups de un parquet, ver core.incremental)
+
+Configuración (sección 'http' de config.yaml):
+    http:
+      connect_timeout: 5
+      read_timeout: 60
+      retries: 4
+      backoff_factor: 0.5
+      max_retry_after: 60
+      pool_maxsize: 20
+"""
+import asyncio
+import contextlib
+import contextvars
+import os
+import random
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, IO, Optional, Tuple
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _http_config() -> Dict:
+    try:
+        from constants import config
+        return config.get('http', {}) or {}
+    except (ImportError, FileNotFoundError):
+        return {}
+
+
+class HttpMetrics:
+    """Contadores y latencias por host (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, host: str) -> Dict:
+        return self._hosts.setdefault(host, {
+            'requests': 0, 'errors': 0, 'retries': 0, 'status': {},
+            'latency_sum': 0.0, 'latency_max': 0.0, 'latency_buckets': [0] * len(LATENCY_BUCKETS),
+        })
+
+    def observe(self, host: str, seconds: float, status: Optional[int]):
+        with self._lock:
+            stats = self._host(host)
+            stats['requests'] += 1
+            stats['latency_sum'] += seconds
+            stats['latency_max'] = max(stats['latency_max'], seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats['latency_buckets'][i] += 1
+            key = str(status) if status is not None else 'error'
+            stats['status'][key] = stats['status'].get(key, 0) + 1
+            if status is None or status >= 500:
+                stats['errors'] += 1
+
+    def retry(self, host: str):
+        with self._lock:
+            self._host(host)['retries'] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            result = {}
+            for host, stats in self._hosts.items():
+                result[host] = {
+                    **{k: v for k, v in stats.items() if k != 'latency_buckets'},
+                    'status': dict(stats['status']),
+                    'latency_avg': stats['latency_sum'] / stats['requests'] if stats['requests'] else 0.0,
+                    'latency_buckets': dict(zip(map(str, LATENCY_BUCKETS), stats['latency_buckets'])),
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._hosts = {}
+
+
+metrics = HttpMetrics()
+
+
+class MeteredRetry(Retry):
+    """Retry de urllib3 que cuenta cada reintento y limita la espera de Retry-After"""
+
+    def __init__(self, *args, max_retry_after: float = 60, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kw):
+        # urllib3 crea un Retry nuevo tras cada intento: el límite debe pasar a la copia
+        kw.setdefault('max_retry_after', self.max_retry_after)
+        return super().new(**kw)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        host = _pool.host if _pool is not None else 'unknown'
+        metrics.retry(host)
+        status = response.status if response is not None else type(error).__name__
+        print(f"🔁 Reintentando {method} {host}{url or ''} ({status})")
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return min(retry_after, self.max_retry_after) if retry_after is not None else None
+
+
+class HttpSession(requests.Session):
+    """Sesión con timeout por defecto y registro de latencia por petición"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.default_timeout)
+        host = urlparse(url).hostname or 'unknown'
+        started = time.perf_counter()
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.RequestException:
+            metrics.observe(host, time.perf_counter() - started, None)
+            raise
+        metrics.observe(host, time.perf_counter() - started, response.status_code)
+        return response
+
+
+def create_session(http_config: Optional[Dict] = None) -> HttpSession:
+    """Crea una sesión con pool, timeouts y reintentos según la configuración"""
+    http_config = http_config if http_config is not None else _http_config()
+    retry = MeteredRetry(
+        total=http_config.get('retries', 4),
+        backoff_factor=http_config.get('backoff_factor', 0.5),
+        backoff_max=http_config.get('backoff_max', 30),
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=None,  # también POST: la obtención de token es idempotente
+        respect_retry_after_header=True,
+        raise_on_status=False,
+        max_retry_after=http_config.get('max_retry_after', 60),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=http_config.get('pool_connections', 10),
+        pool_maxsize=http_config.get('pool_maxsize', 20),
+        max_retries=retry,
+    )
+    session = HttpSession(timeout=(http_config.get('connect_timeout', 5), http_config.get('read_timeout', 60)))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session() -> HttpSession:
+    """Sesión compartida del proceso actual (los sockets no se comparten entre procesos tras un fork)"""
+    pid = os.getpid()
+    session = _sessions.get(pid)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(pid)
+            if session is None:
+                _sessions.clear()
+                session = _sessions[pid] = create_session()
+    return session
+
+
+def http_metrics() -> Dict:
+    """Métricas HTTP del proceso actual por host"""
+    return metrics.snapshot()
+
+
+# ---------------------------------------------------------------------------
+# Ruta asyncio (aiohttp)
+# ---------------------------------------------------------------------------
+
+_async_session = contextvars.ContextVar('apg_bi_async_session', default=None)
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+def _backoff_delay(attempt: int, http_config: Dict, retry_after: Optional[float] = None) -> float:
+    if retry_after is not None:
+        return min(retry_after, http_config.get('max_retry_after', 60))
+    delay = http_config.get('backoff_factor', 0.5) * (2 ** attempt)
+    return min(delay, http_config.get('backoff_max', 30)) * random.uniform(0.8, 1.0)
+
+
+@contextlib.asynccontextmanager
+async def async_session():
+    """
+    Sesión aiohttp compartida por todas las peticiones dentro del bloque (y las tareas que lance).
+    Si ya hay una sesión abierta en el contexto, se reutiliza.
+    """
+    current = _async_session.get()
+    if current is not None:
+        yield current
+        return
+
+    import aiohttp  # Dependencia opcional, solo necesaria en la ruta async
+
+    http_config = _http_config()
+    timeout = aiohttp.ClientTimeout(
+        sock_connect=http_config.get('connect_timeout', 5),
+        sock_read=http_config.get('read_timeout', 60),
+    )
+    connector = aiohttp.TCPConnector(limit=http_config.get('pool_maxsize', 20), keepalive_timeout=30)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        token = _async_session.set(session)
+        try:
+            yield session
+        finally:
+            _async_session.reset(token)
+
+
+@contextlib.asynccontextmanager
+async def async_request(method: str, url: str, **kwargs):
+    """
+    Petición async con reintentos (errores de conexión, 429/5xx con Retry-After) y métricas.
+    Entrega la respuesta aiohttp abierta; el cuerpo se lee dentro del bloque.
+    """
+    import aiohttp
+
+    http_config = _http_config()
+    retries = http_config.get('retries', 4)
+    host = urlparse(url).hostname or 'unknown'
+
+    async with async_session() as session:
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                response = await session.request(method, url, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics.observe(host, time.perf_counter() - started, None)
+                if attempt >= retries:
+                    raise
+                metrics.retry(host)
+                print(f"🔁 Reintentando {method} {host} ({type(e).__name__})")
+                await asyncio.sleep(_backoff_delay(attempt, http_config))
+                continue
+
+            metrics.observe(host, time.perf_counter() - started, response.status)
+            if response.status in RETRY_STATUS and attempt < retries:
+                retry_after = _retry_after_seconds(response.headers.get('Retry-After'))
+                response.release()
+                metrics.retry(host)
+                print(f"🔁 Reintentando {method} {host} ({response.status})")
+                await asyncio.sleep(_backoff_delay(attempt, http_config, retry_after))
+                continue
+
+            try:
+                yield response
+            finally:
+                response.release()
+            return
+
+
+async def async_get_json(url: str, method: str = 'GET', **kwargs) -> Tuple[int, Any]:
+    """Retorna (status, JSON o texto) de una petición async"""
+    async with async_request(method, url, **kwargs) as response:
+        try:
+            return response.status, await response.json(content_type=None)
+        except ValueError:
+            return response.status, await response.text()
+
+
+async def async_download(url: str, spool_limit: int = 64 * 1024 * 1024, chunk_size: int = 1024 * 1024) -> IO[bytes]:
+    """
+    Descarga un archivo por bloques a un buffer que pasa a archivo temporal sobre `spool_limit` bytes.
+    Retorna el archivo posicionado al inicio (el llamador lo cierra).
+    """
+    destination = tempfile.SpooledTemporaryFile(max_size=spool_limit)
+    try:
+        async with async_request('GET', url) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                destination.write(chunk)
+    except BaseException:
+        destination.close()
+        raise
+    destination.seek(0)
+    return destination
+
+
+class RangeNotSupported(Exception):
+    """El servidor ignoró la cabecera Range y respondió el archivo completo"""
+
+
+def range_header(start: int, end: Optional[int] = None) -> str:
+    """Cabecera Range de los bytes [start, end] (inclusive); start negativo = últimos -start bytes"""
+    if start < 0:
+        return f"bytes={start}"
+    return f"bytes={start}-{'' if end is None else end}"
+
+
+def content_range_size(header: Optional[str]) -> Optional[int]:
+    """Tamaño total del archivo desde 'Content-Range: bytes 0-99/1234' (None si no se conoce)"""
+    total = (header or '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+
+async def async_download_range(url: str, start: int, end: Optional[int] = None) -> Tuple[bytes, Optional[int]]:
+    """Versión async de helpers.get_api.download_range: retorna (bytes, tamaño total del archivo)"""
+    async with async_request('GET', url, headers={'Range': range_header(start, end)}) as response:
+        response.raise_for_status()
+        if response.status != 206:
+            raise RangeNotSupported(url)
+        return await response.read(), content_range_size(response.headers.get('Content-Range'))
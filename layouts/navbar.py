@@ -30,7 +30,7 @@ def create_navbar(data):
                         ),
                         dmc.NavLink(
                             label="Costos Diarios",
-                            id = "navlink-dashboard",
+                            id = "navlink-costos-diarios",
                             active="exact",
                             href="/costos-diarios"
                         ),
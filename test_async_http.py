@@ -0,0 +1,102 @@
+"""
+Pruebas de la ruta asyncio (aiohttp) del cliente HTTP y de la carga concurrente de fuentes
+"""
+import asyncio
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import pytest
+from core import data_manager as data_manager_module
+from core.data_manager import DataManager
+from helpers import http_client
+
+
+def parquet_bytes(rows: int) -> bytes:
+    buffer = io.BytesIO()
+    pd.DataFrame({'FECHA': pd.date_range('2025-01-01', periods=rows, freq='D'), 'MONTO': range(rows)}).to_parquet(buffer)
+    return buffer.getvalue()
+
+
+class StorageStub(BaseHTTPRequestHandler):
+    """
+    /throttled responde 429 la primera vez; /files/<n> tarda 0.3 s y entrega un parquet de n filas.
+    peak_downloads es el máximo de descargas atendidas a la vez.
+    """
+    protocol_version = 'HTTP/1.1'
+    calls = {}
+    lock = threading.Lock()
+    downloads = peak_downloads = 0
+
+    def do_GET(self):
+        StorageStub.calls[self.path] = StorageStub.calls.get(self.path, 0) + 1
+        if self.path == '/throttled' and StorageStub.calls[self.path] == 1:
+            self._send(429, b'{}', {'Retry-After': '0.2'})
+        elif self.path.startswith('/files/'):
+            with StorageStub.lock:
+                StorageStub.downloads += 1
+                StorageStub.peak_downloads = max(StorageStub.peak_downloads, StorageStub.downloads)
+            try:
+                time.sleep(0.3)
+                self._send(200, parquet_bytes(int(self.path.rsplit('/', 1)[1])))
+            finally:
+                with StorageStub.lock:
+                    StorageStub.downloads -= 1
+        else:
+            self._send(200, b'{"value": []}')
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StorageStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StorageStub.calls = {}
+    StorageStub.downloads = StorageStub.peak_downloads = 0
+    http_client.metrics.reset()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_async_retry_after_and_metrics(server):
+    status, data = asyncio.run(http_client.async_get_json(f"{server}/throttled"))
+
+    assert (status, data) == (200, {'value': []})
+    stats = http_client.http_metrics()['127.0.0.1']
+    assert stats['retries'] == 1 and stats['status'] == {'429': 1, '200': 1}
+
+
+def test_sources_load_concurrently_on_one_loop(server, monkeypatch):
+    manager = DataManager()
+    for rows in (10, 20, 30):
+        manager.register_source(f"fuente_{rows}", f"F{rows}.parquet", f"fuente-{rows}-store")
+    files = [{'name': f"F{rows}.parquet", 'eTag': f"v{rows}",
+              '@microsoft.graph.downloadUrl': f"{server}/files/{rows}"} for rows in (10, 20, 30)]
+
+    async def token():
+        return 'token'
+
+    async def listing(access_token, drive_id, item_id):
+        await http_client.async_get_json(f"{server}/children")
+        return files
+
+    monkeypatch.setattr(data_manager_module, 'get_access_token_async', token)
+    monkeypatch.setattr(data_manager_module, 'listar_archivos_en_carpeta_compartida_async', listing)
+
+    results = manager.warm_up(['fuente_10', 'fuente_20', 'fuente_30'])
+
+    assert results == {'fuente_10': True, 'fuente_20': True, 'fuente_30': True}
+    assert StorageStub.peak_downloads >= 2  # las descargas se solapan, no van en serie
+    assert len(manager.get_frame('fuente_30')) == 30
+    assert manager.get_frame('fuente_20')['YEAR'].unique().tolist() == [2025]
@@ -0,0 +1,51 @@
+"""
+Pruebas del calendario de días laborables y la distribución de planilla
+"""
+from datetime import date
+import pandas as pd
+from helpers.business_days import PlanillaAllocator, business_days, easter_sunday
+
+
+def planilla():
+    return pd.DataFrame({
+        'Mes': ['2025-07', '2025-07', '2025-08'],
+        'DESCRIPCION PROYECTO': ['PACKING', 'PACKING', 'CAMPO'],
+        'Costos': [1000.0, 300.0, 2100.0],
+    })
+
+
+def test_peru_calendar_excludes_national_holidays():
+    assert easter_sunday(2025) == date(2025, 4, 20)
+    assert len(business_days(2025, 7)) == 23
+    # 23 y 28 de julio caen en día laborable; el 29 también
+    assert len(business_days(2025, 7, 'peru')) == 20
+    assert date(2025, 4, 18) not in business_days(2025, 4, 'peru').date
+
+
+def test_allocation_splits_month_cost_across_business_days():
+    result = PlanillaAllocator(calendar='none').allocate(planilla())
+
+    julio = result[result['DESCRIPCION PROYECTO'] == 'PACKING']
+    assert len(julio) == 23
+    assert round(julio['TOTAL'].sum(), 6) == 1300.0
+    assert result['FECHA'].is_monotonic_increasing
+    assert list(result.columns) == ['DESCRIPCION PROYECTO', 'FECHA', 'TOTAL']
+
+
+def test_allocation_is_memoized_per_month():
+    allocator = PlanillaAllocator(calendar='peru')
+    first = allocator.allocate(planilla())
+    assert len(allocator._months) == 2
+
+    # Solo cambia agosto: julio se reutiliza
+    changed = planilla()
+    changed.loc[2, 'Costos'] = 999.0
+    second = allocator.allocate(changed)
+    assert len(allocator._months) == 3
+    pd.testing.assert_frame_equal(first.iloc[:20], second.iloc[:20])
+
+
+def test_target_month_reallocates_previous_costs():
+    result = PlanillaAllocator(calendar='none').allocate(planilla().iloc[:2], target_month=(2025, 8))
+    assert result['FECHA'].dt.month.unique().tolist() == [8]
+    assert round(result['TOTAL'].sum(), 6) == 1300.0
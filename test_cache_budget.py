@@ -0,0 +1,85 @@
+"""
+Pruebas de la caché con presupuesto de memoria y particiones por empresa (core.cache_budget)
+"""
+import time
+import numpy as np
+import pandas as pd
+from core.cache_backends import create_cache_backend
+from core.cache_budget import BudgetedMemoryCacheBackend, cache_partition, deep_sizeof, parse_bytes
+from core.data_manager import DataManager
+
+SOURCE = 'mayor_analitico_packing'
+
+
+def frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({'MONTO': np.arange(rows, dtype='float64'), 'CUENTA': ['62: GASTOS DE PERSONAL'] * rows})
+
+
+def compute(cache, key, value, seconds=0.0):
+    """Patrón de los callers: fallo, cálculo (que tarda `seconds`) y set"""
+    assert cache.get_frame(key) is None
+    time.sleep(seconds)
+    cache.set_frame(key, value)
+
+
+def test_sizes_and_config():
+    assert parse_bytes('512MB') == 512 * 1024 ** 2 and parse_bytes('1.5 gb') == int(1.5 * 1024 ** 3)
+    df = frame(10000)
+    assert abs(deep_sizeof(df) - df.memory_usage(deep=True).sum()) < 0.05 * df.memory_usage(deep=True).sum()
+
+    cache = create_cache_backend({'backend': 'memory', 'max_memory': '64MB', 'partitions': {'default': '8MB', 2: '16MB'}})
+    assert isinstance(cache, BudgetedMemoryCacheBackend)
+    assert (cache.max_bytes, cache.quota('1'), cache.quota('2'), cache.quota('shared')) == \
+        (64 * 1024 ** 2, 8 * 1024 ** 2, 16 * 1024 ** 2, None)
+
+
+def test_budget_evicts_cheap_bytes_first():
+    size = deep_sizeof(frame(20000))
+    cache = BudgetedMemoryCacheBackend(max_bytes=int(size * 3.5))
+    cache.set('version:fuente', b'v1')
+
+    compute(cache, 'cube:caro', frame(20000), seconds=0.05)
+    for i in range(4):
+        compute(cache, f'cube:barato-{i}', frame(20000))
+
+    stats = cache.stats()
+    assert stats['bytes'] <= cache.max_bytes and stats['evictions'] == 2
+    assert cache.get_frame('cube:caro') is not None  # mismo tamaño, 50 ms de cálculo: se conserva
+    assert cache.get('version:fuente') == b'v1'       # los punteros de versión no se desalojan
+    assert sum(cache.get_frame(f'cube:barato-{i}') is None for i in range(4)) == 2
+
+
+def test_company_quota_evicts_within_partition():
+    size = deep_sizeof(frame(10000))
+    cache = BudgetedMemoryCacheBackend(max_bytes=size * 20, quotas={'2': int(size * 2.5)})
+
+    with cache_partition(1):
+        compute(cache, 'cube:empresa-1', frame(10000))
+        compute(cache, 'frame:fuente:v1', frame(10000))  # las fuentes son compartidas
+    with cache_partition(2):
+        for i in range(4):
+            compute(cache, f'cube:empresa-2-{i}', frame(10000))
+
+    partitions = cache.stats()['partitions']
+    assert partitions['2']['entries'] == 2 and partitions['2']['evictions'] == 2
+    assert (partitions['1']['entries'], partitions['1']['evictions'], partitions['1']['quota']) == (1, 0, None)
+    assert partitions['shared']['entries'] == 1
+    assert cache.get_frame('cube:empresa-1') is not None
+
+
+def test_evicted_source_releases_the_local_copy():
+    size = deep_sizeof(frame(20000))
+    cache = BudgetedMemoryCacheBackend(max_bytes=int(size * 2.5))
+    dm = DataManager(cache_backend=cache)
+    assert cache.get_frame(f'frame:{SOURCE}:v1') is None  # la fuente se cargó rápido: costo bajo
+    dm.frame_store.publish(SOURCE, 'v1', frame(20000))
+    assert len(dm.get_frame(SOURCE)) == 20000
+    assert dm.memory_stats()['frames'][SOURCE]['budgeted']
+
+    for i in range(2):
+        compute(cache, f'cube:caro-{i}', frame(20000), seconds=0.02)
+
+    # La caché desalojó la fuente y DataManager soltó el mismo DataFrame: la memoria sí se libera
+    assert cache.get_frame(f'frame:{SOURCE}:v1') is None
+    assert SOURCE not in dm.memory_stats()['frames']
+    assert cache.stats()['bytes'] <= cache.max_bytes
@@ -0,0 +1,79 @@
+"""
+Pruebas de equivalencia entre los helpers de limpieza por fila y sus versiones por columna
+"""
+import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from helpers.helpers import (
+    limpiar_kg_exportables,
+    limpiar_kg_exportables_serie,
+    corregir_hora_tarde,
+    corregir_hora_tarde_serie,
+    split_if_colon_at_3,
+    split_if_colon_at_3_serie,
+)
+
+
+@pytest.mark.parametrize('valores', [
+    [1, 25, 300],
+    [1.5, 2.0, 0.125, 12.345],
+    ['12', '3.5', ' 7 ', '+4', '-2.25'],
+    [10, '0.5', 3.0],
+    ['9007199254740993', '1'],              # > 2**53: exacto en int64
+    ['9007199254740993', '1.5'],
+    ['9999999999999999999', '1'],           # fuera de int64 (uint64, como .apply)
+    ['99999999999999999999999', '1'],
+])
+def test_limpiar_kg_exportables_serie(valores):
+    serie = pd.Series(valores, index=[10 + i for i in range(len(valores))], name='KG')
+    pd.testing.assert_series_equal(limpiar_kg_exportables_serie(serie), serie.apply(limpiar_kg_exportables))
+
+
+@pytest.mark.parametrize('valores', [[1, np.nan], ['1,000'], ['abc'], ['0x10'], ['1', '0b11']])
+def test_limpiar_kg_exportables_serie_invalid(valores):
+    with pytest.raises(ValueError):
+        pd.Series(valores).apply(limpiar_kg_exportables)
+    with pytest.raises(ValueError):
+        limpiar_kg_exportables_serie(pd.Series(valores))
+
+
+def test_corregir_hora_tarde_serie():
+    serie = pd.Series([
+        '08:30:00', '11:59:59', '00:00:01', '12:00:00', '15:45:10', '23:00:00',
+        '08:30:00.500', '8:30:00', 'sin hora', None, np.nan, datetime.time(9, 5, 0), 930,
+    ], name='HORA RECEPCION')
+    pd.testing.assert_series_equal(corregir_hora_tarde_serie(serie), serie.apply(corregir_hora_tarde).astype(object))
+
+
+def test_split_if_colon_at_3_serie():
+    serie = pd.Series(['01: PACKING', 'AB:CAMPO  ', 'A:B', 'ABC', '12', '', None, np.nan, 15, '99:'])
+    esperado = serie.apply(split_if_colon_at_3).tolist()
+    resultado = split_if_colon_at_3_serie(serie).to_numpy().tolist()
+    assert repr(resultado) == repr(esperado)
+
+
+@pytest.mark.parametrize('dtype', [pd.ArrowDtype(pa.string()), 'string'])
+def test_arrow_backed_text_columns(dtype):
+    kg = pd.Series(['12', '3.5', None], dtype=dtype)
+    assert limpiar_kg_exportables_serie(kg.iloc[:2]).tolist() == [12.0, 3500.0]
+
+    horas = pd.Series(['08:30:00', 'sin hora', None], dtype=dtype)
+    assert corregir_hora_tarde_serie(horas).iloc[:2].tolist() == ['20:30:00', 'sin hora']
+
+    textos = pd.Series(['01: PACKING', 'CAMPO'], dtype=dtype)
+    assert split_if_colon_at_3_serie(textos).to_numpy().tolist() == [['01', 'PACKING'], [None, 'CAMPO']]
+
+
+def test_non_ascii_values_follow_scalar_helpers():
+    serie = pd.Series(['ÑA: CAMPO\u2003', '١٢:٣٠:٠٠', '٣'])
+    assert split_if_colon_at_3_serie(serie).iloc[0].tolist() == split_if_colon_at_3(serie[0])
+    assert corregir_hora_tarde_serie(serie)[1] == corregir_hora_tarde(serie[1])
+    assert limpiar_kg_exportables_serie(serie.iloc[2:]).tolist() == [3]
+
+
+def test_split_if_colon_at_3_serie_numeric_column():
+    serie = pd.Series([1.5, 2.5])
+    assert split_if_colon_at_3_serie(serie)[0].isna().all()
+    assert split_if_colon_at_3_serie(serie)[1].tolist() == [1.5, 2.5]
@@ -0,0 +1,68 @@
+"""
+Pruebas del plan de datos de los dashboards (core.dashboard_plan)
+"""
+import pytest
+from config.dashboard_configs import DASHBOARD_CONFIGS, VENTAS_CONFIG
+from core.cache_backends import MemoryCacheBackend
+from core.dashboard_factory import DashboardConfig
+from core.dashboard_plan import DataPlan
+from core.data_manager import DataManager
+
+
+@pytest.fixture
+def manager():
+    dm = DataManager(cache_backend=MemoryCacheBackend())
+    dm.register_source("recepcion", "RECEPCION.parquet", "recepcion-data-store",
+                       columns=['FECHA', 'KG', 'JABAS'],
+                       steps=[{'date_parts': {'column': 'FECHA', 'parts': {'YEAR': 'year', 'SEMANA': 'week'}}},
+                              {'measures': {'KG_POR_JABA': 'KG / JABAS'}}])
+    return dm
+
+
+def dashboard(dashboard_id, **overrides):
+    return DashboardConfig({'dashboard_id': dashboard_id, 'title': dashboard_id,
+                            'data_sources': ['recepcion'], **overrides})
+
+
+def test_plan_provisions_only_used_sources_and_shares_them(manager):
+    plan = DataPlan(manager).compile([DashboardConfig(config) for config in DASHBOARD_CONFIGS])
+
+    # Ventas no declara date_options pero su filtro de año lo necesita
+    assert plan.dashboards['ventas'].sources == ['mayor_analitico_packing', 'date_options']
+    assert plan.source_users['mayor_analitico_packing'] == ['costos-diarios', 'ventas']
+    assert plan.file_sources() == ['ocupacion_transporte', 'mayor_analitico_packing']
+    assert 'MONTO' in manager.required_columns['mayor_analitico_packing']
+    assert [store.id for store in manager.get_cache_stores(plan.dashboards['ventas'].sources)] == \
+        ['packing-data-store', 'date-options-store']
+
+
+def test_identical_aggregations_share_one_spec(manager):
+    chart = {'type': 'bar', 'x': 'SEMANA', 'y': 'KG',
+             'aggregation': {'groupby': 'SEMANA', 'agg': {'KG': 'sum'}}}
+    plan = DataPlan(manager).compile([
+        dashboard('uno', charts=[chart], data_sources=['recepcion', 'date_options']),
+        dashboard('dos', charts=[{**chart, 'type': 'line', 'aggregation': {'groupby': ['SEMANA'], 'agg': {'KG': 'sum'}}}]),
+    ])
+
+    assert plan.dashboards['uno'].aggregations[0] is plan.dashboards['dos'].aggregations[0]
+    assert len(plan.aggregations) == 1
+    assert plan.dashboards['uno'].unused_sources == ['date_options']
+
+
+def test_invalid_references_are_reported_together(manager):
+    configs = [
+        dashboard('columnas', charts=[{'x': 'FECHA', 'y': 'KG_POR_JABA'}, {'x': 'MES', 'y': 'KG'}],
+                  filters=[{'name': 'year'}]),
+        dashboard('agregacion', charts=[{'x': 'FECHA', 'y': 'KG', 'aggregation': {'groupby': ['SEMANA'], 'agg': {'KG': 'sum'}}}]),
+        dashboard('fuente', data_sources=['no_existe']),
+        dict(VENTAS_CONFIG, metrics=[{'name': 'm', 'type': 'median', 'column': 'MONTO'}]),
+    ]
+    with pytest.raises(ValueError) as error:
+        DataPlan(manager).compile([c if isinstance(c, DashboardConfig) else DashboardConfig(c) for c in configs])
+
+    message = str(error.value)
+    assert "columnas: la fuente 'recepcion' no tiene las columnas: MES" in message
+    assert 'KG_POR_JABA' not in message  # medida derivada por el pipeline
+    assert 'agregacion: gráfico 0: FECHA no está en el resultado de la agregación' in message
+    assert 'fuente: fuentes no registradas: no_existe' in message
+    assert "ventas: métrica 'm': tipo 'median' no soportado" in message
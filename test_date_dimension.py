@@ -0,0 +1,40 @@
+"""
+Pruebas de la dimensión de fechas (helpers.date_dimension)
+"""
+import numpy as np
+import pandas as pd
+from core.pipeline import compile_pipeline
+from helpers.date_dimension import DateDimension
+
+PARTS = {'YEAR': 'year', 'MES': 'month', 'DIA': 'day', 'TRIMESTRE': 'quarter', 'DIA_SEMANA': 'weekday',
+         'SEMANA': 'week', 'DIA_FECHA': 'date'}
+
+
+def test_lookup_matches_series_dt():
+    rng = np.random.default_rng(0)
+    fechas = pd.Series(pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 900 * 86400, 5000), 's'))
+    fechas[::50] = pd.NaT
+    dimension = DateDimension()
+
+    # Fechas con nulos, con zona horaria y muy dispersas (fuera de la tabla continua)
+    for serie in (fechas, fechas.dt.tz_localize('America/Lima'), pd.Series(pd.to_datetime(['1850-01-03', None, '2025-05-05']))):
+        columns = dimension.lookup(serie, PARTS)
+        dt = serie.dt
+        expected = {'YEAR': dt.year, 'MES': dt.month, 'DIA': dt.day, 'TRIMESTRE': dt.quarter,
+                    'DIA_SEMANA': dt.weekday, 'SEMANA': dt.isocalendar().week, 'DIA_FECHA': dt.normalize().dt.tz_localize(None)}
+        for name, values in expected.items():
+            pd.testing.assert_series_equal(columns[name], values, check_names=False)
+
+
+def test_business_attributes_in_pipeline():
+    df = pd.DataFrame({'FECHA': pd.to_datetime(['2025-07-25', '2025-07-28', '2025-07-31', '2025-08-02'])})
+    plan = compile_pipeline([{'date_parts': {'column': 'FECHA', 'parts': {
+        'LABORABLE': 'business_day', 'SEMANA_MES': 'week_of_month', 'MES_TEXT': 'month_name'}}}])
+
+    result = plan(df)
+    assert result['SEMANA_MES'].tolist() == [4, 4, 5, 1]
+    assert result['MES_TEXT'].tolist() == ['Julio', 'Julio', 'Julio', 'Agosto']
+    assert result['LABORABLE'].tolist() == [True, True, True, False]
+    # 28 de julio (Fiestas Patrias) no es laborable con el calendario de Perú
+    peru = DateDimension('peru').lookup(df['FECHA'], {'LABORABLE': 'business_day'})['LABORABLE']
+    assert peru.tolist() == [True, False, True, False]
@@ -0,0 +1,88 @@
+"""
+Pruebas del almacén de tipo de cambio contra un stub local de la API de SUNAT
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+import pytest
+from helpers.get_api import get_tc_sunat_diario
+from helpers.exchange_rates import ExchangeRateStore
+
+
+class SunatStub(BaseHTTPRequestHandler):
+    """Publica tipo de cambio solo de lunes a viernes; VENTA = 3.70 + día/1000. Las fechas de `rejected` dan 422"""
+    requests = []
+    rejected = set()
+
+    def do_GET(self):
+        day = parse_qs(urlparse(self.path).query)['date'][0]
+        SunatStub.requests.append(day)
+        fecha = pd.Timestamp(day)
+        if day in SunatStub.rejected:
+            self.send_response(422)
+            self.end_headers()
+            return
+        if fecha.weekday() >= 5:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps({'precioCompra': 3.69, 'precioVenta': round(3.70 + fecha.day / 1000, 3),
+                           'moneda': 'USD', 'fecha': day}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def store(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SunatStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    SunatStub.requests = []
+    SunatStub.rejected = set()
+    url = f"http://127.0.0.1:{server.server_port}/v2/sunat/tipo-cambio"
+    yield ExchangeRateStore(str(tmp_path / 'tc.parquet'), fetcher=lambda day: get_tc_sunat_diario(day, base_url=url))
+    server.shutdown()
+
+
+def test_weekends_take_previous_business_day(store):
+    rates = store.rates('2025-01-03', '2025-01-06')  # viernes a lunes
+    assert rates['VENTA'].tolist() == [3.703, 3.703, 3.703, 3.706]
+
+
+def test_backfill_is_persistent_and_incremental(store, tmp_path):
+    assert store.backfill('2025-01-01', '2025-01-31') == 31
+    assert store.backfill('2025-01-01', '2025-01-31') == 0
+
+    reopened = ExchangeRateStore(str(tmp_path / 'tc.parquet'), fetcher=store.fetcher)
+    assert reopened.backfill('2025-01-01', '2025-02-02') == 2
+    assert len(SunatStub.requests) == 33
+
+
+def test_request_errors_are_retried_not_stored(store):
+    # Un 422 (token o formato) no es "sin publicación": la fecha no se guarda
+    SunatStub.rejected = {'2025-01-07'}
+    assert store.backfill('2025-01-06', '2025-01-08') == 3
+    SunatStub.rejected = set()
+    assert store.backfill('2025-01-06', '2025-01-08') == 1
+    assert store.rates('2025-01-07', '2025-01-07')['VENTA'].tolist() == [3.707]
+
+
+def test_convert_column_with_merge_asof(store):
+    df = pd.DataFrame({
+        'FECHA': pd.to_datetime(['2025-01-06', '2025-01-04', None, '2025-01-03']),
+        'MONTO': [3706.0, 370.3, 100.0, 7.406],
+    })
+    result = store.convert(df, to_currency='USD')
+
+    assert result['TC'].tolist()[:2] == [3.706, 3.703]
+    assert result['MONTO_USD'].round(6).tolist()[:2] == [1000.0, 100.0]
+    assert pd.isna(result.loc[2, 'MONTO_USD'])
+    assert store.convert(df, to_currency='PEN')['MONTO_PEN'].round(6).tolist()[0] == round(3706.0 * 3.706, 6)
+    # Una consulta por fecha, incluidos los días previos para el día hábil anterior
+    assert len(SunatStub.requests) == len(set(SunatStub.requests))
@@ -0,0 +1,106 @@
+"""
+Pruebas del pool de cálculo de los callbacks (core.executor)
+"""
+import os
+import threading
+import time
+import pandas as pd
+import pytest
+from core import metrics
+from core.data_manager import data_manager
+from core.executor import ComputeExecutor, source_versions
+from core.shared_frames import SharedFrameStore
+
+SOURCE = 'mayor_analitico_packing'
+
+
+def frame_summary(source_name):
+    df = data_manager.get_frame(source_name)
+    return os.getpid(), len(df), float(df['MONTO'].sum()), str(df['MONTO'].dtype)
+
+
+def measured_total(source_name):
+    with metrics.span('aggregate', source_name) as s:
+        df = data_manager.get_frame(source_name)
+        s.record(rows=len(df))
+        return os.getpid(), float(df['MONTO'].sum())
+
+
+def sleeping_pid(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+@pytest.fixture
+def shared_source(tmp_path, monkeypatch):
+    # Los procesos de cálculo arrancan con este entorno: usan el mismo directorio compartido
+    monkeypatch.setenv('SHARED_FRAMES_DIR', str(tmp_path))
+    monkeypatch.setattr(data_manager, 'frame_store', SharedFrameStore(str(tmp_path)))
+    monkeypatch.setattr(data_manager, '_frames', {})
+    df = pd.DataFrame({'MONTO': [1.5, 2.5, 4.0] * 1000})
+    data_manager.frame_store.publish(SOURCE, 'v1', df)
+    metrics.registry.reset()
+    yield df
+    data_manager.frame_store.release_all()
+
+
+def test_tasks_run_in_processes_over_the_shared_version(shared_source):
+    executor = ComputeExecutor(processes=2, start_method='spawn')
+    try:
+        sources = source_versions({'source': SOURCE})
+        assert sources == {SOURCE: 'v1'}
+        pid, rows, total, dtype = executor.run(frame_summary, SOURCE, sources=sources, task='resumen')
+
+        # Otro proceso leyó la versión publicada mapeada en memoria (Arrow), sin recibir el DataFrame
+        assert pid != os.getpid()
+        assert (rows, total) == (len(shared_source), shared_source['MONTO'].sum())
+        assert dtype == 'double[pyarrow]'
+        assert metrics.EXECUTOR_QUEUE_SECONDS.snapshot()[('process', 'resumen')]['count'] == 1
+        assert metrics.EXECUTOR_RUN_SECONDS.snapshot()[('process', 'resumen')]['count'] == 1
+
+        # Una versión que el proceso no puede usar se calcula en el hilo de la petición
+        assert executor.run(frame_summary, SOURCE, sources={SOURCE: 'v0'})[0] == os.getpid()
+        assert executor.stats()['fallbacks'] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_process_spans_reach_the_parent_registry(shared_source):
+    executor = ComputeExecutor(processes=1, start_method='spawn')
+    try:
+        pid, total = executor.run(measured_total, SOURCE, sources={SOURCE: 'v1'}, task='total')
+
+        # La fase se midió en el proceso de cálculo y queda en el registro que expone /metrics
+        assert pid != os.getpid() and total == shared_source['MONTO'].sum()
+        assert metrics.PHASE_SECONDS.snapshot()[('aggregate', SOURCE)]['count'] == 1
+        assert metrics.PHASE_ROWS.snapshot()[('aggregate', SOURCE)]['sum'] == len(shared_source)
+    finally:
+        executor.shutdown()
+
+
+def test_full_queue_runs_inline(shared_source):
+    executor = ComputeExecutor(processes=1, max_queue=0, start_method='spawn')
+    try:
+        executor.run(sleeping_pid, 0, sources={})  # arranca el proceso fuera de la medición
+        background = threading.Thread(target=executor.run, args=(sleeping_pid, 1.0), kwargs={'sources': {}})
+        background.start()
+        while executor.pending == 0:
+            time.sleep(0.01)
+        assert executor.run(sleeping_pid, 0, sources={}) == os.getpid()
+        background.join()
+        assert executor.stats()['inline'] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_io_tasks_report_queue_and_run_times():
+    metrics.registry.reset()
+    executor = ComputeExecutor(threads=2)
+    try:
+        assert executor.run_io(sum, [1, 2, 3], task='suma') == 6
+        assert metrics.EXECUTOR_RUN_SECONDS.snapshot()[('thread', 'suma')]['count'] == 1
+        # Sin procesos configurados la tarea se ejecuta en el hilo actual
+        assert executor.run(sleeping_pid, 0, sources={}, task='local') == os.getpid()
+        assert ('inline', 'local') in metrics.EXECUTOR_RUN_SECONDS.snapshot()
+    finally:
+        executor.shutdown()
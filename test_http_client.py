@@ -0,0 +1,92 @@
+"""
+Pruebas del cliente HTTP compartido contra un servidor local
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from helpers import http_client
+
+
+class GraphStub(BaseHTTPRequestHandler):
+    """
+    /throttled responde 429 con Retry-After la primera vez; /unavailable responde 503 con un
+    Retry-After largo las dos primeras veces; /slow tarda más que el timeout
+    """
+    protocol_version = 'HTTP/1.1'
+    calls = {}
+
+    def do_GET(self):
+        GraphStub.calls[self.path] = GraphStub.calls.get(self.path, 0) + 1
+        if self.path == '/throttled' and GraphStub.calls[self.path] == 1:
+            self._send(429, b'{}', {'Retry-After': '1'})
+        elif self.path == '/unavailable' and GraphStub.calls[self.path] <= 2:
+            self._send(503, b'{}', {'Retry-After': '30'})
+        elif self.path == '/slow':
+            time.sleep(0.5)
+            self._send(200, b'{}')
+        else:
+            self._send(200, b'{"value": []}')
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GraphStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    GraphStub.calls = {}
+    http_client.metrics.reset()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_retry_after_is_honored_and_counted(server):
+    session = http_client.create_session({'retries': 2, 'backoff_factor': 0})
+    started = time.perf_counter()
+    response = session.get(f"{server}/throttled")
+
+    assert response.status_code == 200
+    assert time.perf_counter() - started >= 1
+    stats = http_client.http_metrics()['127.0.0.1']
+    assert stats['retries'] == 1
+    assert stats['requests'] == 1
+    assert GraphStub.calls['/throttled'] == 2
+
+
+def test_retry_after_is_capped_on_every_retry(server):
+    # urllib3 crea un Retry nuevo tras cada intento: el límite configurado debe llegar al segundo
+    session = http_client.create_session({'retries': 3, 'backoff_factor': 0, 'max_retry_after': 0.1})
+    started = time.perf_counter()
+    response = session.get(f"{server}/unavailable")
+
+    assert response.status_code == 200
+    assert GraphStub.calls['/unavailable'] == 3
+    assert http_client.http_metrics()['127.0.0.1']['retries'] == 2
+    assert time.perf_counter() - started < 10  # sin el límite serían 2 × 30 segundos
+
+
+def test_default_timeout_prevents_hangs(server):
+    session = http_client.create_session({'retries': 0, 'read_timeout': 0.1})
+    with pytest.raises(requests.ConnectionError):
+        session.get(f"{server}/slow")
+    assert http_client.http_metrics()['127.0.0.1']['status'] == {'error': 1}
+
+
+def test_session_is_shared_per_process(server):
+    session = http_client.get_session()
+    assert http_client.get_session() is session
+    session.get(f"{server}/ok")
+    session.get(f"{server}/ok")
+    stats = http_client.http_metrics()['127.0.0.1']
+    assert stats['requests'] == 2 and stats['status'] == {'200': 2}
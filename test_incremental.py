@@ -0,0 +1,141 @@
+"""
+Pruebas de la carga incremental de parquet anexados (core.incremental)
+"""
+import os
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from benchmarks.graph_stub import start_graph_stub
+from benchmarks.synthetic_sources import make_mayor_analitico_packing
+from core import data_manager as data_manager_module
+from core.cache_backends import MemoryCacheBackend
+from core.data_manager import DataManager
+
+FILE_NAME = 'MAYOR ANALITICO PACKING.parquet'
+AGGREGATION = {'groupby': ['FECHA'], 'agg': {'MONTO': 'sum', 'DOCUMENTO': 'count', 'KG': 'mean'}}
+
+
+def write(frame: pd.DataFrame, path: str):
+    """Un row group por mes, como un exportador que reescribe el archivo con los días nuevos al final"""
+    with pq.ParquetWriter(path, pa.Table.from_pandas(frame, preserve_index=False).schema) as writer:
+        for _, month in frame.groupby(frame['FECHA'].dt.to_period('M'), sort=True):
+            writer.write_table(pa.Table.from_pandas(month, preserve_index=False))
+    os.utime(path, ns=(time.time_ns(), time.time_ns()))
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    server = start_graph_stub(str(tmp_path), apply_env=False)
+    monkeypatch.setattr(data_manager_module, 'get_access_token', lambda: 'token')
+    monkeypatch.setattr(data_manager_module, 'listar_archivos_en_carpeta_compartida',
+                        lambda access_token, drive_id, item_id: server.listing())
+
+    async def token():
+        return 'token'
+
+    async def listing(access_token, drive_id, item_id):
+        return server.listing()
+
+    monkeypatch.setattr(data_manager_module, 'get_access_token_async', token)
+    monkeypatch.setattr(data_manager_module, 'listar_archivos_en_carpeta_compartida_async', listing)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def frame():
+    df = make_mayor_analitico_packing(30000, start='2025-01-01', end='2025-06-30')
+    df['KG'] = pd.to_numeric(df['KG EXPORTABLES'], errors='coerce')
+    return df
+
+
+def manager_with_source():
+    dm = DataManager(cache_backend=MemoryCacheBackend())
+    dm.register_source('mayor_analitico_packing', FILE_NAME, 'packing-data-store',
+                       steps=[{'date_parts': {'column': 'FECHA', 'parts': {'YEAR': 'year', 'MES': 'month', 'SEMANA': 'week'}}},
+                              {'measures': {'MONTO_KG': 'MONTO / KG'}}])
+    dm.rollup_specs['mayor_analitico_packing'] = [AGGREGATION]
+    return dm
+
+
+def test_appended_rows_load_incrementally(stub, frame, tmp_path):
+    path = os.path.join(str(tmp_path), FILE_NAME)
+    base, appended = frame[frame['FECHA'] < '2025-06-01'], frame
+    write(base, path)
+
+    dm = manager_with_source()
+    dm.warm_up(['mayor_analitico_packing'])
+
+    write(appended, path)
+    dm.frame_store.expire('mayor_analitico_packing')  # venció source_ttl
+    stub.bytes_sent = 0
+    df = dm.get_frame('mayor_analitico_packing')
+
+    # Solo el footer y el row group de junio, no el archivo completo
+    assert stub.bytes_sent < os.path.getsize(path) / 3
+    expected = dm.data_sources['mayor_analitico_packing'].process(pd.read_parquet(path))
+    pd.testing.assert_frame_equal(df, expected)
+
+    # El rollup extendido coincide con uno calculado desde cero
+    data = {'source': 'mayor_analitico_packing'}
+    for grain in ('day', 'week'):
+        cube = dm.get_cube(data, {'month': '6'}, AGGREGATION, granularity=grain)
+        full = manager_with_source().get_cube(data, {'month': '6'}, AGGREGATION, granularity=grain)
+        pd.testing.assert_frame_equal(cube, full)
+
+
+def test_rewritten_history_falls_back_to_full_download(stub, frame, tmp_path):
+    path = os.path.join(str(tmp_path), FILE_NAME)
+    write(frame, path)
+    dm = manager_with_source()
+    dm.get_frame('mayor_analitico_packing')
+
+    changed = frame.assign(MONTO=frame['MONTO'] * 2)
+    write(changed, path)
+    dm.frame_store.expire('mayor_analitico_packing')
+    stub.bytes_sent = 0
+    df = dm.get_frame('mayor_analitico_packing')
+
+    assert stub.bytes_sent > os.path.getsize(path)
+    assert df['MONTO'].sum() == pytest.approx(changed['MONTO'].sum())
+
+
+def test_in_place_edit_falls_back_to_full_download(stub, frame, tmp_path):
+    path = os.path.join(str(tmp_path), FILE_NAME)
+    write(frame, path)
+    dm = manager_with_source()
+    dm.get_frame('mayor_analitico_packing')
+
+    # Un valor de enero cambia sin mover el min/max del row group: su firma no cambia
+    edited = frame.copy()
+    january = edited.index[edited['FECHA'] < '2025-02-01']
+    row = edited.loc[january, 'MONTO'].sort_values().index[len(january) // 2]
+    edited.loc[row, 'MONTO'] += 0.5
+    write(edited, path)
+    dm.frame_store.expire('mayor_analitico_packing')
+    df = dm.get_frame('mayor_analitico_packing')
+
+    assert df['MONTO'].iloc[row] == edited['MONTO'].iloc[row]
+
+
+def test_overlapping_dates_fall_back_to_full_download(stub, frame, tmp_path):
+    path = os.path.join(str(tmp_path), FILE_NAME)
+    base = frame[frame['FECHA'] < '2025-06-01']
+    write(base, path)
+    dm = manager_with_source()
+    dm.get_frame('mayor_analitico_packing')
+
+    # El row group anexado trae también filas de mayo, ya cargado
+    late = frame[frame['FECHA'] >= '2025-05-31']
+    with pq.ParquetWriter(path, pa.Table.from_pandas(base, preserve_index=False).schema) as writer:
+        for _, month in base.groupby(base['FECHA'].dt.to_period('M'), sort=True):
+            writer.write_table(pa.Table.from_pandas(month, preserve_index=False))
+        writer.write_table(pa.Table.from_pandas(late, preserve_index=False))
+    dm.frame_store.expire('mayor_analitico_packing')
+    stub.bytes_sent = 0
+    df = dm.get_frame('mayor_analitico_packing')
+
+    assert stub.bytes_sent > os.path.getsize(path)
+    assert len(df) == len(base) + len(late)
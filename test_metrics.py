@@ -0,0 +1,100 @@
+"""
+Pruebas de las métricas por fase y del endpoint /metrics (core.metrics)
+"""
+import asyncio
+import pandas as pd
+import pytest
+from flask import Flask
+from core import metrics
+from core.data_manager import data_manager
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.registry.reset()
+    yield
+    metrics.registry.reset()
+
+
+def test_span_records_duration_rows_and_bytes():
+    with metrics.span('parse', 'fuente') as s:
+        s.record(rows=1500, nbytes=2048)
+    with pytest.raises(ValueError):
+        with metrics.span('parse', 'fuente'):
+            raise ValueError('falla')
+
+    series = metrics.PHASE_SECONDS.snapshot()[('parse', 'fuente')]
+    assert series['count'] == 2 and series['buckets'][-1] == 2
+    assert metrics.PHASE_ROWS.snapshot()[('parse', 'fuente')]['sum'] == 1500
+    assert metrics.PHASE_BYTES.snapshot()[('parse', 'fuente')]['count'] == 1
+
+
+def test_profiled_callback_keeps_sync_and_async_signatures():
+    @metrics.profiled_callback('tablero', 'chart', 'uno')
+    def update(value, factor=2):
+        metrics.record_rows(10)
+        return value * factor
+
+    @metrics.profiled_callback('tablero', 'load', 'fuente')
+    async def load(value):
+        return value
+
+    assert update(3) == 6
+    assert asyncio.iscoroutinefunction(load) and asyncio.run(load(5)) == 5
+    snapshot = metrics.CALLBACK_SECONDS.snapshot()
+    assert snapshot[('tablero', 'chart', 'uno')]['count'] == 1
+    assert snapshot[('tablero', 'load', 'fuente')]['count'] == 1
+    assert metrics.CALLBACK_ROWS.snapshot()[('tablero', 'chart', 'uno')]['sum'] == 10
+    assert metrics.CALLBACK_CPU_SECONDS.snapshot()[('tablero', 'chart', 'uno')]['count'] == 1
+
+
+def test_callback_payload_sizes_and_slow_log(monkeypatch, capsys):
+    monkeypatch.setitem(metrics.metrics_config, 'slow_callback_seconds', 0)
+    server = Flask(__name__)
+    metrics.init_app(server)
+
+    @server.route('/_dash-update-component', methods=['POST'])
+    @metrics.profiled_callback('tablero', 'metrics', 'valores')
+    def update():
+        metrics.record_rows(3)
+        return 'x' * 5000
+
+    response = server.test_client().post('/_dash-update-component', data='y' * 1200)
+
+    assert response.status_code == 200
+    labels = ('tablero', 'metrics', 'valores')
+    assert metrics.CALLBACK_INPUT_BYTES.snapshot()[labels]['sum'] == 1200
+    assert metrics.CALLBACK_OUTPUT_BYTES.snapshot()[labels]['sum'] == 5000
+    assert '🐢 Callback lento [tablero] valores (metrics)' in capsys.readouterr().out
+
+
+def test_data_load_phases_are_exported(monkeypatch):
+    def download(source, progress=None):
+        with metrics.span('download', source.name) as s:
+            s.record(nbytes=10)
+        return 'v1', pd.DataFrame({'YEAR': [2025, 2025], 'MES': [1, 2], 'SEMANA': [1, 5]})
+
+    monkeypatch.setattr(data_manager, '_download_frame', download)
+    try:
+        data_manager.apply_filters({'source': 'mayor_analitico_packing'}, {'month': '1'})
+    finally:
+        data_manager.invalidate('mayor_analitico_packing')
+
+    text = metrics.render_metrics()
+    assert '# TYPE apg_bi_phase_seconds histogram' in text
+    assert 'apg_bi_phase_seconds_count{phase="download",source="mayor_analitico_packing"} 1' in text
+    assert 'apg_bi_phase_rows_bucket{phase="filter",source="mayor_analitico_packing",le="10"} 1' in text
+    assert 'apg_bi_phase_rows_sum{phase="filter",source="mayor_analitico_packing"} 1' in text
+
+
+def test_metrics_route():
+    import wsgi
+
+    wsgi.prime_app()
+    with metrics.span('token', 'fuente'):
+        pass
+    response = wsgi.server.test_client().get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'apg_bi_phase_seconds_bucket{phase="token",source="fuente",le="+Inf"} 1' in response.get_data(as_text=True)
@@ -0,0 +1,50 @@
+"""
+Pruebas de los layouts diferidos de las páginas (DashboardFactory.page_layout)
+"""
+import json
+from dash._callback import GLOBAL_CALLBACK_LIST
+from plotly.utils import PlotlyJSONEncoder
+from config.dashboard_configs import VENTAS_CONFIG
+from core.dashboard_factory import DashboardConfig, DashboardFactory
+
+
+def test_page_layout_registers_callbacks_once_and_builds_on_each_visit():
+    config = DashboardConfig({**VENTAS_CONFIG, 'dashboard_id': 'ventas-layout-test'})
+    factory = DashboardFactory()
+
+    registered = len(GLOBAL_CALLBACK_LIST)
+    layout = factory.page_layout(config)
+    after_first = len(GLOBAL_CALLBACK_LIST)
+    assert after_first > registered
+    assert callable(layout)
+
+    # Volver a pedir el layout (o crear el dashboard) no duplica callbacks
+    factory.page_layout(config)
+    factory.create_dashboard(config)
+    assert len(GLOBAL_CALLBACK_LIST) == after_first
+
+    first, second = layout(), layout()
+    assert first is not second
+    tree = json.dumps(first, cls=PlotlyJSONEncoder)
+    assert tree == json.dumps(second, cls=PlotlyJSONEncoder)
+    assert all(f'"ventas-layout-test-chart-{i}' in tree for i in range(len(config.charts)))
+
+
+def test_navigation_only_runs_the_page_router():
+    import wsgi
+    client = wsgi.app.server.test_client()
+
+    # La primera petición valida el layout inicial (ids únicos) y registra los callbacks de los dashboards
+    assert client.get('/health').status_code == 200
+    outputs = [dependency['output'] for dependency in client.get('/_dash-dependencies').get_json()]
+    for dashboard_id in ('ocupacion-transporte', 'costos-diarios', 'ventas'):
+        assert f'{dashboard_id}-chart-0-chart.figure' in outputs
+
+    # El AppShell viene en el layout inicial; al cambiar la URL solo responde dash.page_container
+    layout = client.get('/_dash-layout').get_data(as_text=True)
+    assert '"appshell"' in layout and '"_pages_content"' in layout
+    on_pathname = [
+        dependency['output'] for dependency in client.get('/_dash-dependencies').get_json()
+        if any(i['property'] == 'pathname' for i in dependency['inputs'])
+    ]
+    assert on_pathname == ['.._pages_content.children..._pages_store.data..']
@@ -0,0 +1,69 @@
+"""
+Pruebas del pipeline declarativo de procesamiento de fuentes (core.pipeline)
+"""
+import pandas as pd
+import pytest
+from core.pipeline import DEFAULT_STEPS, compile_pipeline
+from core.data_manager import DataSource
+
+
+def raw_frame():
+    return pd.DataFrame({
+        'FECHA': ['2025-01-06', '2025-01-07', '2025-02-03'],
+        'KG EXPORTABLES': ['1.5', '200', '0.25'],
+        'JABAS': [3, 4, 5],
+        'HORA RECEPCION': ['08:00:00', '14:30:00', None],
+    })
+
+
+def test_default_steps_match_previous_processor():
+    df = pd.DataFrame({'FECHA': pd.to_datetime(['2024-12-30', '2025-01-06'])})
+    result = compile_pipeline(DEFAULT_STEPS)(df.copy())
+
+    assert result['YEAR'].tolist() == [2024, 2025]
+    assert result['MES'].tolist() == [12, 1]
+    assert result['SEMANA'].tolist() == [1, 2]
+    assert result['SEMANA'].dtype == df['FECHA'].dt.isocalendar().week.dtype
+
+    sin_fecha = pd.DataFrame({'MONTO': [1]})
+    pd.testing.assert_frame_equal(compile_pipeline(DEFAULT_STEPS)(sin_fecha.copy()), sin_fecha)
+
+
+def test_declared_steps_are_compiled_and_timed():
+    plan = compile_pipeline([
+        {'clean': {'KG EXPORTABLES': 'limpiar_kg_exportables'}},
+        {'clean': {'HORA RECEPCION': 'corregir_hora_tarde'}},
+        {'cast': {'FECHA': 'datetime', 'JABAS': 'float64'}},
+        {'date_parts': {'column': 'FECHA', 'parts': {'YEAR': 'year', 'SEMANA': 'week'}}},
+        {'measures': {'KG_POR_JABA': '`KG EXPORTABLES` / JABAS'}},
+        {'measures': {'KG_TOTAL': 'KG_POR_JABA * JABAS'}},
+        {'rename': {'KG EXPORTABLES': 'KG'}},
+    ])
+    # Los pasos consecutivos del mismo tipo se fusionan
+    assert [stage.kind for stage in plan.stages] == ['clean', 'cast', 'date_parts', 'measures', 'rename']
+
+    result = plan(raw_frame())
+    assert result['KG'].tolist() == [1500.0, 200.0, 250.0]
+    assert result['HORA RECEPCION'].tolist()[:2] == ['20:00:00', '14:30:00']
+    assert result['KG_POR_JABA'].tolist() == [500.0, 50.0, 50.0]
+    assert result['KG_TOTAL'].tolist() == [1500.0, 200.0, 250.0]
+    assert result['SEMANA'].tolist() == [2, 2, 6]
+    assert [name.split('(')[0] for name, _ in plan.timings] == ['clean', 'cast', 'date_parts', 'measures', 'rename']
+
+
+@pytest.mark.parametrize('steps', [
+    [{'explode': {'A': 'B'}}],
+    [{'clean': {'A': 'no_existe'}}],
+    [{'date_parts': {'column': 'FECHA', 'parts': {'X': 'century'}}}],
+    [{'cast': {'A': 'int'}, 'rename': {'A': 'B'}}],
+])
+def test_invalid_steps_are_rejected(steps):
+    with pytest.raises(ValueError):
+        compile_pipeline(steps)
+
+
+def test_source_version_depends_on_steps():
+    a = DataSource('a', 'A.parquet', 'a-store', steps=[{'cast': {'FECHA': 'datetime'}}])
+    b = DataSource('a', 'A.parquet', 'a-store', steps=[{'cast': {'FECHA': 'numeric'}}])
+    assert a.fingerprint != b.fingerprint
+    assert DataSource('c', 'C.parquet', 'c-store').fingerprint == compile_pipeline(DEFAULT_STEPS).fingerprint
@@ -0,0 +1,52 @@
+"""
+Pruebas de los rollups por fecha y la granularidad automática de los gráficos (core.rollups)
+"""
+import pandas as pd
+import pytest
+from benchmarks.synthetic_sources import make_mayor_analitico_packing
+from core.cache_backends import MemoryCacheBackend
+from core.components import ChartComponent
+from core.data_manager import DataManager
+from core.rollups import period_start
+
+AGGREGATION = {'groupby': ['FECHA'], 'agg': {'MONTO': 'sum', 'DOCUMENTO': 'count', 'KG': 'mean', 'HORAS': 'max'}}
+
+
+@pytest.fixture(scope='module')
+def manager():
+    dm = DataManager(cache_backend=MemoryCacheBackend())
+    df = make_mayor_analitico_packing(20000)
+    df['KG'] = pd.to_numeric(df['KG EXPORTABLES'], errors='coerce')
+    df['HORAS'] = df.index % 13
+    dm._download_frame = lambda source, progress=None: ('v1', dm.data_sources[source.name].process(df))
+    return dm
+
+
+@pytest.mark.parametrize('grain', ['day', 'week', 'month'])
+@pytest.mark.parametrize('filters', [{}, {'year': '2025'}, {'year': '2025', 'month': '3'},
+                                     {'year': '2025', 'week': ['9', '10']}])
+def test_rollup_cube_matches_raw_groupby(manager, grain, filters):
+    data = {'source': 'mayor_analitico_packing'}
+    cube = manager.get_cube(data, filters, AGGREGATION, granularity=grain)
+
+    raw = manager.apply_filters(data, filters)
+    expected = raw.groupby(period_start(raw['FECHA'], grain).rename('FECHA')).agg(AGGREGATION['agg']).reset_index()
+    pd.testing.assert_frame_equal(cube, expected, check_dtype=False)
+
+
+def test_date_span_follows_filters(manager):
+    data = {'source': 'mayor_analitico_packing'}
+    assert manager.get_date_span(data, {'year': '2025', 'month': '2'}, AGGREGATION) == 28
+    assert manager.get_date_span(data, {'year': '2025'}, AGGREGATION) == 365
+    assert manager.get_date_span(data, {'year': '2030'}, AGGREGATION) == 0
+
+
+def test_granularity_respects_point_budget():
+    chart = ChartComponent('c', {'type': 'line', 'x': 'FECHA', 'y': 'MONTO'})
+    assert [chart.select_granularity(days) for days in (31, 120, 365, 840, 2000)] == \
+        ['day', 'day', 'week', 'week', 'month']
+
+    fixed = ChartComponent('c', {'x': 'FECHA', 'y': 'MONTO', 'granularity': 'week'})
+    assert fixed.select_granularity(10) == 'week'
+    small_budget = ChartComponent('c', {'x': 'FECHA', 'y': 'MONTO', 'max_points': 30})
+    assert small_budget.select_granularity(60) == 'week'
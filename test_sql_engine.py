@@ -0,0 +1,80 @@
+"""
+Pruebas del motor DuckDB contra la ruta pandas (core.sql_engine)
+"""
+import os
+import time
+import pandas as pd
+import pytest
+from benchmarks.synthetic_sources import make_mayor_analitico_packing
+from core.cache_backends import MemoryCacheBackend
+from core.data_manager import DataManager
+from core.sql_engine import SqlEngine
+
+AGGREGATIONS = [
+    {'groupby': ['SEMANA'], 'agg': {'MONTO': 'sum', 'DOCUMENTO': 'count'}},
+    {'groupby': ['CUENTA', 'MES'], 'agg': {'MONTO': 'mean', 'KG': 'max', 'HORAS': 'sum'}},
+    {'groupby': ['FECHA'], 'agg': {'MONTO': 'sum', 'KG': 'median', 'DOCUMENTO': 'nunique'}},
+]
+FILTERS = [{}, {'year': '2025'}, {'year': '2025', 'month': '3'}, {'year': '2024', 'week': ['33', '34', '']}]
+
+
+@pytest.fixture(scope='module')
+def managers(tmp_path_factory):
+    df = make_mayor_analitico_packing(50000)
+    df['KG'] = pd.to_numeric(df['KG EXPORTABLES'], errors='coerce')
+    df['HORAS'] = df.index % 13
+    result = {}
+    for engine in ('pandas', 'duckdb'):
+        dm = DataManager(cache_backend=MemoryCacheBackend())
+        dm._sql_engine = SqlEngine(str(tmp_path_factory.mktemp('mirror')), threads=2)
+        dm.register_source('mayor_analitico_packing', 'MAYOR ANALITICO PACKING.parquet', 'packing-data-store', engine=engine)
+        dm._download_frame = lambda source, progress=None, dm=dm: ('v1', dm.data_sources[source.name].process(df.copy()))
+        result[engine] = dm
+    return result
+
+
+@pytest.mark.parametrize('aggregation', AGGREGATIONS)
+@pytest.mark.parametrize('filters', FILTERS)
+def test_cubes_match_pandas(managers, aggregation, filters):
+    data = {'source': 'mayor_analitico_packing'}
+    expected = managers['pandas'].get_cube(data, filters, aggregation)
+    cube = managers['duckdb'].get_cube(data, filters, aggregation)
+    pd.testing.assert_frame_equal(cube, expected)
+
+
+@pytest.mark.parametrize('grain', ['day', 'week', 'month'])
+def test_time_series_and_filters_match_pandas(managers, grain):
+    data = {'source': 'mayor_analitico_packing'}
+    aggregation = {'groupby': ['FECHA'], 'agg': {'MONTO': 'sum', 'KG': 'mean'}}
+    filters = {'year': '2025'}
+    expected = managers['pandas'].get_cube(data, filters, aggregation, granularity=grain)
+    pd.testing.assert_frame_equal(managers['duckdb'].get_cube(data, filters, aggregation, granularity=grain), expected)
+
+    assert managers['duckdb'].get_date_span(data, filters, aggregation) == \
+        managers['pandas'].get_date_span(data, filters, aggregation)
+    rows = managers['duckdb'].apply_filters(data, {'year': '2025', 'month': '2'})
+    expected_rows = managers['pandas'].apply_filters(data, {'year': '2025', 'month': '2'}).reset_index(drop=True)
+    pd.testing.assert_frame_equal(rows, expected_rows)
+
+
+def test_unsupported_aggregation_falls_back_to_pandas(managers):
+    data = {'source': 'mayor_analitico_packing'}
+    aggregation = {'groupby': ['MES'], 'agg': {'MONTO': ['sum', 'max']}}
+    pd.testing.assert_frame_equal(managers['duckdb'].get_cube(data, {}, aggregation),
+                                  managers['pandas'].get_cube(data, {}, aggregation))
+
+
+def test_replaced_mirror_is_kept_until_ttl(tmp_path):
+    engine = SqlEngine(str(tmp_path), ttl=60)
+    df = pd.DataFrame({'MONTO': [1.0, 2.0]})
+    v1 = engine.mirror('fuente', 'v1', df)
+    v2 = engine.mirror('fuente', 'v2', df)
+
+    # Otro worker todavía consulta v1 con la ruta que resolvió antes de la publicación de v2
+    assert engine.rows(v1, {}, df.dtypes)['MONTO'].tolist() == [1.0, 2.0]
+
+    past = time.time() - 120
+    os.utime(v1[:-len('.parquet')] + '.superseded', (past, past))
+    v3 = engine.mirror('fuente', 'v3', df)
+    assert not os.path.exists(v1)
+    assert os.path.exists(v2) and os.path.exists(v3)
@@ -0,0 +1,26 @@
+"""
+Punto de entrada WSGI para producción
+Uso: gunicorn -c gunicorn.conf.py wsgi:server
+"""
+from app import app
+
+server = app.server
+
+
+def prime_app():
+    """
+    Dash configura rutas de páginas, scripts y callbacks en la primera petición.
+    Se fuerza aquí para que ese trabajo ocurra una sola vez en el proceso maestro
+    y los workers lo hereden ya hecho.
+    """
+    try:
+        with server.test_client() as client:
+            # La primera petición dispara los before_request de Dash (_setup_server y router de páginas):
+            # si falla (p. ej. ids duplicados en el layout), los callbacks no quedan registrados
+            statuses = [client.get(path).status_code for path in ('/health', '/_dash-layout', '/_dash-dependencies')]
+        if all(status == 200 for status in statuses):
+            print("✅ App Dash inicializada antes del fork")
+        else:
+            print(f"⚠️ Inicialización de la app incompleta: {statuses}")
+    except Exception as e:
+        print(f"⚠️ No se pudo inicializar la app antes del fork: {e}")